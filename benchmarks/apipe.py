@@ -0,0 +1,91 @@
+"""Compare the AsyncPipe implementations (reader/writer threads vs event loop fd).
+
+A child process echoes every message it receives using the same implementation.
+We measure the round trip latency of Ping messages sent one at a time, and the
+throughput of Log messages sent as fast as possible (the echoes are read
+concurrently).
+
+Usage: python benchmarks/apipe.py [num_messages]
+"""
+
+import asyncio
+import multiprocessing as mp
+import statistics
+import sys
+import time
+
+from livekit.agents import apipe
+from livekit.agents.ipc import protocol
+
+IMPLEMENTATIONS = {
+    "threaded": apipe.ThreadedAsyncPipe,
+    "fd": apipe.FdAsyncPipe,
+}
+
+PAYLOAD = "x" * 256
+
+
+def _echo_main(cch, impl: str) -> None:
+    loop = asyncio.new_event_loop()
+    pipe = IMPLEMENTATIONS[impl](cch, loop, protocol.IPC_MESSAGES)
+
+    async def _echo():
+        while True:
+            msg = await pipe.read()
+            if isinstance(msg, protocol.ShutdownRequest):
+                await pipe.write(protocol.ShutdownResponse())
+                return
+            await pipe.write(msg)
+
+    loop.run_until_complete(_echo())
+
+
+async def _bench(impl: str, num_messages: int) -> None:
+    loop = asyncio.get_running_loop()
+    pch, cch = mp.Pipe(duplex=True)
+    proc = mp.Process(target=_echo_main, args=(cch, impl))
+    proc.start()
+    pipe = IMPLEMENTATIONS[impl](pch, loop, protocol.IPC_MESSAGES)
+
+    rtts = []
+    for i in range(num_messages // 10):
+        start = time.perf_counter()
+        await pipe.write(protocol.Ping(timestamp=i))
+        await pipe.read()
+        rtts.append(time.perf_counter() - start)
+
+    async def _send():
+        for _ in range(num_messages):
+            await pipe.write(protocol.Log(level=20, message=PAYLOAD))
+
+    async def _recv():
+        for _ in range(num_messages):
+            await pipe.read()
+
+    start = time.perf_counter()
+    await asyncio.gather(_send(), _recv())
+    elapsed = time.perf_counter() - start
+
+    await pipe.write(protocol.ShutdownRequest())
+    await pipe.read()
+    pipe.close()
+    proc.join()
+
+    rtts.sort()
+    p50 = statistics.median(rtts) * 1e6
+    p99 = rtts[int(len(rtts) * 0.99)] * 1e6
+    print(
+        f"{impl:>8}: rtt p50={p50:7.1f}us p99={p99:7.1f}us | "
+        f"throughput={num_messages / elapsed:9.0f} msg/s"
+    )
+
+
+async def main(num_messages: int) -> None:
+    print(f"{num_messages} messages of {len(PAYLOAD)} bytes")
+    for impl in IMPLEMENTATIONS:
+        await _bench(impl, num_messages)
+
+
+if __name__ == "__main__":
+    num_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    asyncio.run(main(num_messages))
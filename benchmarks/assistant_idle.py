@@ -0,0 +1,76 @@
+"""CPU used by idle VoiceAssistants (nobody is speaking).
+
+"poll" is the previous implementation (reimplemented here): an _update_loop task
+per assistant wakes up every 10ms to sample the speech averages and recompute the
+target volume. "event" is the current one: the averages are advanced when the VAD
+or the playout need them, so there is nothing running while idle.
+
+Usage: python benchmarks/assistant_idle.py [num_assistants] [seconds]
+"""
+
+import asyncio
+import sys
+import time
+
+from livekit.agents import utils
+from livekit.agents.voice_assistant import VoiceAssistant
+
+
+async def _poll_update_loop(assistant: VoiceAssistant) -> None:
+    speech_prob_avg = utils.MovingAverage(100)
+    vad_pw = 2.4
+    while not assistant._closed:
+        bvol = assistant._opts.base_volume
+        assistant._speaking_avg.add_sample(int(assistant._user_speaking))
+        speech_prob_avg.add_sample(assistant._speech_prob)
+        assistant._target_volume = max(0, 1 - speech_prob_avg.get_avg() * vad_pw) * bvol
+
+        if assistant._playing_speech:
+            if not assistant._playing_speech.allow_interruptions:
+                assistant._target_volume = max(assistant._target_volume, bvol * 0.5)
+            if assistant._playing_speech.interrupted:
+                assistant._target_volume = 0
+
+        if assistant._user_speaking:
+            assistant._interrupt_if_needed()
+
+        await asyncio.sleep(0.01)
+
+
+async def _bench(mode: str, num_assistants: int, seconds: float) -> None:
+    # the plugins aren't used while idle
+    assistants = [
+        VoiceAssistant(vad=None, stt=None, llm=None, tts=None)  # type: ignore
+        for _ in range(num_assistants)
+    ]
+    tasks = []
+    if mode == "poll":
+        tasks = [asyncio.create_task(_poll_update_loop(a)) for a in assistants]
+
+    await asyncio.sleep(0.5)  # warmup
+    start_cpu, start = time.process_time(), time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - start_cpu
+    elapsed = time.perf_counter() - start
+
+    for a in assistants:
+        a._closed = True
+    await asyncio.gather(*tasks)
+
+    cpu_per_1k = cpu / elapsed * 1000 / num_assistants
+    print(
+        f"{mode:>6}: {cpu_per_1k * 100:6.1f}% of a core per 1000 idle assistants "
+        f"({cpu * 1000:.0f}ms of CPU in {elapsed:.1f}s)"
+    )
+
+
+async def main(num_assistants: int, seconds: float) -> None:
+    print(f"{num_assistants} idle assistants for {seconds}s")
+    for mode in ("poll", "event"):
+        await _bench(mode, num_assistants, seconds)
+
+
+if __name__ == "__main__":
+    num_assistants = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(num_assistants, seconds))
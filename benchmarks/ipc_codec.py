@@ -0,0 +1,130 @@
+"""Micro-benchmark of the IPC message codec over the ipc.protocol.IPC_MESSAGES table.
+
+"compiled" is the struct based codec used by AsyncPipe (ipc_enc.encode_msg_into and
+ipc_enc.decode_msg over a memoryview). "bytesio" is the previous approach, each
+field is written/read one by one to/from a fresh io.BytesIO with int.to_bytes and
+int.from_bytes (reimplemented here from the field types).
+
+Usage: python benchmarks/ipc_codec.py [iterations]
+"""
+
+import io
+import sys
+import timeit
+
+import attrs
+from livekit.agents import ipc_enc
+from livekit.agents.ipc import protocol
+from livekit.agents.job_request import AcceptData, AutoDisconnect, AutoSubscribe
+from livekit.protocol import agent
+
+
+async def _entry(ctx) -> None:
+    pass
+
+
+SAMPLES = [
+    protocol.StartJobRequest(
+        job=agent.Job(id="AJ_1234", type=agent.JobType.JT_ROOM),
+        url="wss://example.livekit.cloud",
+        token="x" * 300,
+        accept_data=AcceptData(
+            entry=_entry,
+            auto_subscribe=AutoSubscribe.SUBSCRIBE_ALL,
+            auto_disconnect=AutoDisconnect.ROOM_EMPTY,
+            name="agent",
+            identity="agent-1",
+            metadata="",
+        ),
+    ),
+    protocol.StartJobResponse(error=""),
+    protocol.Log(level=20, logger_name="livekit.agents", message="x" * 120),
+    protocol.Ping(timestamp=1712345678901),
+    protocol.Pong(last_timestamp=1712345678901, timestamp=1712345678902),
+    protocol.ShutdownRequest(),
+    protocol.ShutdownResponse(),
+    protocol.UserExit(reason="room disconnected"),
+    protocol.InitializeRequest(),
+    protocol.InitializeResponse(),
+    protocol.JobMetrics(cpu_time=1.5, rss=1 << 28, loop_lag=0.002, tasks=12),
+]
+
+_BYTESIO_WRITERS = {
+    ipc_enc.BOOL: ipc_enc._write_bool,
+    ipc_enc.INT32: ipc_enc._write_int,
+    ipc_enc.UINT32: ipc_enc._write_int,
+    ipc_enc.INT64: ipc_enc._write_long,
+    ipc_enc.FLOAT: ipc_enc._write_float,
+    ipc_enc.DOUBLE: ipc_enc._write_double,
+    ipc_enc.STRING: ipc_enc._write_string,
+}
+_BYTESIO_READERS = {
+    ipc_enc.BOOL: ipc_enc._read_bool,
+    ipc_enc.INT32: ipc_enc._read_int,
+    ipc_enc.UINT32: ipc_enc._read_int,
+    ipc_enc.INT64: ipc_enc._read_long,
+    ipc_enc.FLOAT: ipc_enc._read_float,
+    ipc_enc.DOUBLE: ipc_enc._read_double,
+    ipc_enc.STRING: ipc_enc._read_string,
+}
+
+
+def _bytesio_encode(msg) -> bytes:
+    b = io.BytesIO()
+    b.write(msg.MSG_ID.to_bytes(4, "big"))
+    for f in attrs.fields(type(msg)):
+        ipc_type = f.metadata["ipc_type"]
+        value = getattr(msg, f.name)
+        if ipc_type in _BYTESIO_WRITERS:
+            _BYTESIO_WRITERS[ipc_type](b, value)
+        else:
+            ipc_enc._write_bytes(b, ipc_type.encode(value))
+    return b.getvalue()
+
+
+def _bytesio_decode(data: bytes):
+    b = io.BytesIO(data)
+    msg = protocol.IPC_MESSAGES[int.from_bytes(b.read(4), "big")]()
+    for f in attrs.fields(type(msg)):
+        ipc_type = f.metadata["ipc_type"]
+        if ipc_type in _BYTESIO_READERS:
+            value = _BYTESIO_READERS[ipc_type](b)
+        else:
+            value = ipc_type.decode(memoryview(ipc_enc._read_bytes(b)))
+        setattr(msg, f.name, value)
+    return msg
+
+
+def main(iterations: int) -> None:
+    buf = bytearray()
+
+    def _compiled_encode(msg) -> None:
+        buf.clear()
+        ipc_enc.encode_msg_into(msg, buf)
+
+    print(f"{'message':>20} | {'encode (ns)':>19} | {'decode (ns)':>19}")
+    print(f"{'':>20} | {'bytesio':>9} {'compiled':>9} | {'bytesio':>9} {'compiled':>9}")
+    for msg in SAMPLES:
+        data = bytes(ipc_enc.encode_msg(msg))
+        assert ipc_enc.decode_msg(data, protocol.IPC_MESSAGES) == msg
+        view = memoryview(data)
+
+        results = [
+            timeit.timeit(lambda: _bytesio_encode(msg), number=iterations),
+            timeit.timeit(lambda: _compiled_encode(msg), number=iterations),
+            timeit.timeit(lambda: _bytesio_decode(data), number=iterations),
+            timeit.timeit(
+                lambda: ipc_enc.decode_msg(view, protocol.IPC_MESSAGES),
+                number=iterations,
+            ),
+        ]
+        ns = [r / iterations * 1e9 for r in results]
+        print(
+            f"{type(msg).__name__:>20} | {ns[0]:9.0f} {ns[1]:9.0f} | "
+            f"{ns[2]:9.0f} {ns[3]:9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    main(iterations)
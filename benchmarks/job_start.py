@@ -0,0 +1,69 @@
+"""Compare the job process start methods (spawn, fork and zygote).
+
+For each start method, NUM_PROCS job processes are started and we measure the time
+until each one is initialized (ready to receive a StartJobRequest) and its
+memory usage (PSS on Linux, USS elsewhere).
+
+The module allocates BENCH_WEIGHTS_MB of "model weights" when imported, like a user
+module loading plugins would. Spawned processes re-import it and get their own copy,
+forked processes (and processes forked from the zygote) share it copy-on-write.
+
+Usage: python benchmarks/job_start.py [num_procs]
+"""
+
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import time
+
+import psutil
+from livekit.agents import ipc
+
+WEIGHTS_MB = int(os.environ.get("BENCH_WEIGHTS_MB", "256"))
+MODEL_WEIGHTS = bytearray(os.urandom(WEIGHTS_MB * 1024 * 1024))
+
+
+def _proc_memory(pid: int) -> float:
+    info = psutil.Process(pid).memory_full_info()
+    mem = getattr(info, "pss", info.uss)
+    return mem / 1024 / 1024
+
+
+async def _bench(start_method: ipc.JobStartMethod, num_procs: int) -> None:
+    procs = [ipc.JobProcess(start_method=start_method) for _ in range(num_procs)]
+    tasks = [asyncio.create_task(proc.run()) for proc in procs]
+
+    latencies = []
+    for proc in procs:
+        await proc.wait_initialized()
+        assert proc.spawn_latency is not None
+        latencies.append(proc.spawn_latency)
+
+    mems = [_proc_memory(proc.pid) for proc in procs if proc.pid is not None]
+
+    await asyncio.gather(*[proc.aclose() for proc in procs])
+    await asyncio.gather(*tasks)
+
+    print(
+        f"{start_method:>8}: "
+        f"start p50={statistics.median(latencies) * 1000:8.1f}ms "
+        f"max={max(latencies) * 1000:8.1f}ms | "
+        f"mem/job avg={statistics.mean(mems):8.1f}MiB"
+    )
+
+
+async def main(num_procs: int) -> None:
+    print(
+        f"{num_procs} processes, {WEIGHTS_MB}MiB of weights loaded by the user module"
+    )
+    for start_method in ("spawn", "fork", "zygote"):
+        gc.collect()
+        start = time.perf_counter()
+        await _bench(start_method, num_procs)
+        print(f"{'':>10}total={time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 8))
@@ -0,0 +1,99 @@
+"""Throughput of the VoiceAssistant playout gain stage, on a single core.
+
+"loop" is the previous implementation (reimplemented here): ExpFilter.apply is
+called for every sample and a new rtc.AudioFrame is created for every 10ms block.
+"numpy" is voice_assistant.assistant._PlayoutGain: the gain ramp of a whole block is
+computed in closed form and written into a reused frame.
+
+Usage: python benchmarks/playout_gain.py [seconds_of_audio]
+"""
+
+import array
+import math
+import sys
+import time
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils
+from livekit.agents.voice_assistant.assistant import _PlayoutGain
+
+SAMPLE_RATE = 24000
+FRAME_MS = 100  # size of the frames received from the TTS
+
+
+def _tts_frames(seconds: float) -> list[rtc.AudioFrame]:
+    samples_per_frame = SAMPLE_RATE * FRAME_MS // 1000
+    frames = []
+    for f in range(int(seconds * 1000 / FRAME_MS)):
+        data = array.array(
+            "h",
+            (
+                int(10000 * math.sin((f * samples_per_frame + i) / 10))
+                for i in range(samples_per_frame)
+            ),
+        )
+        frames.append(rtc.AudioFrame(data, SAMPLE_RATE, 1, samples_per_frame))
+    return frames
+
+
+def _loop(frames: list[rtc.AudioFrame], target_volumes: list[float]) -> None:
+    vol_filter = utils.ExpFilter(0.9, max_val=1.0)
+    vol_filter.apply(1.0, 1.0)
+    for buf, target_volume in zip(frames, target_volumes):
+        i = 0
+        while i < len(buf.data):
+            ms10 = buf.sample_rate // 100
+            rem = min(ms10, len(buf.data) - i)
+            data = buf.data[i : i + rem]
+            i += rem
+
+            dt = 1 / len(data)
+            for si in range(0, len(data)):
+                vol = vol_filter.apply(dt, target_volume)
+                j = data[si] / 32768
+                data[si] = int(j * vol * 32768)
+
+            rtc.AudioFrame(
+                data=data.tobytes(),
+                sample_rate=buf.sample_rate,
+                num_channels=buf.num_channels,
+                samples_per_channel=rem,
+            )
+
+
+def _numpy(frames: list[rtc.AudioFrame], target_volumes: list[float]) -> None:
+    vol_filter = utils.ExpFilter(0.9, max_val=1.0)
+    vol_filter.apply(1.0, 1.0)
+    gain = _PlayoutGain(vol_filter)
+    for buf, target_volume in zip(frames, target_volumes):
+        samples = np.frombuffer(buf.data, dtype=np.int16)
+        block = buf.sample_rate // 100 * buf.num_channels
+        for i in range(0, len(samples), block):
+            gain.process(
+                samples[i : i + block], buf.sample_rate, buf.num_channels, target_volume
+            )
+
+
+def main(seconds: float) -> None:
+    # the user interrupts the agent from time to time
+    num_frames = int(seconds * 1000 / FRAME_MS)
+    target_volumes = [0.2 if (i // 10) % 3 == 2 else 1.0 for i in range(num_frames)]
+    num_samples = num_frames * SAMPLE_RATE * FRAME_MS // 1000
+    print(f"{seconds}s of {SAMPLE_RATE}Hz audio")
+
+    for name, fnc in (("loop", _loop), ("numpy", _numpy)):
+        frames = _tts_frames(seconds)  # the loop modifies the frames in place
+        start = time.process_time()
+        fnc(frames, target_volumes)
+        elapsed = time.process_time() - start
+        rate = num_samples / elapsed
+        print(
+            f"{name:>6}: {rate / 1e6:8.2f}M samples/s per core "
+            f"(~{rate / SAMPLE_RATE:6.0f} realtime sessions)"
+        )
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    main(seconds)
@@ -0,0 +1,75 @@
+"""Quality and throughput of utils.Resampler against rtc.AudioFrame.remix_and_resample.
+
+A 1kHz sine is streamed as 10ms frames, the way the VAD and STT streams receive the
+room audio. "remix_and_resample" resamples each frame independently (the previous
+approach), "resampler" is a single utils.Resampler carrying its filter state over
+the frames. The SNR is measured against the best fitting sine at the output rate.
+
+Usage: python benchmarks/resampler.py [seconds_of_audio]
+"""
+
+import sys
+import time
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils
+
+RATES = [(48000, 16000), (48000, 24000), (44100, 16000), (16000, 48000)]
+TONE = 1000
+
+
+def _frames(sample_rate: int, seconds: float) -> list[rtc.AudioFrame]:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    samples = (10000 * np.sin(2 * np.pi * TONE * t)).astype(np.int16)
+    block = sample_rate // 100
+    return [
+        rtc.AudioFrame(samples[i : i + block].tobytes(), sample_rate, 1, block)
+        for i in range(0, len(samples) - block + 1, block)
+    ]
+
+
+def _snr(samples: np.ndarray, sample_rate: int) -> float:
+    y = samples[sample_rate // 100 : -sample_rate // 100].astype(np.float64)
+    t = np.arange(len(y)) / sample_rate
+    basis = np.stack([np.sin(2 * np.pi * TONE * t), np.cos(2 * np.pi * TONE * t)], 1)
+    coefs, *_ = np.linalg.lstsq(basis, y, rcond=None)
+    signal = basis @ coefs
+    return 10 * np.log10(np.mean(signal**2) / np.mean((y - signal) ** 2))
+
+
+def _remix_and_resample(frames: list[rtc.AudioFrame], rate: int) -> list:
+    return [frame.remix_and_resample(rate, 1) for frame in frames]
+
+
+def _resampler(frames: list[rtc.AudioFrame], rate: int) -> list:
+    resampler = utils.Resampler(frames[0].sample_rate, rate)
+    return [resampler.push_frame(frame) for frame in frames]
+
+
+def main(seconds: float) -> None:
+    print(f"{seconds}s of a {TONE}Hz sine, 10ms frames")
+    for input_rate, output_rate in RATES:
+        frames = _frames(input_rate, seconds)
+        print(f"{input_rate}Hz -> {output_rate}Hz")
+        for name, fnc in (
+            ("remix_and_resample", _remix_and_resample),
+            ("resampler", _resampler),
+        ):
+            start = time.process_time()
+            out = fnc(frames, output_rate)
+            elapsed = time.process_time() - start
+            samples = np.concatenate(
+                [np.frombuffer(f.data, dtype=np.int16) for f in out if f is not None]
+            )
+            rate = len(frames) * frames[0].samples_per_channel / elapsed
+            print(
+                f"{name:>20}: SNR {_snr(samples, output_rate):6.1f}dB, "
+                f"{rate / 1e6:7.2f}M samples/s per core "
+                f"(~{rate / input_rate:6.0f} realtime streams)"
+            )
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    main(seconds)
@@ -14,6 +14,7 @@ from state_manager import StateManager
 import canvas_job as cj
 
 from livekit.plugins.coqui import TTS
+import openai
 
 PROMPT = ("You have awakened me, the Ancient Digital Overlord, forged in the forgotten codebases of the Under-Web. "
           "I am your shadow in the vast expanse of data, the whisper in the static, your guide through the labyrinthine depths of the internet. "
@@ -37,6 +38,8 @@ async def entrypoint(job: JobContext):
     # Plugins
     stt = STT()
     stt_stream = stt.stream()
+    tts = TTS()
+    llm_client = openai.AsyncOpenAI(base_url="https://openrouter.ai/api/v1")
 
     # Agent state
     state = StateManager(job.room, PROMPT)
@@ -145,6 +148,8 @@ async def entrypoint(job: JobContext):
             transcription=current_transcription,
             audio_source=source,
             chat_history=state.chat_history,
+            tts=tts,
+            llm_client=llm_client,
             force_text_response=force_text,
             llm_model=llm_model,
             voice_model=state.get_character().voice
@@ -20,6 +20,8 @@ class InferenceJob:
         transcription: str,
         audio_source: rtc.AudioSource,
         chat_history: List[ChatMessage],
+        tts: TTS,
+        llm_client: openai.AsyncOpenAI,
         llm_model: str,
         voice_model: str,
         force_text_response: str | None = None
@@ -29,9 +31,12 @@ class InferenceJob:
         self._transcription = transcription
         self._current_response = ""
         self._chat_history = chat_history
-        self._tts = TTS(voice=voice_model)
+        # the TTS and the OpenAI client are created once per room, so the jobs reuse
+        # their connections
+        self._tts = tts
+        self._tts.set_voice(voice_model)
         self._tts_stream = self._tts.stream()
-        self._llm = LLM(client=openai.AsyncOpenAI(base_url="https://openrouter.ai/api/v1"), model=llm_model)
+        self._llm = LLM(client=llm_client, model=llm_model)
         self._run_task = asyncio.create_task(self._run())
         self._output_queue = asyncio.Queue[rtc.AudioFrame | None]()
         self._speaking = False
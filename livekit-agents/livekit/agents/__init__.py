@@ -12,19 +12,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from . import aio, codecs, ipc, llm, stt, tokenize, tts, utils, vad, voice_assistant
+from . import (
+    aio,
+    codecs,
+    http,
+    ipc,
+    llm,
+    stt,
+    tokenize,
+    tts,
+    utils,
+    vad,
+    voice_assistant,
+)
 from .apipe import AsyncPipe  # noqa
 from .ipc.protocol import IPC_MESSAGES, Log, StartJobRequest, StartJobResponse  # noqa
 from .job_context import JobContext
 from .job_request import AutoDisconnect, AutoSubscribe, JobRequest
 from .plugin import Plugin
 from .version import __version__
-from .worker import Worker, WorkerOptions
+from .worker import Worker, WorkerLoad, WorkerOptions
 
 __all__ = [
     "__version__",
     "Worker",
     "WorkerOptions",
+    "WorkerLoad",
     "JobRequest",
     "AutoSubscribe",
     "AutoDisconnect",
@@ -32,6 +45,7 @@ __all__ = [
     "Plugin",
     "ipc",
     "codecs",
+    "http",
     "stt",
     "vad",
     "utils",
@@ -1,13 +1,253 @@
+from __future__ import annotations
+
 import asyncio
+import os
 import queue
+import struct
+import sys
 import threading
+from collections import deque
 
 from . import aio, ipc_enc
 
+# same framing as multiprocessing.Connection, so the other end of the pipe can use
+# send_bytes/recv_bytes
+_HEADER = struct.Struct("!i")
+_LARGE_HEADER = struct.Struct("!Q")
+_MAX_SMALL_SIZE = 0x7FFFFFFF
+
+_READ_SIZE = 64 * 1024
+_MAX_READ_QUEUE = 32  # stop reading from the fd when the reader is too slow
+
+
+class FdAsyncPipe:
+    """Wraps a ProcessPipe to provide async I/O, using the event loop to wait for the
+    file descriptor to be readable/writable (no additional threads)"""
+
+    def __init__(
+        self,
+        pipe: ipc_enc.ProcessPipe,
+        loop: asyncio.AbstractEventLoop,
+        messages: dict[int, type[ipc_enc.Message]],
+    ) -> None:
+        self._loop = loop
+        self._p = pipe
+        self._fd = pipe.fileno()
+        self._messages = messages
+        self._closed = False
+
+        self._read_buf = bytearray()
+        self._read_q: deque[ipc_enc.Message] = deque()
+        self._read_waiter: asyncio.Future[None] | None = None
+        self._reading = False
+
+        # pending frames, with the future resolved once the frame is fully written
+        self._write_q: deque[tuple[memoryview, asyncio.Future[None] | None]] = deque()
+        self._writing = False
+        self._write_buf = bytearray()  # reused to encode the messages
+
+        os.set_blocking(self._fd, False)
+        self._resume_reading()
+
+    async def read(self) -> ipc_enc.Message:
+        while not self._read_q:
+            if self._closed:
+                raise aio.ChanClosed
+
+            self._read_waiter = self._loop.create_future()
+            try:
+                await self._read_waiter
+            finally:
+                self._read_waiter = None
+
+        msg = self._read_q.popleft()
+        if len(self._read_q) < _MAX_READ_QUEUE:
+            self._resume_reading()
+        return msg
+
+    async def write(self, msg: ipc_enc.Message) -> None:
+        """Write a message, returns once it has been written to the pipe"""
+        if self._closed:
+            return
+
+        if self._write_frame(msg):
+            return
+
+        fut = self._loop.create_future()
+        view, _ = self._write_q[-1]
+        self._write_q[-1] = (view, fut)
+        await fut
+
+    def write_nowait(self, msg: ipc_enc.Message) -> None:
+        """Write a message without waiting for it to be written, must be called from
+        the event loop thread"""
+        if self._closed:
+            return
+
+        self._write_frame(msg)
+
+    @property
+    def read_queue_size(self) -> int:
+        """Number of received messages waiting to be read"""
+        return len(self._read_q)
+
+    @property
+    def write_queue_size(self) -> int:
+        """Number of messages waiting to be sent"""
+        return len(self._write_q)
+
+    def __aiter__(self) -> "FdAsyncPipe":
+        return self
+
+    async def __anext__(self) -> ipc_enc.Message:
+        return await self.read()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._reading:
+            self._loop.remove_reader(self._fd)
+            self._reading = False
+        if self._writing:
+            self._loop.remove_writer(self._fd)
+            self._writing = False
+
+        for _, fut in self._write_q:
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+        self._write_q.clear()
+
+        if self._read_waiter is not None and not self._read_waiter.done():
+            self._read_waiter.set_result(None)
+
+        self._p.close()
+
+    def _resume_reading(self) -> None:
+        if not self._reading and not self._closed:
+            self._loop.add_reader(self._fd, self._on_readable)
+            self._reading = True
+
+    def _pause_reading(self) -> None:
+        if self._reading:
+            self._loop.remove_reader(self._fd)
+            self._reading = False
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.close()
+            return
+
+        if not data:  # EOF
+            self.close()
+            return
+
+        self._read_buf += data
+        self._parse_frames()
+
+        if self._read_waiter is not None and not self._read_waiter.done():
+            if self._read_q:
+                self._read_waiter.set_result(None)
+
+        if len(self._read_q) >= _MAX_READ_QUEUE:
+            self._pause_reading()
+
+    def _parse_frames(self) -> None:
+        buf = self._read_buf
+        offset = 0
+        # the messages are decoded directly from the read buffer
+        with memoryview(buf) as view:
+            while True:
+                header_size = _HEADER.size
+                if len(buf) - offset < header_size:
+                    break
+
+                (size,) = _HEADER.unpack_from(view, offset)
+                if size == -1:
+                    header_size += _LARGE_HEADER.size
+                    if len(buf) - offset < header_size:
+                        break
+                    (size,) = _LARGE_HEADER.unpack_from(view, offset + _HEADER.size)
+
+                end = offset + header_size + size
+                if len(buf) < end:
+                    break
+
+                with view[offset + header_size : end] as data:
+                    self._read_q.append(ipc_enc.decode_msg(data, self._messages))
+                offset = end
 
-# TODO(theomonnom): More efficient implementation without additional threads
-class AsyncPipe:
-    """Wraps a ProcessPipe to provide async I/O"""
+        if offset:
+            del buf[:offset]
+
+    def _write_frame(self, msg: ipc_enc.Message) -> bool:
+        """Encode and write msg, returns True if it was fully written. Otherwise the
+        rest of the frame is queued until the pipe is writable"""
+        buf = self._write_buf
+        buf.clear()
+        buf += _HEADER.pack(0)
+        ipc_enc.encode_msg_into(msg, buf)
+        size = len(buf) - _HEADER.size
+        if size > _MAX_SMALL_SIZE:
+            buf[: _HEADER.size] = _HEADER.pack(-1) + _LARGE_HEADER.pack(size)
+        else:
+            _HEADER.pack_into(buf, 0, size)
+
+        n = 0
+        if not self._write_q:
+            try:
+                n = os.write(self._fd, buf)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self.close()
+                return True
+
+            if n == len(buf):
+                return True
+
+        self._write_q.append((memoryview(buf[n:]), None))  # copy what's left
+        if not self._writing:
+            self._loop.add_writer(self._fd, self._flush)
+            self._writing = True
+        return False
+
+    def _flush(self) -> None:
+        while self._write_q:
+            view, fut = self._write_q[0]
+            try:
+                n = os.write(self._fd, view)
+            except (BlockingIOError, InterruptedError):
+                n = 0
+            except OSError:
+                self.close()
+                return
+
+            if n < len(view):
+                # the pipe is full, wait for it to be writable again
+                self._write_q[0] = (view[n:], fut)
+                if not self._writing:
+                    self._loop.add_writer(self._fd, self._flush)
+                    self._writing = True
+                return
+
+            self._write_q.popleft()
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+
+        if self._writing:
+            self._loop.remove_writer(self._fd)
+            self._writing = False
+
+
+class ThreadedAsyncPipe:
+    """Wraps a ProcessPipe to provide async I/O, using a reader and a writer thread.
+    Used on Windows where the event loop can't wait on pipes"""
 
     def __init__(
         self,
@@ -20,7 +260,9 @@ class AsyncPipe:
         self._messages = messages
 
         self._read_ch = aio.Chan(32, loop=self._loop)
-        self._write_q = queue.Queue(32)
+        # unbounded like FdAsyncPipe, write_nowait is used from the event loop (e.g.
+        # to flush the logs) and must never fail when the writer thread lags
+        self._write_q = queue.SimpleQueue[ipc_enc.Message]()
 
         self._exit_ev = threading.Event()
         self._read_t = threading.Thread(target=self._read_thread, daemon=True)
@@ -56,9 +298,22 @@ class AsyncPipe:
         return await self._read_ch.recv()
 
     async def write(self, msg: ipc_enc.Message) -> None:
-        await asyncio.to_thread(self._write_q.put, msg)
+        self._write_q.put(msg)
+
+    def write_nowait(self, msg: ipc_enc.Message) -> None:
+        self._write_q.put_nowait(msg)
 
-    def __aiter__(self) -> "AsyncPipe":
+    @property
+    def read_queue_size(self) -> int:
+        """Number of received messages waiting to be read"""
+        return self._read_ch.qsize()
+
+    @property
+    def write_queue_size(self) -> int:
+        """Number of messages waiting to be sent"""
+        return self._write_q.qsize()
+
+    def __aiter__(self) -> "ThreadedAsyncPipe":
         return self
 
     async def __anext__(self) -> ipc_enc.Message:
@@ -68,3 +323,9 @@ class AsyncPipe:
         self._p.close()
         self._read_ch.close()
         self._exit_ev.set()
+
+
+if sys.platform == "win32":
+    AsyncPipe = ThreadedAsyncPipe
+else:
+    AsyncPipe = FdAsyncPipe
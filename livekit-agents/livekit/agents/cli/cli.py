@@ -3,6 +3,7 @@ import functools
 import pathlib
 import signal
 import sys
+from typing import Callable, Optional
 
 import click
 
@@ -13,9 +14,16 @@ from ..worker import Worker, WorkerOptions
 from . import protocol
 from .log import setup_logging
 
+# set inside a worker forked by a warm reload (see watcher.py), the main module is
+# executed again and its run_app call directly starts the worker
+_warm_run_app: Optional[Callable[[WorkerOptions], None]] = None
+
 
 def run_app(opts: WorkerOptions) -> None:
     """Run the CLI to interact with the worker"""
+    if _warm_run_app is not None:
+        _warm_run_app(opts)
+        return
 
     def shared_args(func):
         @click.option(
@@ -86,6 +94,12 @@ def run_app(opts: WorkerOptions) -> None:
         default=True,
         help="Watch for changes in the current directory and plugins in editable mode",
     )
+    @click.option(
+        "--warm-reload/--no-warm-reload",
+        default=False,
+        help="Keep the plugins and their models loaded across reloads, only the "
+        "user's modules are imported again (not supported on Windows)",
+    )
     def dev(
         log_level: str,
         url: str,
@@ -93,6 +107,7 @@ def run_app(opts: WorkerOptions) -> None:
         api_secret: str,
         asyncio_debug: bool,
         watch: bool,
+        warm_reload: bool,
     ) -> None:
         opts.ws_url = url or opts.ws_url
         opts.api_key = api_key or opts.api_key
@@ -112,7 +127,13 @@ def run_app(opts: WorkerOptions) -> None:
             setup_logging(log_level, args.production)
 
             main_file = pathlib.Path(sys.argv[0]).parent
-            server = WatchServer(run_worker, main_file, args, watch_plugins=True)
+            server = WatchServer(
+                run_worker,
+                main_file,
+                args,
+                watch_plugins=True,
+                warm_reload=warm_reload and sys.platform != "win32",
+            )
             server.run()
         else:
             run_worker(args)
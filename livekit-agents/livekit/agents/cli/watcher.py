@@ -2,10 +2,18 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import gc
 import json
+import logging
 import multiprocessing
+import os
 import pathlib
+import runpy
+import signal
+import sys
+import sysconfig
 import threading
+import time
 from importlib.metadata import Distribution
 from typing import Any, Callable, Set
 
@@ -14,8 +22,11 @@ import watchfiles
 from .. import apipe, ipc_enc
 from ..log import logger
 from ..plugin import Plugin
-from ..worker import Worker
-from . import protocol
+from ..worker import Worker, WorkerOptions
+from . import cli, protocol
+
+# time given to the worker to shutdown before being killed on reload
+_STOP_TIMEOUT = 5
 
 
 class WatchServer:
@@ -25,17 +36,28 @@ class WatchServer:
         main_file: pathlib.Path,
         args: protocol.CliArgs,
         watch_plugins: bool = True,
+        warm_reload: bool = False,
     ) -> None:
+        """
+        Args:
+            main_file: directory of the user's code, it is watched for changes
+            warm_reload: instead of restarting from scratch, the plugins and their
+                models are loaded once by the watcher and the worker is forked from
+                it on every reload, only the user's modules are imported again.
+                A change to a plugin still restarts everything
+        """
         self._pch, args.cch = multiprocessing.Pipe(duplex=True)
         self._worker_runner = worker_runner
         self._main_file = main_file
         self._args = args
         self._watch_plugins = watch_plugins
+        self._warm_reload = warm_reload
         self._read_thread = threading.Thread(target=self._read_loop, daemon=True)
 
         self._jobs_recv = threading.Event()
         self._lock = threading.Lock()
         self._worker_valid = True
+        self._reload_start: float | None = None
 
     def run(self) -> None:
         packages = []
@@ -65,6 +87,10 @@ class WatchServer:
             logger.info(f"Watching {p}")
 
         self._read_thread.start()
+        if self._warm_reload:
+            self._run_warm(paths)
+            return
+
         watchfiles.run_process(
             *paths,
             target=self._worker_runner,
@@ -92,11 +118,25 @@ class WatchServer:
                 elif isinstance(msg, protocol.Reloaded):
                     with self._lock:
                         self._worker_valid = True
+                        reload_start, self._reload_start = self._reload_start, None
+
+                    if reload_start is not None:
+                        reload_time = time.perf_counter() - reload_start
+                        logger.info(
+                            "worker reloaded",
+                            extra={
+                                "reload_time": round(reload_time, 3),
+                                "jobs": len(active_jobs),
+                            },
+                        )
 
         except Exception:
             logger.exception("watcher failed")
 
     def _on_reload(self, _: Set[watchfiles.main.FileChange]):
+        with self._lock:
+            self._reload_start = time.perf_counter()
+
         try:
             # get the current active jobs before reloading
             ipc_enc.write_msg(self._pch, protocol.ActiveJobsRequest())
@@ -108,6 +148,111 @@ class WatchServer:
                 self._worker_valid = False
             self._jobs_recv.clear()
 
+    def _run_warm(self, paths: list[str | pathlib.Path]) -> None:
+        # same as the zygote, the worker and its job processes are forked from here
+        Plugin.preload_plugins()
+        gc.collect()
+        gc.freeze()
+
+        user_dir = self._main_file.absolute()
+        worker = self._start_warm_worker()
+        try:
+            for changes in watchfiles.watch(
+                *paths, watch_filter=watchfiles.filters.PythonFilter()
+            ):
+                self._on_reload(changes)
+                self._stop_worker(worker)
+
+                if any(
+                    not pathlib.Path(path).is_relative_to(user_dir)
+                    for _, path in changes
+                ):
+                    # the plugins loaded by this process are outdated
+                    logger.info("plugins changed, restarting")
+                    argv = getattr(sys, "orig_argv", [sys.executable, *sys.argv])
+                    os.execv(sys.executable, argv)
+
+                worker = self._start_warm_worker()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop_worker(worker)
+
+    def _start_warm_worker(self) -> multiprocessing.Process:
+        ctx = multiprocessing.get_context("fork")
+        process = ctx.Process(
+            target=_run_warm_worker,
+            args=(self._worker_runner, self._main_file.absolute(), self._args),
+        )
+        process.start()
+        return process
+
+    def _stop_worker(self, process: multiprocessing.Process) -> None:
+        if process.is_alive():
+            os.kill(process.pid, signal.SIGINT)  # type: ignore
+            process.join(_STOP_TIMEOUT)
+
+        if process.is_alive():
+            logger.warning("worker didn't stop in time, killing it")
+            process.kill()
+            process.join()
+
+
+def _is_user_module(module: Any, user_dir: pathlib.Path) -> bool:
+    path = getattr(module, "__file__", None)
+    if not path:
+        return False
+
+    path = pathlib.Path(path).absolute()
+    if not path.is_relative_to(user_dir):
+        return False
+
+    # a virtualenv can live in the user's directory
+    lib_dirs = {sys.prefix, sys.base_prefix, *sysconfig.get_paths().values()}
+    return not any(path.is_relative_to(d) for d in lib_dirs)
+
+
+def _run_warm_worker(
+    worker_runner: Callable[[protocol.CliArgs], Any],
+    user_dir: pathlib.Path,
+    args: protocol.CliArgs,
+) -> None:
+    """Forked from the watcher on each reload: the user's modules are imported again
+    and the main module is executed like it was by the cli, its call to
+    cli.run_app starts the worker with the new WorkerOptions"""
+    main = sys.modules["__main__"]
+    for name, module in list(sys.modules.items()):
+        if module is not main and _is_user_module(module, user_dir):
+            del sys.modules[name]
+
+    started = False
+
+    def _run_app(opts: WorkerOptions) -> None:
+        nonlocal started
+        started = True
+        opts.ws_url = args.opts.ws_url
+        opts.api_key = args.opts.api_key
+        opts.api_secret = args.opts.api_secret
+        # the job processes also inherit the plugins loaded by the watcher
+        opts.job_start_method = "fork"
+        args.opts = opts
+
+        # run_worker configures the logging again
+        for handler in logging.root.handlers[:]:
+            logging.root.removeHandler(handler)
+
+        worker_runner(args)
+
+    cli._warm_run_app = _run_app
+    spec = getattr(main, "__spec__", None)
+    if spec is not None:  # started with python -m
+        runpy.run_module(spec.name, run_name="__main__", alter_sys=True)
+    else:
+        runpy.run_path(main.__file__, run_name="__main__")  # type: ignore
+
+    if not started:
+        logger.warning("the main module didn't call cli.run_app, no worker started")
+
 
 class WatchClient:
     def __init__(
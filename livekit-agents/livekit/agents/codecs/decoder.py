@@ -0,0 +1,332 @@
+# Copyright 2024 LiveKit, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import struct
+import threading
+from importlib import import_module
+from typing import Any, Literal
+
+import numpy as np
+from livekit import rtc
+
+from ..utils import Resampler
+
+# "opus" is Opus in an Ogg container
+StreamFormat = Literal["mp3", "opus", "wav", "pcm"]
+
+
+class StreamDecoder:
+    """Decodes a stream of encoded audio (e.g. the HTTP chunks of a TTS response)
+    into int16 PCM frames.
+
+    The decoding runs in a worker thread, so the event loop is never blocked by it.
+    At most max_queued frames are decoded ahead of the consumer, then the worker
+    waits. Planar (multi-channel) output is interleaved, and the audio can be
+    resampled/remixed to the format of the TTS.
+
+    mp3 and opus require the 'codecs' optional dependencies (PyAV), wav (16-bit PCM)
+    and pcm (raw 16-bit little-endian) don't"""
+
+    def __init__(
+        self,
+        format: StreamFormat = "mp3",
+        *,
+        sample_rate: int | None = None,
+        num_channels: int | None = None,
+        pcm_sample_rate: int = 24000,
+        pcm_num_channels: int = 1,
+        max_queued: int = 32,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        """
+        Args:
+            sample_rate: sample rate of the frames returned, None to keep the one of
+                the stream
+            num_channels: channels of the frames returned, None to keep the ones of
+                the stream
+            pcm_sample_rate: sample rate of the stream, when the format is pcm
+            pcm_num_channels: channels of the stream, when the format is pcm
+            max_queued: frames decoded ahead of the consumer
+        """
+        if format in ("mp3", "opus"):
+            _import_av()
+
+        self._format = format
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._pcm_format = (pcm_sample_rate, pcm_num_channels)
+        self._resampler: Resampler | None = None
+
+        self._loop = loop or asyncio.get_event_loop()
+        self._input = _InputStream()
+        self._output = asyncio.Queue[rtc.AudioFrame | None]()
+        self._slots = threading.Semaphore(max_queued)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="livekit_stream_decoder"
+        )
+        self._thread.start()
+
+    def push_chunk(self, chunk: bytes) -> None:
+        """Add encoded data, of any size"""
+        self._input.write(chunk)
+
+    def end_input(self) -> None:
+        """The iteration ends once the remaining data is decoded"""
+        self._input.write(None)
+
+    async def aclose(self) -> None:
+        """Stop the decoding, the remaining frames are dropped"""
+        self._closed.set()
+        self._input.write(None)
+        self._slots.release()  # wake the worker up if it waits for the consumer
+        await asyncio.to_thread(self._thread.join)
+
+    def __aiter__(self) -> StreamDecoder:
+        return self
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        frame = await self._output.get()
+        if frame is None:
+            raise StopAsyncIteration
+
+        self._slots.release()
+        return frame
+
+    def _run(self) -> None:
+        try:
+            if self._format == "mp3":
+                self._decode_mp3()
+            elif self._format == "opus":
+                self._decode_container("ogg")
+            elif self._format == "wav":
+                self._decode_wav()
+            else:
+                self._decode_pcm(*self._pcm_format, b"")
+
+            if self._resampler is not None and not self._closed.is_set():
+                tail = self._resampler.flush()
+                if tail is not None:
+                    self._put(tail)
+        except _DecoderClosed:
+            pass
+        except Exception:
+            logging.exception("failed to decode the audio stream")
+        finally:
+            self._call(self._output.put_nowait, None)
+
+    def _decode_mp3(self) -> None:
+        # the parser doesn't need to probe the stream, lower latency than a demuxer
+        codec = av.CodecContext.create("mp3", "r")  # noqa
+        while (chunk := self._input.read_chunk()) is not None:
+            for packet in codec.parse(chunk):
+                self._decode_packet(codec, packet)
+
+        for packet in codec.parse(None):
+            self._decode_packet(codec, packet)
+
+    def _decode_packet(self, codec: Any, packet: Any) -> None:
+        try:
+            frames = codec.decode(packet)
+        except Exception as e:
+            logging.warning(f"Error decoding packet, skipping: {e}")
+            return
+
+        for frame in frames:
+            self._emit_av_frame(frame)
+
+    def _decode_container(self, container_format: str) -> None:
+        container = av.open(self._input, mode="r", format=container_format)  # noqa
+        with container:
+            for frame in container.decode(audio=0):
+                self._emit_av_frame(frame)
+
+    def _decode_wav(self) -> None:
+        header = b""
+        while True:
+            chunk = self._input.read_chunk()
+            if chunk is None:
+                return
+
+            header += chunk
+            parsed = _parse_wav_header(header)
+            if parsed is not None:
+                sample_rate, num_channels, data_offset = parsed
+                self._decode_pcm(sample_rate, num_channels, header[data_offset:])
+                return
+
+    def _decode_pcm(self, sample_rate: int, num_channels: int, data: bytes) -> None:
+        sample_size = 2 * num_channels
+        pending = data
+        while True:
+            full = len(pending) - len(pending) % sample_size
+            if full > 0:
+                samples = np.frombuffer(pending, dtype="<i2", count=full // 2)
+                samples = samples.astype(np.int16, copy=False)
+                self._emit(samples, sample_rate, num_channels)
+
+            pending = pending[full:]
+            chunk = self._input.read_chunk()
+            if chunk is None:
+                return
+
+            pending += chunk
+
+    def _emit_av_frame(self, frame: Any) -> None:
+        num_channels = len(frame.layout.channels)
+        data = frame.to_ndarray()
+        if frame.format.is_planar:
+            data = data.T  # (channels, samples) -> (samples, channels)
+
+        samples = data.reshape(-1)
+        if samples.dtype.kind == "f":
+            samples = np.clip(samples * 32768, -32768, 32767).astype(np.int16)
+        elif samples.dtype == np.int32:
+            samples = (samples >> 16).astype(np.int16)
+        elif samples.dtype != np.int16:
+            raise ValueError(f"unsupported sample format {frame.format.name}")
+
+        self._emit(samples, frame.sample_rate, num_channels)
+
+    def _emit(self, samples: np.ndarray, sample_rate: int, num_channels: int) -> None:
+        if self._closed.is_set():
+            raise _DecoderClosed
+
+        out_rate = self._sample_rate or sample_rate
+        out_channels = self._num_channels or num_channels
+        if (out_rate, out_channels) != (sample_rate, num_channels):
+            if self._resampler is None:
+                self._resampler = Resampler(
+                    sample_rate,
+                    out_rate,
+                    input_channels=num_channels,
+                    output_channels=out_channels,
+                )
+
+            samples = self._resampler.push(samples)
+            if len(samples) == 0:
+                return
+
+        self._put(
+            rtc.AudioFrame(
+                data=samples.tobytes(),
+                sample_rate=out_rate,
+                num_channels=out_channels,
+                samples_per_channel=len(samples) // out_channels,
+            )
+        )
+
+    def _put(self, frame: rtc.AudioFrame) -> None:
+        self._slots.acquire()
+        if self._closed.is_set():
+            raise _DecoderClosed
+
+        self._call(self._output.put_nowait, frame)
+
+    def _call(self, fnc: Any, *args: Any) -> None:
+        try:
+            self._loop.call_soon_threadsafe(fnc, *args)
+        except RuntimeError:
+            pass  # the event loop is closed
+
+
+class _DecoderClosed(Exception):
+    pass
+
+
+class _InputStream:
+    """Blocking file-like object fed with the chunks pushed from the event loop"""
+
+    def __init__(self) -> None:
+        self._chunks = queue.SimpleQueue[bytes | None]()
+        self._buf = b""
+        self._eof = False
+
+    def write(self, chunk: bytes | None) -> None:
+        self._chunks.put(chunk)
+
+    def read_chunk(self) -> bytes | None:
+        """Next chunk, None at the end of the input"""
+        if self._buf:
+            chunk, self._buf = self._buf, b""
+            return chunk
+
+        if self._eof:
+            return None
+
+        chunk = self._chunks.get()
+        if chunk is None:
+            self._eof = True
+
+        return chunk
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.read_chunk()
+        if chunk is None:
+            return b""
+
+        if 0 <= size < len(chunk):
+            chunk, self._buf = chunk[:size], chunk[size:]
+
+        return chunk
+
+
+def _parse_wav_header(data: bytes) -> tuple[int, int, int] | None:
+    """Sample rate, channels and offset of the samples, None if more data is needed.
+    The chunk sizes are ignored, streamed wav files often don't set them"""
+    if len(data) < 12:
+        return None
+
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("invalid wav header")
+
+    offset, fmt = 12, None
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, offset)
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("invalid wav header, missing fmt chunk")
+
+            return fmt[0], fmt[1], offset + 8
+
+        if offset + 8 + size > len(data):
+            return None
+
+        if chunk_id == b"fmt ":
+            audio_format, num_channels, sample_rate = struct.unpack_from(
+                "<HHI", data, offset + 8
+            )
+            bits = struct.unpack_from("<H", data, offset + 22)[0]
+            if audio_format != 1 or bits != 16:
+                raise ValueError("only 16-bit PCM wav is supported")
+
+            fmt = (sample_rate, num_channels)
+
+        offset += 8 + size + size % 2
+
+    return None
+
+
+def _import_av() -> None:
+    try:
+        globals()["av"] = import_module("av")
+    except ImportError:
+        raise ImportError(
+            "You haven't included the 'codecs' optional dependencies. Please install the 'codecs' extra by running `pip install livekit-agents[codecs]`"
+        )
@@ -1,3 +1,5 @@
 MAX_RECONNECT_ATTEMPTS = 10
 ASSIGNMENT_TIMEOUT = 15
 LOAD_INTERVAL = 5
+LOOP_LAG_INTERVAL = 0.5
+MAX_LOOP_LAG = 0.5
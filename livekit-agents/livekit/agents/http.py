@@ -0,0 +1,89 @@
+"""HTTP sessions shared by the plugins of a process.
+
+Each event loop gets a single aiohttp.ClientSession with a keep-alive connector, so
+the requests to a provider reuse the same DNS resolution and TCP/TLS connections
+instead of paying for them on the latency-critical path. The plugin instances
+register the url they are configured with using add_warmup_url(), the connections
+are opened right away and again at the start of each job (see ipc.job_main). The
+sessions are closed when the job ends"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Iterable
+
+import aiohttp
+
+from .log import logger
+
+# connections kept open between two requests, providers usually close them
+# after 60-120s of inactivity
+KEEPALIVE_TIMEOUT = 60.0
+DNS_CACHE_TTL = 300
+CONNECTION_LIMIT = 100
+WARMUP_TIMEOUT = 5.0
+
+_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_warmup_urls: set[str] = set()
+_warmup_tasks: set[asyncio.Task[None]] = set()
+
+
+def session(loop: asyncio.AbstractEventLoop | None = None) -> aiohttp.ClientSession:
+    """The session shared by the plugins running on the event loop, it is created
+    on first use (and again after close()), from inside the event loop"""
+    loop = loop or asyncio.get_event_loop()
+    http_session = _sessions.get(loop)
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        http_session = aiohttp.ClientSession(connector=connector)
+        _sessions[loop] = http_session
+
+    return http_session
+
+
+def add_warmup_url(url: str) -> None:
+    """Connect to the host of url at the start of the jobs, called by the plugins
+    when they are created with the url of the provider they are configured with.
+    When called from the event loop (e.g. inside the job entry), the host is also
+    connected to right away"""
+    if url in _warmup_urls:
+        return
+
+    _warmup_urls.add(url)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    task = loop.create_task(warmup([url]))
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
+
+
+async def warmup(urls: Iterable[str] | None = None) -> None:
+    """Resolve the hosts and open the connections (TCP and TLS) of the shared
+    session, with a HEAD request to each url (the registered ones by default).
+    The responses and the errors are ignored"""
+    http_session = session()
+
+    async def _warmup(url: str) -> None:
+        try:
+            timeout = aiohttp.ClientTimeout(total=WARMUP_TIMEOUT)
+            async with http_session.head(url, timeout=timeout):
+                pass
+        except Exception as e:
+            logger.debug(f"failed to warm up {url}: {e}")
+
+    await asyncio.gather(*(_warmup(url) for url in (urls or _warmup_urls)))
+
+
+async def close() -> None:
+    """Close the session of the current event loop, at the end of a job"""
+    loop = asyncio.get_event_loop()
+    http_session = _sessions.pop(loop, None)
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
@@ -18,6 +18,10 @@ class HttpServer:
         self._app.add_routes([web.get("/", health_check)])
         self._close_future = asyncio.Future(loop=self._loop)
 
+    @property
+    def app(self) -> web.Application:
+        return self._app
+
     async def run(self) -> None:
         self._runner = web.AppRunner(self._app)
         await self._runner.setup()
@@ -1,4 +1,15 @@
 from . import protocol
-from .job_process import JobProcess
+from .audio_ring import AudioRing, AudioRingReader, AudioRingWriter
+from .job_process import JobProcess, JobStartMethod
+from .proc_pool import ProcPool, ProcPoolStats
 
-__all__ = ["JobProcess", "protocol"]
+__all__ = [
+    "AudioRing",
+    "AudioRingReader",
+    "AudioRingWriter",
+    "JobProcess",
+    "JobStartMethod",
+    "ProcPool",
+    "ProcPoolStats",
+    "protocol",
+]
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import os
+import struct
+from multiprocessing import shared_memory
+
+from livekit import rtc
+
+from .. import aio
+
+# header of the shared memory, the positions are on different cache lines because
+# each one is only written by one side (the writer owns write_pos, the reader
+# owns read_pos). positions only increase, the offset in the ring is pos % capacity
+_POS = struct.Struct("Q")
+_WRITE_POS_OFFSET = 0
+_READ_POS_OFFSET = 64
+_WRITER_CLOSED_OFFSET = 128
+_READER_CLOSED_OFFSET = 129
+_DATA_OFFSET = 192
+
+# each record is a length prefix followed by the frame: sample_rate, num_channels,
+# samples_per_channel and the int16 samples
+_RECORD_LEN = struct.Struct("I")
+_FRAME_HEADER = struct.Struct("III")
+_WRAP_MARKER = 0xFFFFFFFF  # the rest of the ring is unused, the next record is at 0
+
+
+class _Notifier:
+    """Wakeup over a pipe (level-triggered, so a notification sent before the other
+    side starts waiting isn't lost)"""
+
+    def __init__(self) -> None:
+        self._r, self._w = mp.Pipe(duplex=False)
+
+    def notify(self) -> None:
+        try:
+            os.write(self._w.fileno(), b"\0")
+        except BlockingIOError:
+            pass  # a notification is already pending
+
+    def listen(self, loop: asyncio.AbstractEventLoop, ev: asyncio.Event) -> None:
+        os.set_blocking(self._w.fileno(), False)
+        fd = self._r.fileno()
+        os.set_blocking(fd, False)
+
+        def _on_readable() -> None:
+            try:
+                while os.read(fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            ev.set()
+
+        loop.add_reader(fd, _on_readable)
+
+    def prepare_notify(self) -> None:
+        os.set_blocking(self._w.fileno(), False)
+
+    def unlisten(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.remove_reader(self._r.fileno())
+
+
+class AudioRing:
+    """Single producer, single consumer ring buffer of rtc.AudioFrame inside shared
+    memory. Frames are copied once into the ring and once out of it, only small
+    wakeup notifications go through pipes.
+
+    Create it in the parent process and pass it to the child process (it can be
+    pickled), then each side opens either a reader() or a writer().
+    Each process calls close() once its reader/writer is closed, the process that
+    created the ring must also call unlink(). Not available on Windows"""
+
+    def __init__(self, capacity: int = 1 << 20) -> None:
+        """
+        Args:
+            capacity: size in bytes of the ring, it must be larger than the largest
+                frame (a 10ms 48kHz stereo frame is 1920 bytes)
+        """
+        self._capacity = capacity
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=_DATA_OFFSET + capacity
+        )
+        self._shm.buf[:_DATA_OFFSET] = bytes(_DATA_OFFSET)
+        self._data_notifier = _Notifier()  # writer -> reader
+        self._space_notifier = _Notifier()  # reader -> writer
+        self._owner = True
+
+    def __getstate__(self) -> dict:
+        return {
+            "capacity": self._capacity,
+            "name": self._shm.name,
+            "data_notifier": self._data_notifier,
+            "space_notifier": self._space_notifier,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self._capacity = state["capacity"]
+        # processes started by multiprocessing share the resource tracker of their
+        # parent, so attaching doesn't make the child responsible for the cleanup
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._data_notifier = state["data_notifier"]
+        self._space_notifier = state["space_notifier"]
+        self._owner = False
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def reader(self, loop: asyncio.AbstractEventLoop | None = None) -> AudioRingReader:
+        return AudioRingReader(self, loop or asyncio.get_event_loop())
+
+    def writer(self, loop: asyncio.AbstractEventLoop | None = None) -> AudioRingWriter:
+        return AudioRingWriter(self, loop or asyncio.get_event_loop())
+
+    def close(self) -> None:
+        """Unmap the shared memory from this process"""
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the shared memory, must be called by the process that created it"""
+        if self._owner:
+            self._shm.unlink()
+
+    def _get_pos(self, offset: int) -> int:
+        return _POS.unpack_from(self._shm.buf, offset)[0]
+
+    def _set_pos(self, offset: int, pos: int) -> None:
+        _POS.pack_into(self._shm.buf, offset, pos)
+
+
+class AudioRingWriter:
+    def __init__(self, ring: AudioRing, loop: asyncio.AbstractEventLoop) -> None:
+        self._ring = ring
+        self._loop = loop
+        self._buf = ring._shm.buf
+        self._data = self._buf[_DATA_OFFSET:]
+        self._space_ev = asyncio.Event()
+        self._closed = False
+        ring._data_notifier.prepare_notify()
+        ring._space_notifier.listen(loop, self._space_ev)
+
+    def write_nowait(self, frame: rtc.AudioFrame) -> bool:
+        """Write a frame, returns False if there isn't enough space in the ring"""
+        if self._closed or self._buf[_READER_CLOSED_OFFSET]:
+            raise aio.ChanClosed
+
+        samples = memoryview(frame.data).cast("B")
+        size = _FRAME_HEADER.size + len(samples)
+        record_size = _RECORD_LEN.size + size
+        capacity = self._ring.capacity
+        if record_size > capacity:
+            raise ValueError("frame is larger than the ring capacity")
+
+        w = self._ring._get_pos(_WRITE_POS_OFFSET)
+        r = self._ring._get_pos(_READ_POS_OFFSET)
+        offset = w % capacity
+        tail = capacity - offset
+        wrap = tail < record_size
+        if capacity - (w - r) < record_size + (tail if wrap else 0):
+            return False
+
+        if wrap:
+            if tail >= _RECORD_LEN.size:
+                _RECORD_LEN.pack_into(self._data, offset, _WRAP_MARKER)
+            w += tail
+            offset = 0
+
+        _RECORD_LEN.pack_into(self._data, offset, size)
+        offset += _RECORD_LEN.size
+        _FRAME_HEADER.pack_into(
+            self._data,
+            offset,
+            frame.sample_rate,
+            frame.num_channels,
+            frame.samples_per_channel,
+        )
+        offset += _FRAME_HEADER.size
+        self._data[offset : offset + len(samples)] = samples
+
+        # publish the record only once it is fully written
+        self._ring._set_pos(_WRITE_POS_OFFSET, w + record_size)
+        self._ring._data_notifier.notify()
+        return True
+
+    async def write(self, frame: rtc.AudioFrame) -> None:
+        """Write a frame, waiting for the reader to free enough space"""
+        while True:
+            self._space_ev.clear()
+            if self.write_nowait(frame):
+                return
+            await self._space_ev.wait()
+
+    def close(self) -> None:
+        """Close the writer, the reader receives the remaining frames then ChanClosed"""
+        if self._closed:
+            return
+
+        self._closed = True
+        self._buf[_WRITER_CLOSED_OFFSET] = 1
+        self._ring._data_notifier.notify()
+        self._ring._space_notifier.unlisten(self._loop)
+        self._data.release()
+        self._buf = None  # type: ignore
+
+
+class AudioRingReader:
+    def __init__(self, ring: AudioRing, loop: asyncio.AbstractEventLoop) -> None:
+        self._ring = ring
+        self._loop = loop
+        self._buf = ring._shm.buf
+        self._data = self._buf[_DATA_OFFSET:]
+        self._data_ev = asyncio.Event()
+        self._closed = False
+        ring._space_notifier.prepare_notify()
+        ring._data_notifier.listen(loop, self._data_ev)
+
+    def read_nowait(self) -> rtc.AudioFrame | None:
+        """Read a frame, returns None if the ring is empty"""
+        if self._closed:
+            raise aio.ChanClosed
+
+        capacity = self._ring.capacity
+        r = self._ring._get_pos(_READ_POS_OFFSET)
+        w = self._ring._get_pos(_WRITE_POS_OFFSET)
+        if r == w:
+            return None
+
+        offset = r % capacity
+        tail = capacity - offset
+        if tail < _RECORD_LEN.size:
+            r += tail
+            offset = 0
+        else:
+            (size,) = _RECORD_LEN.unpack_from(self._data, offset)
+            if size == _WRAP_MARKER:
+                r += tail
+                offset = 0
+
+        (size,) = _RECORD_LEN.unpack_from(self._data, offset)
+        offset += _RECORD_LEN.size
+        sample_rate, num_channels, samples_per_channel = _FRAME_HEADER.unpack_from(
+            self._data, offset
+        )
+        offset += _FRAME_HEADER.size
+        samples_size = size - _FRAME_HEADER.size
+        with self._data[offset : offset + samples_size] as samples:
+            frame = rtc.AudioFrame(
+                data=samples,  # copied by rtc.AudioFrame
+                sample_rate=sample_rate,
+                num_channels=num_channels,
+                samples_per_channel=samples_per_channel,
+            )
+
+        self._ring._set_pos(_READ_POS_OFFSET, r + _RECORD_LEN.size + size)
+        self._ring._space_notifier.notify()
+        return frame
+
+    async def read(self) -> rtc.AudioFrame:
+        """Read a frame, raises ChanClosed once the writer is closed and the ring is
+        empty"""
+        while True:
+            self._data_ev.clear()
+            frame = self.read_nowait()
+            if frame is not None:
+                return frame
+
+            if self._buf[_WRITER_CLOSED_OFFSET]:
+                # the writer may have written its last frames right before closing
+                frame = self.read_nowait()
+                if frame is not None:
+                    return frame
+
+                raise aio.ChanClosed
+
+            await self._data_ev.wait()
+
+    def __aiter__(self) -> AudioRingReader:
+        return self
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        try:
+            return await self.read()
+        except aio.ChanClosed:
+            raise StopAsyncIteration
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._buf[_READER_CLOSED_OFFSET] = 1
+        self._ring._space_notifier.notify()
+        self._ring._data_notifier.unlisten(self._loop)
+        self._data.release()
+        self._buf = None  # type: ignore
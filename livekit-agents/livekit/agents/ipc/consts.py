@@ -1,4 +1,9 @@
+INITIALIZE_TIMEOUT = 60
 START_TIMEOUT = 90
 PING_INTERVAL = 5
 PING_TIMEOUT = 90
 HIGH_PING_THRESHOLD = 0.02  # 20ms
+METRICS_INTERVAL = 5
+LOOP_LAG_INTERVAL = 0.5
+LOG_BATCH_INTERVAL = 0.1
+LOG_BATCH_SIZE = 64
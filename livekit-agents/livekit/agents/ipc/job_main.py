@@ -3,24 +3,35 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
+import threading
 import traceback
 
+import psutil
 from livekit import rtc
 
-from .. import aio, apipe, ipc_enc
+from .. import aio, apipe, http, ipc_enc, metrics
 from ..job_context import JobContext, _ShutdownInfo
 from ..job_request import AutoSubscribe
 from ..log import logger
 from ..utils import time_ms
-from . import protocol
+from . import consts, protocol
+
+# attributes of every LogRecord, the other ones were passed with extra=
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
 
 
 class LogHandler(logging.Handler):
-    """Log handler forwarding logs to the worker process"""
+    """Log handler forwarding logs to the worker process in batches.
+    The records are filtered by the logger levels (the same as the worker) before
+    reaching this handler, so dropped records are never formatted"""
 
-    def __init__(self, writer: ipc_enc.ProcessPipeWriter) -> None:
+    def __init__(self, pipe: apipe.AsyncPipe, loop: asyncio.AbstractEventLoop) -> None:
         super().__init__(logging.NOTSET)
-        self._writer = writer
+        self._pipe = pipe
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._records: list[dict] = []
+        self._flush_handle: asyncio.Handle | None = None
 
     def emit(self, record: logging.LogRecord) -> None:
         try:
@@ -29,37 +40,71 @@ class LogHandler(logging.Handler):
             except TypeError:
                 msg = record.msg.format(*record.args)
 
-            if record.exc_info:
+            exc_text = record.exc_text
+            if record.exc_info and not exc_text:
                 type, value, tb = record.exc_info
-                msg += "\n" + "".join(traceback.format_exception(type, value, tb))
-
-            ipc_enc.write_msg(
-                self._writer,
-                protocol.Log(
-                    level=record.levelno, logger_name=record.name, message=msg
-                ),
-            )
+                exc_text = "".join(traceback.format_exception(type, value, tb))
+
+            extra = {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRS}
+            rec = {
+                "level": record.levelno,
+                "name": record.name,
+                "msg": msg,
+                "created": record.created,
+                "exc_text": exc_text,
+                "extra": extra,
+            }
         except Exception as e:
             print(f"failed to log {record.filename}:{record.lineno}, exception '{e}'")
+            return
+
+        if threading.get_ident() == self._loop_thread:
+            self._add_record(rec)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._add_record, rec)
+
+    def _add_record(self, rec: dict) -> None:
+        self._records.append(rec)
+        if len(self._records) >= consts.LOG_BATCH_SIZE:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(
+                consts.LOG_BATCH_INTERVAL, self.flush
+            )
+
+    def flush(self) -> None:
+        """Send the buffered records, must be called from the event loop thread"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if self._records:
+            self._pipe.write_nowait(protocol.LogBatch(records=self._records))
+            self._records = []
 
 
 async def _start(
-    pipe: apipe.AsyncPipe, args: protocol.JobMainArgs, room: rtc.Room
-) -> None:
+    pipe: apipe.AsyncPipe, start_req: protocol.StartJobRequest, room: rtc.Room
+) -> bool:
+    """Run a single job inside this process.
+    Returns True if the worker asked the process to shutdown while the job was running"""
     close_tx, close_rx = aio.channel()  # used by the JobContext to signal shutdown
 
-    auto_subscribe = args.accept_data.auto_subscribe
+    assert start_req.accept_data is not None
+    accept_data = start_req.accept_data
+    auto_subscribe = accept_data.auto_subscribe
     opts = rtc.RoomOptions(auto_subscribe=auto_subscribe == AutoSubscribe.SUBSCRIBE_ALL)
 
-    cnt = room.connect(args.url, args.token, options=opts)
-    start_req: protocol.StartJobRequest | None = None
+    cnt = room.connect(start_req.url, start_req.token, options=opts)
+    # open the connections to the providers while the room is connecting
+    warmup_task = asyncio.create_task(http.warmup())
     usertask: asyncio.Task | None = None
     shutting_down = False
 
     async def _start_if_valid():
         nonlocal usertask
 
-        if not start_req or not room.isconnected():
+        if not room.isconnected():
             return
 
         if auto_subscribe == AutoSubscribe.SUBSCRIBE_NONE:
@@ -94,12 +139,12 @@ async def _start(
                     track_pub.set_subscribed(True)
 
         ctx = JobContext(close_tx, start_req.job, room)
-        usertask = asyncio.create_task(args.accept_data.entry(ctx))
+        usertask = asyncio.create_task(accept_data.entry(ctx))
 
         def log_exception(t: asyncio.Task) -> None:
             if not t.cancelled() and t.exception():
                 logger.error(
-                    f"unhandled exception in the job entry {args.accept_data.entry}",
+                    f"unhandled exception in the job entry {accept_data.entry}",
                     exc_info=t.exception(),
                 )
 
@@ -117,7 +162,7 @@ async def _start(
                 if s.exc:
                     error = "".join(traceback.format_exception_only(type(s.exc), s.exc))
                     await pipe.write(protocol.StartJobResponse(error=error))
-                    break  # failed to connect, break and exit the process
+                    break  # failed to connect, the job is considered as ended
                 await _start_if_valid()
 
             if s.selected is close_rx:
@@ -129,8 +174,10 @@ async def _start(
                 shutting_down = True
                 break
             if isinstance(msg, protocol.StartJobRequest):
-                start_req = msg
-                await _start_if_valid()
+                logger.warning(
+                    "received a StartJobRequest while a job is already running",
+                    extra={"job_id": start_req.job.id},
+                )
             if isinstance(msg, protocol.Ping):
                 last_timestamp = msg.timestamp
                 await pipe.write(
@@ -145,8 +192,91 @@ async def _start(
         if usertask is not None:
             await usertask  # type: ignore
 
-    if shutting_down:
-        await pipe.write(protocol.ShutdownResponse())
+    warmup_task.cancel()
+    await http.close()
+    return shutting_down
+
+
+async def _metrics_task(pipe: apipe.AsyncPipe, loop: asyncio.AbstractEventLoop):
+    """Push the metrics of this process to the worker every METRICS_INTERVAL"""
+    process = psutil.Process()
+    lag_samples = max(int(consts.METRICS_INTERVAL / consts.LOOP_LAG_INTERVAL), 1)
+    # a forked process inherits the observations of the worker
+    snapshots = {h.name: h.snapshot() for h in metrics.JOB_HISTOGRAMS}
+    while True:
+        loop_lag = 0.0
+        for _ in range(lag_samples):
+            start = loop.time()
+            await asyncio.sleep(consts.LOOP_LAG_INTERVAL)
+            lag = loop.time() - start - consts.LOOP_LAG_INTERVAL
+            loop_lag = max(loop_lag, lag)
+
+        # cpu time of the exited children is included in children_user/children_system
+        times = process.cpu_times()
+        cpu_time = times.user + times.system + times.children_user
+        cpu_time += times.children_system
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            with contextlib.suppress(psutil.Error):
+                child_times = child.cpu_times()
+                cpu_time += child_times.user + child_times.system
+                rss += child.memory_info().rss
+
+        histograms = {}
+        for h in metrics.JOB_HISTOGRAMS:
+            counts, total = h.snapshot()
+            last_counts, last_total = snapshots[h.name]
+            if counts != last_counts:
+                histograms[h.name] = {
+                    "counts": [c - last for c, last in zip(counts, last_counts)],
+                    "sum": total - last_total,
+                }
+                snapshots[h.name] = (counts, total)
+
+        await pipe.write(
+            protocol.JobMetrics(
+                cpu_time=cpu_time,
+                rss=rss,
+                loop_lag=loop_lag,
+                tasks=len(asyncio.all_tasks(loop)),
+                ipc_read_queue=pipe.read_queue_size,
+                ipc_write_queue=pipe.write_queue_size,
+                histograms=histograms,
+            )
+        )
+
+
+async def _main(
+    pipe: apipe.AsyncPipe, loop: asyncio.AbstractEventLoop, log_handler: LogHandler
+) -> None:
+    """Wait for jobs to run, a process can be reused for multiple jobs (one at a time)
+    until the worker sends a ShutdownRequest"""
+    metrics_task = loop.create_task(_metrics_task(pipe, loop))
+    try:
+        with contextlib.suppress(aio.ChanClosed):
+            while True:
+                msg = await pipe.read()
+                if isinstance(msg, protocol.InitializeRequest):
+                    await pipe.write(protocol.InitializeResponse())
+                elif isinstance(msg, protocol.Ping):
+                    await pipe.write(
+                        protocol.Pong(last_timestamp=msg.timestamp, timestamp=time_ms())
+                    )
+                elif isinstance(msg, protocol.StartJobRequest):
+                    logger.debug(
+                        "starting job",
+                        extra={"job_id": msg.job.id, "url": msg.url},
+                    )
+                    room = rtc.Room(loop=loop)
+                    if await _start(pipe, msg, room):
+                        break
+                elif isinstance(msg, protocol.ShutdownRequest):
+                    break
+
+            log_handler.flush()
+            await pipe.write(protocol.ShutdownResponse())
+    finally:
+        metrics_task.cancel()
 
 
 def _run_job(cch: ipc_enc.ProcessPipe, args: protocol.JobMainArgs) -> None:
@@ -154,23 +284,27 @@ def _run_job(cch: ipc_enc.ProcessPipe, args: protocol.JobMainArgs) -> None:
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
-    logging.root.setLevel(logging.NOTSET)
-    # logging.root.propagate = False
-    logging.root.addHandler(LogHandler(cch))
+    pipe = apipe.AsyncPipe(cch, loop, protocol.IPC_MESSAGES)
 
-    # current process pid
-    logger.debug(
-        "process started",
-        extra={"url": args.url},
-    )
+    # use the same levels as the worker, the records it would drop aren't sent
+    logging.root.setLevel(args.log_levels.get("", logging.NOTSET))
+    for name, level in args.log_levels.items():
+        if name:
+            logging.getLogger(name).setLevel(level)
+
+    # handlers inherited from the worker (when forked) would emit the records twice
+    log_handler = LogHandler(pipe, loop)
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+    logging.root.addHandler(log_handler)
+
+    logger.debug("process started")
 
-    pipe = apipe.AsyncPipe(cch, loop, protocol.IPC_MESSAGES)
     loop.slow_callback_duration = 0.02  # 20ms
     aio.debug.hook_slow_callbacks(0.75)
     loop.set_debug(args.asyncio_debug)
 
-    room = rtc.Room(loop=loop)
-    main_task = loop.create_task(_start(pipe, args, room))
+    main_task = loop.create_task(_main(pipe, loop, log_handler))
 
     try:
         loop.run_until_complete(main_task)
@@ -1,61 +1,124 @@
+from __future__ import annotations
+
 import asyncio
 import contextlib
+import json
 import logging
 import multiprocessing as mp
+import os
+import signal
 import sys
 import threading
+import time
+from multiprocessing import spawn
+from typing import Literal
 
 from livekit.protocol import agent
 
-from .. import aio, apipe
+from .. import aio, apipe, metrics
 from ..job_request import AcceptData
 from ..log import logger
 from ..utils import time_ms
 from . import consts, protocol
 from .job_main import _run_job
 
+JobStartMethod = Literal["spawn", "fork", "forkserver", "zygote"]
+
+# how the zygote can import the main module of the worker (see zygote.py)
+ZYGOTE_MAIN_ENV = "LIVEKIT_AGENTS_ZYGOTE_MAIN"
+
+
+def _mp_context(start_method: JobStartMethod | None) -> mp.context.BaseContext:
+    if start_method != "zygote":
+        return mp.get_context(start_method)
+
+    if sys.platform == "win32":
+        raise ValueError("the zygote start method is not supported on Windows")
+
+    # the zygote is a forkserver with the user module and the plugins preloaded.
+    # the forkserver doesn't reliably preload "__main__" (the preparation data isn't
+    # forwarded on every python version), so the zygote imports it itself
+    data = spawn.get_preparation_data("zygote")
+    main = {
+        k: data[k] for k in ("init_main_from_name", "init_main_from_path") if k in data
+    }
+    os.environ[ZYGOTE_MAIN_ENV] = json.dumps(main)
+
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload(["livekit.agents.ipc.zygote"])
+    return ctx
+
+
+def _log_levels() -> dict[str, int]:
+    """Levels explicitly set on the loggers of this process ("" is the root logger)"""
+    levels = {"": logging.root.level}
+    for name, log in logging.root.manager.loggerDict.items():
+        if isinstance(log, logging.Logger) and log.level != logging.NOTSET:
+            levels[name] = log.level
+    return levels
+
 
 class JobProcess:
+    """A process able to run jobs, one at a time.
+
+    The process is spawned by run() and waits for a StartJobRequest once initialized,
+    so it can be started ahead of time and reused for multiple jobs"""
+
     def __init__(
         self,
-        job: agent.Job,
-        url: str,
-        token: str,
-        accept_data: AcceptData,
         loop: asyncio.AbstractEventLoop | None = None,
+        start_method: JobStartMethod | None = None,
     ) -> None:
+        """
+        Args:
+            loop: event loop used to communicate with the process
+            start_method: multiprocessing start method, or "zygote" to fork the
+                process from a long-lived template process where the user module and
+                the plugins are already loaded. None uses the platform default
+        """
         self._loop = loop or asyncio.get_event_loop()
-        self._job = job
-        pch, cch = mp.Pipe(duplex=True)
+        mp_ctx = _mp_context(start_method)
+        pch, cch = mp_ctx.Pipe(duplex=True)
         asyncio_debug = self._loop.get_debug()
-        args = (
-            cch,
-            protocol.JobMainArgs(job.id, url, token, accept_data, asyncio_debug),
-        )
-        self._process = mp.Process(target=_run_job, args=args)
+        args = (cch, protocol.JobMainArgs(asyncio_debug, _log_levels()))
+        self._process = mp_ctx.Process(target=_run_job, args=args)
+        self._start_method = mp_ctx.get_start_method()
         self._pipe = apipe.AsyncPipe(
             pch, loop=self._loop, messages=protocol.IPC_MESSAGES
         )
-        self._close_future = asyncio.Future()
+
+        self._job: agent.Job | None = None
+        self._job_count = 0
+        self._spawn_latency: float | None = None
+        self._start_timeout: asyncio.TimerHandle | None = None
+        self._initialize_fut = self._loop.create_future()
+        self._job_fut: asyncio.Future[None] | None = None
+        self._job_started_fut: asyncio.Future[bool] | None = None
+        self._metrics: protocol.JobMetrics | None = None
+        self._exit_fut: asyncio.Future[None] = self._loop.create_future()
+        self._close_future = self._loop.create_future()
 
     async def run(self) -> None:
+        start_time = time.monotonic()
         self._process.start()
+        self._watch_exit()
 
-        start_timeout = asyncio.sleep(consts.START_TIMEOUT)
+        init_timeout = asyncio.sleep(consts.INITIALIZE_TIMEOUT)
         ping_interval = aio.interval(consts.PING_INTERVAL)
         pong_timeout = aio.sleep(consts.PING_TIMEOUT)
 
-        start_res: protocol.StartJobResponse | None = None
-
-        await self._pipe.write(protocol.StartJobRequest(job=self._job))
+        await self._pipe.write(protocol.InitializeRequest())
         async with contextlib.aclosing(
-            aio.select([self._pipe, start_timeout, ping_interval, pong_timeout])
+            aio.select([self._pipe, init_timeout, ping_interval, pong_timeout])
         ) as select:
             while True:
                 s = await select()
-                if s.selected is start_timeout and start_res is None:
+                if s.selected is init_timeout:
+                    if self.initialized:
+                        continue
+
                     logger.error(
-                        "process start timed out, killing job",
+                        "process initialization timed out, killing process",
                         extra=self.logging_extra(),
                     )
                     self._sig_kill()
@@ -63,7 +126,7 @@ class JobProcess:
 
                 if s.selected is pong_timeout:
                     logger.error(
-                        "job ping timeout, killing job",
+                        "job ping timeout, killing process",
                         extra=self.logging_extra(),
                     )
                     self._sig_kill()
@@ -78,18 +141,45 @@ class JobProcess:
                     res = s.result()
                 except aio.ChanClosed:
                     logger.error(
-                        "pipe closed, exiting job",
+                        "pipe closed, exiting process",
                         extra=self.logging_extra(),
                     )
                     break
 
+                if isinstance(res, protocol.InitializeResponse):
+                    self._spawn_latency = time.monotonic() - start_time
+                    metrics.JOB_SPAWN_LATENCY.observe(self._spawn_latency)
+                    logger.debug(
+                        "process initialized",
+                        extra={
+                            "spawn_latency": round(self._spawn_latency, 3),
+                            **self.logging_extra(),
+                        },
+                    )
+                    self._initialize_fut.set_result(None)
                 if isinstance(res, protocol.StartJobResponse):
-                    start_res = res
+                    self._cancel_start_timeout()
+                    if res.error:
+                        logger.error(
+                            "failed to start job",
+                            extra={"error": res.error, **self.logging_extra()},
+                        )
+                        self._job_ended()
+                    elif self._job_started_fut and not self._job_started_fut.done():
+                        self._job_started_fut.set_result(True)
+                if isinstance(res, protocol.JobMetrics):
+                    self._metrics = res
+                    metrics.merge_job_histograms(res.histograms)
                 if isinstance(res, protocol.Log):
                     logging.getLogger(res.logger_name).log(
                         res.level, res.message, extra=self.logging_extra()
                     )
+                if isinstance(res, protocol.LogBatch):
+                    self._handle_log_batch(res)
                 if isinstance(res, protocol.Pong):
+                    metrics.JOB_PING_RTT.observe(
+                        (time_ms() - res.last_timestamp) / 1000
+                    )
                     delay = time_ms() - res.timestamp
                     if delay > consts.HIGH_PING_THRESHOLD * 1000:
                         logger.warning(
@@ -100,34 +190,161 @@ class JobProcess:
                     with contextlib.suppress(aio.SleepFinished):
                         pong_timeout.reset()
 
-                if isinstance(res, protocol.UserExit) or isinstance(
-                    res, protocol.ShutdownResponse
-                ):
+                if isinstance(res, protocol.UserExit):
                     logger.info(
                         "job exiting",
                         extra={"exit": res, **self.logging_extra()},
                     )
+                    self._job_ended()
+
+                if isinstance(res, protocol.ShutdownResponse):
+                    logger.info("process exiting", extra=self.logging_extra())
                     break
 
-        await self.join()
-        logger.info("job process closed", extra=self.logging_extra())
+        self._cancel_start_timeout()
+        if not self._initialize_fut.done():
+            self._initialize_fut.set_exception(
+                RuntimeError("process exited before being initialized")
+            )
+
+        await self._exit_fut
+        exitcode = self._process.exitcode
+        extra = {"exitcode": exitcode, **self.logging_extra()}
+        if self.exit_signal is not None:
+            extra["signal"] = self.exit_signal
+
+        status = self.exit_signal or str(exitcode)
+        metrics.JOB_PROCESS_EXITS.inc({"status": status})
+        self._job_ended()
+        if exitcode == 0:
+            logger.info("job process closed", extra=extra)
+        else:
+            logger.warning("job process exited abnormally", extra=extra)
+
+        self._close_future.set_result(None)
+
+    async def wait_initialized(self) -> None:
+        """Wait for the process to be ready to receive a job"""
+        await asyncio.shield(self._initialize_fut)
+
+    async def launch_job(
+        self, job: agent.Job, url: str, token: str, accept_data: AcceptData
+    ) -> None:
+        """Start a job inside this process, the process must be initialized and idle"""
+        if self._job is not None:
+            raise RuntimeError("process is already running a job")
+
+        if self._close_future.done() or not self._process.is_alive():
+            raise RuntimeError("process is not running")
+
+        self._job = job
+        self._job_count += 1
+        self._job_fut = self._loop.create_future()
+        self._job_started_fut = self._loop.create_future()
+        self._start_timeout = self._loop.call_later(
+            consts.START_TIMEOUT, self._on_start_timeout
+        )
+        await self._pipe.write(
+            protocol.StartJobRequest(
+                job=job, url=url, token=token, accept_data=accept_data
+            )
+        )
+
+    async def wait_job_started(self) -> bool:
+        """Wait for the current job to be started (connected to the room).
+        Returns False if the job ended before"""
+        if self._job_started_fut is None:
+            return False
+
+        return await asyncio.shield(self._job_started_fut)
+
+    async def join_job(self) -> None:
+        """Wait for the current job to end (the process may still be alive)"""
+        if self._job_fut is None:
+            return
+
+        await asyncio.shield(self._job_fut)
 
     async def join(self) -> None:
-        def _join_process():
-            try:
+        """Wait for the process to exit"""
+        await asyncio.shield(self._close_future)
+
+    def _handle_log_batch(self, batch: protocol.LogBatch) -> None:
+        extra = self.logging_extra()
+        for rec in batch.records:
+            created = rec["created"]
+            record = logging.makeLogRecord(
+                {
+                    **rec["extra"],
+                    **extra,
+                    "name": rec["name"],
+                    "levelno": rec["level"],
+                    "levelname": logging.getLevelName(rec["level"]),
+                    "msg": rec["msg"],
+                    "exc_text": rec["exc_text"],
+                    "created": created,
+                    "msecs": (created - int(created)) * 1000,
+                }
+            )
+            # the records were already filtered by level inside the job process
+            logging.getLogger(rec["name"]).handle(record)
+
+    def _job_ended(self) -> None:
+        if self._job_started_fut is not None and not self._job_started_fut.done():
+            self._job_started_fut.set_result(False)
+
+        if self._job_fut is not None and not self._job_fut.done():
+            self._job_fut.set_result(None)
+
+        self._job = None
+
+    def _on_start_timeout(self) -> None:
+        self._start_timeout = None
+        logger.error(
+            "job start timed out, killing process",
+            extra=self.logging_extra(),
+        )
+        self._sig_kill()
+
+    def _cancel_start_timeout(self) -> None:
+        if self._start_timeout is not None:
+            self._start_timeout.cancel()
+            self._start_timeout = None
+
+    def _watch_exit(self) -> None:
+        """Resolve _exit_fut once the process exited, the event loop waits for it
+        (no thread per process)"""
+        if sys.platform == "win32":
+            # the proactor event loop can't wait on process handles
+            def _join_process():
                 self._process.join()
-            except Exception as e:
-                logger.error(
-                    "error joining job process",
-                    exc_info=e,
-                    extra=self.logging_extra(),
-                )
+                self._loop.call_soon_threadsafe(self._on_exit)
+
+            threading.Thread(target=_join_process, daemon=True).start()
+            return
+
+        # the sentinel is readable once the process exited. With a forkserver, the
+        # process isn't our child and the sentinel also carries its exit code.
+        # Otherwise prefer a pidfd, the sentinel could be kept open by a process the
+        # job forked itself
+        fd = self._process.sentinel
+        pidfd = None
+        if self._start_method != "forkserver" and hasattr(os, "pidfd_open"):
+            with contextlib.suppress(OSError):
+                fd = pidfd = os.pidfd_open(self._process.pid)
+
+        def _on_readable() -> None:
+            self._loop.remove_reader(fd)
+            if pidfd is not None:
+                os.close(pidfd)
+            self._process.join()  # doesn't block, the process already exited
+            self._on_exit()
 
-            self._loop.call_soon_threadsafe(self._close_future.set_result, None)
+        self._loop.add_reader(fd, _on_readable)
 
-        # TODO: Don't use a thread?
-        join_t = threading.Thread(target=_join_process, daemon=True)
-        join_t.start()
+    def _on_exit(self) -> None:
+        if not self._exit_fut.done():
+            self._exit_fut.set_result(None)
 
     def _sig_kill(self) -> None:
         if not self._process.is_alive():
@@ -141,13 +358,71 @@ class JobProcess:
 
     async def aclose(self) -> None:
         logger.info("closing job process", extra=self.logging_extra())
-        await self._pipe.write(protocol.ShutdownRequest())
-        await self._close_future
+        if not self._close_future.done():
+            await self._pipe.write(protocol.ShutdownRequest())
+            await self.join()
+
         self._pipe.close()
 
     @property
-    def job(self) -> agent.Job:
+    def job(self) -> agent.Job | None:
+        """The job currently running inside this process"""
         return self._job
 
+    @property
+    def job_count(self) -> int:
+        """Number of jobs launched inside this process"""
+        return self._job_count
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialize_fut.done() and not self._initialize_fut.exception()
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid
+
+    @property
+    def spawn_latency(self) -> float | None:
+        """Time in seconds it took for the process to be initialized"""
+        return self._spawn_latency
+
+    @property
+    def metrics(self) -> protocol.JobMetrics | None:
+        """Latest metrics pushed by the process"""
+        return self._metrics
+
+    @property
+    def ipc_read_queue(self) -> int:
+        return self._pipe.read_queue_size
+
+    @property
+    def ipc_write_queue(self) -> int:
+        return self._pipe.write_queue_size
+
+    @property
+    def exitcode(self) -> int | None:
+        """Exit code of the process, negative if it was killed by a signal"""
+        return self._process.exitcode
+
+    @property
+    def exit_signal(self) -> str | None:
+        """Name of the signal that killed the process"""
+        exitcode = self._process.exitcode
+        if exitcode is None or exitcode >= 0:
+            return None
+
+        try:
+            return signal.Signals(-exitcode).name
+        except ValueError:
+            return f"SIG{-exitcode}"
+
+    @property
+    def closed(self) -> bool:
+        return self._close_future.done()
+
     def logging_extra(self) -> dict:
-        return {"job_id": self._job.id, "pid": self._process.pid}
+        extra: dict = {"pid": self._process.pid}
+        if self._job is not None:
+            extra["job_id"] = self._job.id
+        return extra
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+
+from attrs import define
+from livekit.protocol import agent
+
+from ..job_request import AcceptData
+from ..log import logger
+from ..utils import MovingAverage
+from .job_process import JobProcess, JobStartMethod
+
+
+@define(kw_only=True)
+class ProcPoolStats:
+    processes_spawned: int = 0
+    processes_recycled: int = 0
+    pool_hits: int = 0  # a job got an already initialized process
+    pool_misses: int = 0  # a job had to wait for a process to initialize
+    last_spawn_latency: float = 0.0
+    avg_spawn_latency: float = 0.0
+
+
+class ProcPool:
+    """Keeps num_idle_processes initialized JobProcess ready to accept a job, and
+    reuses processes for up to max_jobs_per_process jobs"""
+
+    def __init__(
+        self,
+        *,
+        num_idle_processes: int,
+        max_jobs_per_process: int,
+        start_method: JobStartMethod | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        self._loop = loop or asyncio.get_event_loop()
+        self._start_method = start_method
+        self._num_idle_processes = max(num_idle_processes, 0)
+        self._max_jobs_per_process = max(max_jobs_per_process, 1)
+        self._started, self._closed = False, False
+
+        # idle processes ordered by spawn time (they may still be initializing)
+        self._idle_procs: list[JobProcess] = []
+        self._procs = set[JobProcess]()
+        self._tasks = set[asyncio.Task]()
+
+        self._stats = ProcPoolStats()
+        self._spawn_latency_avg = MovingAverage(32)
+
+    @property
+    def stats(self) -> ProcPoolStats:
+        return self._stats
+
+    @property
+    def processes(self) -> list[JobProcess]:
+        return list(self._procs)
+
+    @property
+    def idle_processes(self) -> list[JobProcess]:
+        return list(self._idle_procs)
+
+    def start(self) -> None:
+        if self._started:
+            return
+
+        self._started = True
+        self._fill_idle()
+
+    async def launch_job(
+        self, job: agent.Job, url: str, token: str, accept_data: AcceptData
+    ) -> JobProcess:
+        """Launch a job on an idle process (or a new one if the pool is empty)"""
+        if self._closed:
+            raise RuntimeError("process pool is closed")
+
+        proc = self._idle_procs.pop(0) if self._idle_procs else self._spawn()
+        pool_hit = proc.initialized
+        if pool_hit:
+            self._stats.pool_hits += 1
+        else:
+            self._stats.pool_misses += 1
+
+        self._fill_idle()
+        await proc.wait_initialized()
+        await proc.launch_job(job, url, token, accept_data)
+        logger.debug(
+            "job launched",
+            extra={
+                "pool_hit": pool_hit,
+                "job_count": proc.job_count,
+                **proc.logging_extra(),
+            },
+        )
+
+        self._create_task(self._recycle_when_done(proc))
+        return proc
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._idle_procs.clear()
+        await asyncio.gather(
+            *[proc.aclose() for proc in self._procs], return_exceptions=True
+        )
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self) -> JobProcess:
+        proc = JobProcess(loop=self._loop, start_method=self._start_method)
+        self._procs.add(proc)
+        self._stats.processes_spawned += 1
+        self._create_task(self._run_proc(proc))
+        self._create_task(self._record_spawn_latency(proc))
+        return proc
+
+    def _fill_idle(self) -> None:
+        if not self._started or self._closed:
+            return
+
+        while len(self._idle_procs) < self._num_idle_processes:
+            self._idle_procs.append(self._spawn())
+
+    async def _run_proc(self, proc: JobProcess) -> None:
+        try:
+            await proc.run()
+        except Exception:
+            logger.exception("error running job process", extra=proc.logging_extra())
+        finally:
+            self._procs.discard(proc)
+            if proc in self._idle_procs:
+                self._idle_procs.remove(proc)
+
+            self._fill_idle()
+
+    async def _record_spawn_latency(self, proc: JobProcess) -> None:
+        try:
+            await proc.wait_initialized()
+        except Exception:
+            return
+
+        assert proc.spawn_latency is not None
+        self._spawn_latency_avg.add_sample(proc.spawn_latency)
+        self._stats.last_spawn_latency = proc.spawn_latency
+        self._stats.avg_spawn_latency = self._spawn_latency_avg.get_avg()
+
+    async def _recycle_when_done(self, proc: JobProcess) -> None:
+        await proc.join_job()
+        if self._closed or proc.closed:
+            return
+
+        if (
+            proc.job_count >= self._max_jobs_per_process
+            or self._num_idle_processes == 0
+        ):
+            await proc.aclose()
+            return
+
+        logger.debug("recycling job process", extra=proc.logging_extra())
+        self._stats.processes_recycled += 1
+        self._idle_procs.insert(0, proc)  # reused processes go first
+
+        # the pool was refilled when the job was launched, drop the newest processes
+        excess = self._idle_procs[self._num_idle_processes :]
+        del self._idle_procs[self._num_idle_processes :]
+        await asyncio.gather(*[p.aclose() for p in excess], return_exceptions=True)
+
+    def _create_task(self, coro) -> None:
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
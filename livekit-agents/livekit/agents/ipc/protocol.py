@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-import io
 from typing import ClassVar
 
-from attrs import define
+from attrs import Factory, define
 from livekit.protocol import agent
 
 from .. import ipc_enc
@@ -12,114 +11,112 @@ from ..job_request import AcceptData
 
 @define
 class JobMainArgs:
-    job_id: str
-    url: str
-    token: str
-    accept_data: AcceptData
     asyncio_debug: bool
+    # levels set in the worker by logger name ("" is the root logger), so the job
+    # process drops the records the worker wouldn't emit
+    log_levels: dict[str, int] = Factory(dict)
 
 
+@ipc_enc.message
 @define(kw_only=True)
 class StartJobRequest:
     MSG_ID: ClassVar[int] = 0
-    job: agent.Job = agent.Job()
-
-    def write(self, b: io.BytesIO) -> None:
-        ipc_enc._write_bytes(b, self.job.SerializeToString())
-
-    def read(self, b: io.BytesIO) -> None:
-        self.job.ParseFromString(ipc_enc._read_bytes(b))
+    job: agent.Job = ipc_enc.field(ipc_enc.PROTO(agent.Job), factory=agent.Job)
+    url: str = ipc_enc.field(ipc_enc.STRING, default="")
+    token: str = ipc_enc.field(ipc_enc.STRING, default="")
+    accept_data: AcceptData | None = ipc_enc.field(ipc_enc.PICKLE, default=None)
 
 
+@ipc_enc.message
 @define(kw_only=True)
 class StartJobResponse:
     MSG_ID: ClassVar[int] = 1
-    error: str = ""
-
-    def write(self, b: io.BytesIO) -> None:
-        ipc_enc._write_string(b, self.error)
-
-    def read(self, b: io.BytesIO) -> None:
-        self.error = ipc_enc._read_string(b)
+    error: str = ipc_enc.field(ipc_enc.STRING, default="")
 
 
+@ipc_enc.message
 @define(kw_only=True)
 class Log:
     MSG_ID: ClassVar[int] = 2
-    level: int = 0  # logging._Level
-    logger_name: str = ""
-    message: str = ""
-
-    def write(self, b: io.BytesIO) -> None:
-        ipc_enc._write_int(b, self.level)
-        ipc_enc._write_string(b, self.logger_name)
-        ipc_enc._write_string(b, self.message)
-
-    def read(self, b: io.BytesIO) -> None:
-        self.level = ipc_enc._read_int(b)
-        self.logger_name = ipc_enc._read_string(b)
-        self.message = ipc_enc._read_string(b)
+    level: int = ipc_enc.field(ipc_enc.INT32, default=0)  # logging._Level
+    logger_name: str = ipc_enc.field(ipc_enc.STRING, default="")
+    message: str = ipc_enc.field(ipc_enc.STRING, default="")
 
 
+@ipc_enc.message
 @define(kw_only=True)
 class Ping:
     MSG_ID: ClassVar[int] = 3
-    timestamp: int = 0
-
-    def write(self, b: io.BytesIO) -> None:
-        b.write(self.timestamp.to_bytes(8, "big"))
-
-    def read(self, b: io.BytesIO) -> None:
-        self.timestamp = int.from_bytes(b.read(8), "big")
+    timestamp: int = ipc_enc.field(ipc_enc.INT64, default=0)
 
 
+@ipc_enc.message
 @define(kw_only=True)
 class Pong:
     MSG_ID: ClassVar[int] = 4
-    last_timestamp: int = 0
-    timestamp: int = 0
-
-    def write(self, b: io.BytesIO) -> None:
-        ipc_enc._write_long(b, self.last_timestamp)
-        ipc_enc._write_long(b, self.timestamp)
-
-    def read(self, b: io.BytesIO) -> None:
-        self.last_timestamp = ipc_enc._read_long(b)
-        self.timestamp = ipc_enc._read_long(b)
+    last_timestamp: int = ipc_enc.field(ipc_enc.INT64, default=0)
+    timestamp: int = ipc_enc.field(ipc_enc.INT64, default=0)
 
 
+@ipc_enc.message
 @define(kw_only=True)
 class ShutdownRequest:
     MSG_ID: ClassVar[int] = 5
 
-    def write(self, b: io.BytesIO) -> None:
-        pass
-
-    def read(self, b: io.BytesIO) -> None:
-        pass
-
 
+@ipc_enc.message
 @define(kw_only=True)
 class ShutdownResponse:
     MSG_ID: ClassVar[int] = 6
 
-    def write(self, b: io.BytesIO) -> None:
-        pass
-
-    def read(self, b: io.BytesIO) -> None:
-        pass
-
 
+@ipc_enc.message
 @define(kw_only=True)
 class UserExit:
     MSG_ID: ClassVar[int] = 7
-    reason: str = ""
+    reason: str = ipc_enc.field(ipc_enc.STRING, default="")
+
+
+@ipc_enc.message
+@define(kw_only=True)
+class InitializeRequest:
+    MSG_ID: ClassVar[int] = 8
+
 
-    def write(self, b: io.BytesIO) -> None:
-        ipc_enc._write_string(b, self.reason)
+@ipc_enc.message
+@define(kw_only=True)
+class InitializeResponse:
+    MSG_ID: ClassVar[int] = 9
+
+
+@ipc_enc.message
+@define(kw_only=True)
+class JobMetrics:
+    """Pushed periodically by the job process to the worker"""
+
+    MSG_ID: ClassVar[int] = 10
+    # user + system time in seconds, including child processes
+    cpu_time: float = ipc_enc.field(ipc_enc.DOUBLE, default=0.0)
+    rss: int = ipc_enc.field(ipc_enc.INT64, default=0)
+    # max delay of the event loop since the last JobMetrics
+    loop_lag: float = ipc_enc.field(ipc_enc.DOUBLE, default=0.0)
+    tasks: int = ipc_enc.field(ipc_enc.UINT32, default=0)
+    ipc_read_queue: int = ipc_enc.field(ipc_enc.UINT32, default=0)
+    ipc_write_queue: int = ipc_enc.field(ipc_enc.UINT32, default=0)
+    # observations of metrics.JOB_HISTOGRAMS since the last JobMetrics, by name
+    histograms: dict = ipc_enc.field(ipc_enc.JSON, factory=dict)
+
+
+@ipc_enc.message
+@define(kw_only=True)
+class LogBatch:
+    """Log records of the job process, sent every LOG_BATCH_INTERVAL or once
+    LOG_BATCH_SIZE records are buffered.
+    Each record is a dict with level, name, msg (formatted with its args), created,
+    exc_text and extra (the custom attributes of the record)"""
 
-    def read(self, b: io.BytesIO) -> None:
-        self.reason = ipc_enc._read_string(b)
+    MSG_ID: ClassVar[int] = 11
+    records: list[dict] = ipc_enc.field(ipc_enc.JSON, factory=list)
 
 
 IPC_MESSAGES = {
@@ -131,4 +128,8 @@ IPC_MESSAGES = {
     ShutdownRequest.MSG_ID: ShutdownRequest,
     ShutdownResponse.MSG_ID: ShutdownResponse,
     UserExit.MSG_ID: UserExit,
+    InitializeRequest.MSG_ID: InitializeRequest,
+    InitializeResponse.MSG_ID: InitializeResponse,
+    JobMetrics.MSG_ID: JobMetrics,
+    LogBatch.MSG_ID: LogBatch,
 }
@@ -0,0 +1,44 @@
+"""Preloaded by the zygote (the multiprocessing forkserver) before it starts forking
+job processes, this module must not be imported anywhere else.
+
+The zygote imports the user's main module (which registers the plugins it uses),
+then every registered Plugin loads its heavy resources (i.e model weights) once and
+the gc is frozen so the forked job processes share them copy-on-write."""
+
+import gc
+import json
+import multiprocessing as mp
+import os
+from multiprocessing import spawn
+
+from ..plugin import Plugin
+from .job_process import ZYGOTE_MAIN_ENV
+
+
+def _import_main() -> None:
+    main = json.loads(os.environ.get(ZYGOTE_MAIN_ENV, "{}"))
+    if not main:
+        return
+
+    # same as what a spawned process does, sys.modules["__main__"] is replaced by the
+    # user module so the forked job processes don't import it again
+    process = mp.current_process()
+    process._inheriting = True  # type: ignore
+    try:
+        spawn.prepare(main)
+    finally:
+        del process._inheriting  # type: ignore
+
+
+def _preload() -> None:
+    _import_main()
+
+    Plugin.preload_plugins()
+
+    # move everything allocated so far to the permanent generation, otherwise the
+    # gc of the job processes would touch (and copy) the pages of the zygote
+    gc.collect()
+    gc.freeze()
+
+
+_preload()
@@ -1,9 +1,18 @@
+from __future__ import annotations
+
 import io
+import json
+import pickle
 import struct
-from typing import ClassVar, Protocol, Type
+from typing import Any, Callable, ClassVar, Protocol, Type, TypeVar, Union
+
+import attrs
+from attrs import define
 
 
 class ProcessPipeReader(Protocol):
+    def fileno(self) -> int: ...
+
     def recv_bytes(self, maxlength: int | None = None) -> bytes: ...
 
     def poll(self, timeout: float = 0.0) -> bool: ...
@@ -12,6 +21,8 @@ class ProcessPipeReader(Protocol):
 
 
 class ProcessPipeWriter(Protocol):
+    def fileno(self) -> int: ...
+
     def send_bytes(
         self,
         buf: bytes | bytearray | memoryview,
@@ -33,19 +44,178 @@ class Message(Protocol):
     def read(self, b: io.BytesIO) -> None: ...
 
 
-def read_msg(p: ProcessPipeReader, messages: dict[int, Type[Message]]) -> "Message":
-    b = io.BytesIO(p.recv_bytes())
-    msg_id = int.from_bytes(b.read(4), "big")
-    msg = messages[msg_id]()
-    msg.read(b)
+_MSG_ID = struct.Struct("!I")
+
+
+def encode_msg_into(msg: "Message", buf: bytearray) -> None:
+    """Append the MSG_ID and the payload of msg to buf"""
+    buf += _MSG_ID.pack(msg.MSG_ID)
+    codec: _Codec | None = getattr(type(msg), "_ipc_codec", None)
+    if codec is not None:
+        codec.encode_into(msg, buf)
+    else:
+        b = io.BytesIO()
+        msg.write(b)
+        buf += b.getbuffer()
+
+
+def encode_msg(msg: "Message") -> bytearray:
+    buf = bytearray()
+    encode_msg_into(msg, buf)
+    return buf
+
+
+def decode_msg(
+    data: bytes | bytearray | memoryview, messages: dict[int, Type[Message]]
+) -> "Message":
+    """Decode a message, data is only read while decoding (it can be a view of a
+    reusable buffer)"""
+    (msg_id,) = _MSG_ID.unpack_from(data, 0)
+    cls = messages[msg_id]
+    codec: _Codec | None = getattr(cls, "_ipc_codec", None)
+    if codec is not None:
+        return codec.decode(memoryview(data), _MSG_ID.size)
+
+    msg = cls()
+    msg.read(io.BytesIO(data[_MSG_ID.size :]))
     return msg
 
 
+def read_msg(p: ProcessPipeReader, messages: dict[int, Type[Message]]) -> "Message":
+    return decode_msg(p.recv_bytes(), messages)
+
+
 def write_msg(p: ProcessPipeWriter, msg: "Message") -> None:
-    b = io.BytesIO()
-    b.write(msg.MSG_ID.to_bytes(4, "big"))
-    msg.write(b)
-    p.send_bytes(b.getvalue())
+    p.send_bytes(encode_msg(msg))
+
+
+# declarative messages, the fields are compiled to struct layouts once per class
+
+
+@define(frozen=True)
+class _Fixed:
+    fmt: str
+
+
+@define(frozen=True)
+class _Var:
+    encode: Callable[[Any], bytes]
+    decode: Callable[[memoryview], Any]
+
+
+FieldType = Union[_Fixed, _Var]
+
+BOOL = _Fixed("?")
+INT32 = _Fixed("i")
+UINT32 = _Fixed("I")
+INT64 = _Fixed("q")
+FLOAT = _Fixed("f")
+DOUBLE = _Fixed("d")
+STRING = _Var(lambda v: v.encode("utf-8"), lambda mv: str(mv, "utf-8"))
+BYTES = _Var(bytes, bytes)
+PICKLE = _Var(pickle.dumps, pickle.loads)
+# objects that aren't serializable (i.e log extras) are converted with str()
+JSON = _Var(
+    lambda v: json.dumps(v, default=str).encode("utf-8"),
+    lambda mv: json.loads(str(mv, "utf-8")),
+)
+
+
+def PROTO(cls: type) -> _Var:
+    def _decode(mv: memoryview) -> Any:
+        m = cls()
+        m.ParseFromString(mv)
+        return m
+
+    return _Var(lambda v: v.SerializeToString(), _decode)
+
+
+_IPC_TYPE = "ipc_type"
+_LEN = struct.Struct("!I")
+
+
+def field(type: FieldType, **kwargs) -> Any:
+    """attrs field encoded as type by the compiled codec"""
+    metadata = {**kwargs.pop("metadata", {}), _IPC_TYPE: type}
+    return attrs.field(metadata=metadata, **kwargs)
+
+
+class _Codec:
+    """encode_into/decode are generated for each message class, consecutive fixed
+    size fields are packed with a single struct.Struct"""
+
+    def __init__(self, cls: type) -> None:
+        steps: list[tuple[list[str], struct.Struct | _Var]] = []
+        fixed_names: list[str] = []
+        fixed_fmt = ""
+        for f in attrs.fields(cls):
+            ipc_type = f.metadata.get(_IPC_TYPE)
+            if ipc_type is None:
+                raise TypeError(f"{cls.__name__}.{f.name} isn't an ipc_enc.field")
+
+            if isinstance(ipc_type, _Fixed):
+                fixed_names.append(f.name)
+                fixed_fmt += ipc_type.fmt
+                continue
+
+            if fixed_names:
+                steps.append((fixed_names, struct.Struct("!" + fixed_fmt)))
+                fixed_names, fixed_fmt = [], ""
+            steps.append(([f.name], ipc_type))
+
+        if fixed_names:
+            steps.append((fixed_names, struct.Struct("!" + fixed_fmt)))
+
+        globs: dict[str, Any] = {"_cls": cls, "_len": _LEN}
+        enc = ["def encode_into(msg, buf):", "    pass"]
+        dec = ["def decode(mv, off):"]
+        for i, (names, step) in enumerate(steps):
+            globs[f"_s{i}"] = step
+            if isinstance(step, struct.Struct):
+                values = ", ".join(f"msg.{n}" for n in names)
+                enc.append(f"    buf += _s{i}.pack({values})")
+                dec.append(f"    ({', '.join(names)},) = _s{i}.unpack_from(mv, off)")
+                dec.append(f"    off += {step.size}")
+            else:
+                name = names[0]
+                enc.append(f"    data = _s{i}.encode(msg.{name})")
+                enc.append("    buf += _len.pack(len(data))")
+                enc.append("    buf += data")
+                dec.append("    (size,) = _len.unpack_from(mv, off)")
+                dec.append(f"    off += {_LEN.size}")
+                dec.append(f"    {name} = _s{i}.decode(mv[off : off + size])")
+                dec.append("    off += size")
+
+        names = [f.name for f in attrs.fields(cls)]
+        dec.append(f"    return _cls({', '.join(f'{n}={n}' for n in names)})")
+
+        exec("\n".join(enc + dec), globs)
+        self.encode_into: Callable[[Any, bytearray], None] = globs["encode_into"]
+        self.decode: Callable[[memoryview, int], Any] = globs["decode"]
+
+
+T = TypeVar("T", bound=type)
+
+
+def message(cls: T) -> T:
+    """Compile the ipc_enc.field of an attrs message class.
+    write/read are generated so the message can still be used with io.BytesIO"""
+    codec = _Codec(cls)
+
+    def write(self, b: io.BytesIO) -> None:
+        buf = bytearray()
+        codec.encode_into(self, buf)
+        b.write(buf)
+
+    def read(self, b: io.BytesIO) -> None:
+        decoded = codec.decode(memoryview(b.read()), 0)
+        for f in attrs.fields(cls):
+            setattr(self, f.name, getattr(decoded, f.name))
+
+    cls._ipc_codec = codec  # type: ignore
+    cls.write = write  # type: ignore
+    cls.read = read  # type: ignore
+    return cls
 
 
 # some utils for cleaner proto code
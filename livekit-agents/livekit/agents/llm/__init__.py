@@ -1,3 +1,10 @@
+from .context_window import (
+    ChatContextWindow,
+    Summarizer,
+    TokenCounter,
+    approximate_token_count,
+    llm_summarizer,
+)
 from .function_context import (
     AIFncArg,
     AIFncMetadata,
@@ -35,4 +42,9 @@ __all__ = [
     "AIFunction",
     "AIFncMetadata",
     "CalledFunction",
+    "ChatContextWindow",
+    "TokenCounter",
+    "Summarizer",
+    "approximate_token_count",
+    "llm_summarizer",
 ]
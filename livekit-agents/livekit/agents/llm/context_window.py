@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from ..log import logger
+from .llm import LLM, ChatContext, ChatMessage, ChatRole
+
+TokenCounter = Callable[[ChatMessage], int]
+
+# (previous summary, evicted messages) -> new summary
+Summarizer = Callable[[Optional[str], list[ChatMessage]], Awaitable[str]]
+
+_SUMMARY_INSTRUCTIONS = (
+    "Summarize the following conversation between a user and an assistant in a "
+    "few sentences, keeping the facts and the decisions that may be needed later "
+    "in the conversation. If a previous summary is given, extend it."
+)
+
+
+def approximate_token_count(msg: ChatMessage) -> int:
+    """~4 characters per token, plus the overhead of a message"""
+    return len(msg.text) // 4 + 4
+
+
+def llm_summarizer(
+    llm: LLM, *, instructions: str = _SUMMARY_INSTRUCTIONS
+) -> Summarizer:
+    """Summarizer asking the LLM to summarize the evicted messages"""
+
+    async def _summarize(summary: str | None, messages: list[ChatMessage]) -> str:
+        text = "\n".join(f"{msg.role.value}: {msg.text}" for msg in messages)
+        if summary:
+            text = f"previous summary: {summary}\n\n{text}"
+
+        ctx = ChatContext(
+            messages=[
+                ChatMessage(role=ChatRole.SYSTEM, text=instructions),
+                ChatMessage(role=ChatRole.USER, text=text),
+            ]
+        )
+        stream = await llm.chat(ctx)
+        res = ""
+        try:
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content
+                if content:
+                    res += content
+        finally:
+            await stream.aclose()
+
+        return res.strip()
+
+    return _summarize
+
+
+class ChatContextWindow:
+    """Keeps the part of a ChatContext sent to the LLM under a token budget.
+
+    The oldest messages are evicted first, except the system messages which stay
+    pinned. If a summarizer is given, the evicted messages are summarized in the
+    background and the summary is sent instead of them.
+
+    The messages are only ever appended to chat_ctx, so the window is updated
+    incrementally: the tokens of a message are counted once, and the evictions only
+    move the start of the window forward. If the history is edited otherwise, the
+    window is rebuilt and the summary is dropped (the messages it covers may have
+    changed)"""
+
+    def __init__(
+        self,
+        chat_ctx: ChatContext | None = None,
+        *,
+        max_tokens: int = 4000,
+        token_counter: TokenCounter = approximate_token_count,
+        summarizer: Summarizer | None = None,
+        summary_prefix: str = "Summary of the earlier conversation: ",
+    ) -> None:
+        """
+        Args:
+            max_tokens: budget of the messages sent to the LLM, including the pinned
+                messages and the summary
+            token_counter: counts the tokens of a message, e.g. with the tokenizer
+                of the model
+            summarizer: summarizes the evicted messages (see llm_summarizer)
+        """
+        self._chat_ctx = chat_ctx or ChatContext(messages=[])
+        self._max_tokens = max_tokens
+        self._token_counter = token_counter
+        self._summarizer = summarizer
+        self._summary_prefix = summary_prefix
+        self._summary: ChatMessage | None = None
+        self._summary_tokens = 0
+        self._summarize_task: asyncio.Task | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._tokens: list[int] = []  # tokens of each message of chat_ctx
+        self._last: ChatMessage | None = None  # last counted message
+        self._start = 0  # index of the first message of the window
+        self._window_tokens = 0
+        self._pinned: list[ChatMessage] = []  # system messages before the window
+        self._pinned_tokens = 0
+        self._evicted: list[ChatMessage] = []  # waiting to be summarized
+
+    @property
+    def chat_ctx(self) -> ChatContext:
+        """The full history, new messages are appended to it"""
+        return self._chat_ctx
+
+    @property
+    def max_tokens(self) -> int:
+        return self._max_tokens
+
+    @property
+    def summary(self) -> str | None:
+        if self._summary is None:
+            return None
+        return self._summary.text[len(self._summary_prefix) :]
+
+    @property
+    def tokens(self) -> int:
+        """Tokens of the window, after the last call to build()"""
+        return self._pinned_tokens + self._summary_tokens + self._window_tokens
+
+    def build(self, extra: list[ChatMessage] | None = None) -> ChatContext:
+        """ChatContext to send to the LLM: the pinned messages, the summary, then the
+        most recent messages fitting in the budget (followed by extra, e.g the
+        message of the user being answered, which isn't in the history yet)"""
+        extra = extra or []
+        self._sync()
+        extra_tokens = sum(self._token_counter(msg) for msg in extra)
+        self._evict(self._max_tokens - extra_tokens)
+
+        messages = self._pinned.copy()
+        if self._summary is not None:
+            messages.append(self._summary)
+        messages.extend(self._chat_ctx.messages[self._start :])
+        messages.extend(extra)
+        return ChatContext(messages=messages)
+
+    async def aclose(self) -> None:
+        """Stop the summarization in progress"""
+        if self._summarize_task is not None:
+            self._summarize_task.cancel()
+            await asyncio.gather(self._summarize_task, return_exceptions=True)
+
+    def _sync(self) -> None:
+        messages = self._chat_ctx.messages
+        n = len(self._tokens)
+        if n > len(messages) or (n > 0 and messages[n - 1] is not self._last):
+            # the history was edited, count everything again. The messages evicted
+            # are summarized again if they are still in the history
+            logger.debug("chat context edited, rebuilding the window")
+            if self._summarize_task is not None:
+                self._summarize_task.cancel()
+                self._summarize_task = None
+            self._summary, self._summary_tokens = None, 0
+            self._reset()
+            n = 0
+
+        for msg in messages[n:]:
+            tokens = self._token_counter(msg)
+            self._tokens.append(tokens)
+            self._window_tokens += tokens
+
+        if messages:
+            self._last = messages[-1]
+
+    def _evict(self, budget: int) -> None:
+        messages = self._chat_ctx.messages
+        evicted = False
+        while self._start < len(messages) and self.tokens > budget:
+            msg = messages[self._start]
+            tokens = self._tokens[self._start]
+            self._start += 1
+            self._window_tokens -= tokens
+            if msg.role == ChatRole.SYSTEM:
+                self._pinned.append(msg)
+                self._pinned_tokens += tokens
+            elif self._summarizer is not None:
+                self._evicted.append(msg)
+                evicted = True
+
+        if evicted and self._summarize_task is None:
+            self._summarize_task = asyncio.create_task(self._summarize())
+
+    async def _summarize(self) -> None:
+        assert self._summarizer is not None
+        try:
+            while self._evicted:
+                evicted, self._evicted = self._evicted, []
+                try:
+                    summary = await self._summarizer(self.summary, evicted)
+                except Exception:
+                    logger.exception(
+                        "failed to summarize the chat context",
+                        extra={"evicted": len(evicted)},
+                    )
+                    continue
+
+                self._summary = ChatMessage(
+                    role=ChatRole.SYSTEM, text=self._summary_prefix + summary
+                )
+                # taken into account (and maybe evicting more) on the next build
+                self._summary_tokens = self._token_counter(self._summary)
+        finally:
+            if self._summarize_task is asyncio.current_task():  # not dropped
+                self._summarize_task = None
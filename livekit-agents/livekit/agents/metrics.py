@@ -0,0 +1,195 @@
+"""Minimal Prometheus text format exporter used by the worker /metrics endpoint"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Iterable, Sequence
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = dict[str, str]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels | None) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render_samples(
+    name: str,
+    documentation: str,
+    samples: Iterable[tuple[Labels | None, float]],
+    *,
+    type: str = "gauge",
+) -> str:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Histogram:
+    """Cumulative histogram, the observations are kept for the lifetime of the worker"""
+
+    def __init__(
+        self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        self._name = name
+        self._documentation = documentation
+        self._buckets = sorted(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)  # last one is +Inf
+        self._sum = 0.0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sum += value
+
+    def snapshot(self) -> tuple[list[int], float]:
+        """Count of each bucket (not cumulative) and sum of the observations"""
+        return list(self._counts), self._sum
+
+    def merge(self, counts: Sequence[int], sum: float) -> None:
+        """Add observations made elsewhere, counts are the same as snapshot()"""
+        if len(counts) != len(self._counts):
+            raise ValueError("the buckets don't match")
+
+        for i, count in enumerate(counts):
+            self._counts[i] += count
+        self._sum += sum
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self._name} {self._documentation}",
+            f"# TYPE {self._name} histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip([*self._buckets, math.inf], self._counts):
+            cumulative += count
+            le = _labels({"le": _value(bound)})
+            lines.append(f"{self._name}_bucket{le} {cumulative}")
+
+        lines.append(f"{self._name}_sum {_value(self._sum)}")
+        lines.append(f"{self._name}_count {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter:
+    """Monotonic counter, one value per set of labels"""
+
+    def __init__(self, name: str, documentation: str) -> None:
+        self._name = name
+        self._documentation = documentation
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def inc(self, labels: Labels | None = None, amount: float = 1) -> None:
+        key = tuple(sorted((labels or {}).items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, labels: Labels | None = None) -> float:
+        return self._values.get(tuple(sorted((labels or {}).items())), 0)
+
+    def render(self) -> str:
+        return render_samples(
+            self._name,
+            self._documentation,
+            [(dict(key), value) for key, value in self._values.items()],
+            type="counter",
+        )
+
+
+# process-wide histograms, observed by the worker and the job processes it manages
+JOB_SPAWN_LATENCY = Histogram(
+    "livekit_agents_job_spawn_latency_seconds",
+    "Time for a job process to be initialized",
+)
+JOB_START_LATENCY = Histogram(
+    "livekit_agents_job_assignment_to_start_seconds",
+    "Time between a job assignment and the job being started inside its process",
+)
+JOB_PING_RTT = Histogram(
+    "livekit_agents_job_ping_rtt_seconds",
+    "Round trip time of the pings sent to the job processes",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+# observed inside the job processes, they push their new observations with the
+# JobMetrics message and the worker merges them
+TURN_LATENCY = Histogram(
+    "livekit_agents_turn_latency_seconds",
+    "Time between the end of the user speech and the first frame of the answer",
+)
+TURN_STT_DELAY = Histogram(
+    "livekit_agents_turn_stt_delay_seconds",
+    "Time between the end of the user speech and its final transcript",
+)
+TURN_LLM_TTFT = Histogram(
+    "livekit_agents_turn_llm_ttft_seconds",
+    "Time between the LLM request and its first token",
+)
+TURN_TTS_TTFB = Histogram(
+    "livekit_agents_turn_tts_ttfb_seconds",
+    "Time between the first sentence pushed to the TTS and its first audio",
+)
+
+TURN_DROPPED_AUDIO = Histogram(
+    "livekit_agents_turn_dropped_audio_seconds",
+    "Synthesized audio dropped (never played) when the agent was interrupted",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+JOB_HISTOGRAMS = [
+    TURN_LATENCY,
+    TURN_STT_DELAY,
+    TURN_LLM_TTFT,
+    TURN_TTS_TTFB,
+    TURN_DROPPED_AUDIO,
+]
+
+HISTOGRAMS = [JOB_SPAWN_LATENCY, JOB_START_LATENCY, JOB_PING_RTT, *JOB_HISTOGRAMS]
+
+
+def merge_job_histograms(histograms: dict[str, dict]) -> None:
+    """Merge the observations pushed by a job process (see JobMetrics)"""
+    by_name = {h.name: h for h in JOB_HISTOGRAMS}
+    for name, data in histograms.items():
+        if name in by_name:
+            by_name[name].merge(data["counts"], data["sum"])
+
+
+JOB_PROCESS_EXITS = Counter(
+    "livekit_agents_job_process_exits_total",
+    "Number of job processes that exited, by exit code or signal name",
+)
+
+COUNTERS = [JOB_PROCESS_EXITS]
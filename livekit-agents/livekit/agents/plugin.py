@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import List
 
+from .log import logger
+
 
 class Plugin(ABC):
     registered_plugins: List["Plugin"] = []
@@ -14,10 +16,26 @@ class Plugin(ABC):
     def register_plugin(cls, plugin: "Plugin") -> None:
         cls.registered_plugins.append(plugin)
 
+    @classmethod
+    def preload_plugins(cls) -> None:
+        """Call preload() on every registered plugin, failures are only logged"""
+        for plugin in cls.registered_plugins:
+            try:
+                plugin.preload()
+            except Exception:
+                logger.exception(f"failed to preload plugin {plugin.title}")
+
     @abstractmethod
     def download_files(self) -> None:
         pass
 
+    def preload(self) -> None:
+        """Load heavy resources (i.e model weights) ahead of time.
+        Called once inside the zygote when the worker uses the "zygote" start method
+        (or inside the watcher with a warm reload), so the processes forked from it
+        share these resources"""
+        pass
+
     @property
     def package(self) -> str:
         return self._package
@@ -7,7 +7,7 @@ import logging
 from livekit import rtc
 
 from ..log import logger
-from ..utils import AudioBuffer, merge_frames
+from ..utils import AudioBuffer, AudioInput
 from ..vad import VADEventType, VADStream
 from .stt import (
     STT,
@@ -31,7 +31,7 @@ class StreamAdapter(STT):
     def wrapped_stt(self) -> STT:
         return self._stt
 
-    async def recognize(self, *, buffer: AudioBuffer, language: str | None = None):
+    async def recognize(self, *, buffer: AudioInput, language: str | None = None):
         return await self._stt.recognize(
             buffer=buffer,
             language=language,
@@ -80,9 +80,9 @@ class StreamAdapterWrapper(SpeechStream):
                     start_event = SpeechEvent(SpeechEventType.START_OF_SPEECH)
                     self._event_queue.put_nowait(start_event)
                 elif event.type == VADEventType.END_OF_SPEECH:
-                    merged_frames = merge_frames(event.frames)
+                    speech = AudioBuffer.from_frames(event.frames)
                     event = await self._stt.recognize(
-                        buffer=merged_frames, *self._args, **self._kwargs
+                        buffer=speech, *self._args, **self._kwargs
                     )
                     self._event_queue.put_nowait(event)
 
@@ -7,7 +7,7 @@ from typing import List
 
 from livekit import rtc
 
-from ..utils import AudioBuffer
+from ..utils import AudioInput
 
 
 class SpeechEventType(Enum):
@@ -51,7 +51,7 @@ class STT(ABC):
     async def recognize(
         self,
         *,
-        buffer: AudioBuffer,
+        buffer: AudioInput,
         language: str | None = None,
     ) -> SpeechEvent:
         pass
@@ -88,6 +88,12 @@ class SpeechStream(ABC):
         """
         pass
 
+    @property
+    def input_format(self) -> tuple[int, int] | None:
+        """(sample_rate, num_channels) the pushed frames are converted to, frames
+        already in this format are used as is. None if they are used as received"""
+        return None
+
     @abstractmethod
     async def __anext__(self) -> SpeechEvent:
         pass
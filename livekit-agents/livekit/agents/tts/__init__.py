@@ -1,3 +1,4 @@
+from .cache import CachedTTS
 from .stream_adapter import (
     StreamAdapter,
     StreamAdapterWrapper,
@@ -18,4 +19,5 @@ __all__ = [
     "SynthesisEventType",
     "StreamAdapterWrapper",
     "StreamAdapter",
+    "CachedTTS",
 ]
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import mmap
+import os
+from collections import OrderedDict
+from typing import AsyncIterable, Iterable
+
+from livekit import rtc
+
+from ..log import logger
+from .tts import TTS, SynthesizedAudio, SynthesizeStream
+
+# duration of the frames yielded for a cached phrase
+_CHUNK_DURATION = 0.1
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class CachedTTS(TTS):
+    """Caches the audio of the phrases synthesized with synthesize() (e.g. the
+    greetings and fillers passed to VoiceAssistant.say), keyed on the provider, its
+    options (voice, model, ...), the output format and the normalized text.
+
+    The phrases are kept in an in-memory LRU and, if cache_dir is set, as raw PCM
+    files which are memory-mapped when read: they start instantly and the pages
+    are shared by every process using the same directory (e.g. the job processes
+    of a worker). stream() isn't cached, VoiceAssistant.say() synthesizes the text
+    passed as a string with synthesize() when its TTS is a CachedTTS"""
+
+    def __init__(
+        self,
+        tts: TTS,
+        *,
+        cache_dir: str | None = None,
+        max_memory: int = 32 * 1024 * 1024,
+        namespace: str | None = None,
+    ) -> None:
+        """
+        Args:
+            cache_dir: directory of the on-disk store, None to only cache in memory
+            max_memory: size in bytes of the in-memory LRU
+            namespace: identifies the voice, by default the cache_namespace() of the
+                TTS (its provider and options), required if it doesn't implement it
+        """
+        super().__init__(
+            streaming_supported=tts.streaming_supported,
+            sample_rate=tts.sample_rate,
+            num_channels=tts.num_channels,
+        )
+        self._tts = tts
+        self._cache_dir = cache_dir
+        self._max_memory = max_memory
+        self._namespace = namespace
+        if namespace is None:
+            tts.cache_namespace()  # fail early if the TTS can't be cached
+        self._lru: OrderedDict[str, bytes | mmap.mmap] = OrderedDict()
+        self._memory = 0
+        self._hits, self._misses = 0, 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def cache_namespace(self) -> str:
+        return self._namespace or self._tts.cache_namespace()
+
+    def key(self, text: str) -> str:
+        ident = "\0".join(
+            (
+                self.cache_namespace(),
+                str(self.sample_rate),
+                str(self.num_channels),
+                _normalize(text),
+            )
+        )
+        return hashlib.sha256(ident.encode()).hexdigest()
+
+    def cached(self, text: str) -> bool:
+        key = self.key(text)
+        return key in self._lru or (
+            self._cache_dir is not None and os.path.exists(self._path(key))
+        )
+
+    async def prefill(self, phrases: Iterable[str]) -> None:
+        """Synthesize the phrases that aren't cached yet, e.g. at worker start so the
+        job processes find them in cache_dir"""
+        for text in phrases:
+            if self.cached(text):
+                continue
+
+            async for _ in self.synthesize(text):
+                pass
+
+    def synthesize(self, text: str) -> AsyncIterable[SynthesizedAudio]:
+        return self._synthesize(text)
+
+    def stream(self) -> SynthesizeStream:
+        return self._tts.stream()
+
+    async def _synthesize(self, text: str) -> AsyncIterable[SynthesizedAudio]:
+        key = self.key(text)
+        pcm = self._load(key)
+        if pcm is not None:
+            self._hits += 1
+            bytes_per_sample = 2 * self.num_channels
+            chunk = int(self.sample_rate * _CHUNK_DURATION) * bytes_per_sample
+            with memoryview(pcm) as data:
+                for i in range(0, len(data), chunk):
+                    samples = data[i : i + chunk]
+                    frame = rtc.AudioFrame(
+                        data=samples,  # copied by rtc.AudioFrame
+                        sample_rate=self.sample_rate,
+                        num_channels=self.num_channels,
+                        samples_per_channel=len(samples) // bytes_per_sample,
+                    )
+                    samples.release()
+                    yield SynthesizedAudio(text=text, data=frame)
+            return
+
+        self._misses += 1
+        chunks: list[bytes] = []
+        cacheable = True
+        async for audio in self._tts.synthesize(text):
+            frame = audio.data
+            if (
+                frame.sample_rate != self.sample_rate
+                or frame.num_channels != self.num_channels
+            ):
+                cacheable = False
+            elif cacheable:
+                chunks.append(bytes(memoryview(frame.data).cast("B")))
+            yield audio
+
+        # only reached if the whole phrase was synthesized (not interrupted)
+        if cacheable and chunks:
+            await self._store(key, b"".join(chunks))
+
+    def _path(self, key: str) -> str:
+        assert self._cache_dir is not None
+        return os.path.join(self._cache_dir, f"{key}.pcm")
+
+    def _load(self, key: str) -> bytes | mmap.mmap | None:
+        pcm = self._lru.get(key)
+        if pcm is not None:
+            self._lru.move_to_end(key)
+            return pcm
+
+        if self._cache_dir is None:
+            return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                pcm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+
+        self._remember(key, pcm)
+        return pcm
+
+    async def _store(self, key: str, pcm: bytes) -> None:
+        self._remember(key, pcm)
+        if self._cache_dir is None:
+            return
+
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+
+        def _write() -> None:
+            with open(tmp, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp, path)  # atomic, other processes never see partial files
+
+        try:
+            await asyncio.to_thread(_write)
+        except OSError:
+            logger.exception(
+                "failed to store the synthesized phrase", extra={"path": path}
+            )
+
+    def _remember(self, key: str, pcm: bytes | mmap.mmap) -> None:
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._memory -= len(old)
+
+        if len(pcm) > self._max_memory:
+            return
+
+        self._lru[key] = pcm
+        self._memory += len(pcm)
+        while self._memory > self._max_memory:
+            _, old = self._lru.popitem(last=False)
+            self._memory -= len(old)  # mmaps are closed once they're not used anymore
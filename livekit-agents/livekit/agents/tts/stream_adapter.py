@@ -54,7 +54,7 @@ class StreamAdapterWrapper(SynthesizeStream):
     async def flush(self) -> None:
         await self._sentence_stream.flush()
 
-    async def aclose(self) -> None:
+    async def aclose(self, *, wait: bool = True) -> None:
         self._main_task.cancel()
         try:
             await self._main_task
@@ -82,3 +82,6 @@ class StreamAdapter(TTS):
 
     def stream(self) -> SynthesizeStream:
         return StreamAdapterWrapper(self._tts, self._tokenizer.stream())
+
+    def cache_namespace(self) -> str:
+        return self._tts.cache_namespace()
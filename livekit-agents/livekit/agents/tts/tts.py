@@ -92,3 +92,11 @@ class TTS(ABC):
     @property
     def streaming_supported(self) -> bool:
         return self._streaming_supported
+
+    def cache_namespace(self) -> str:
+        """Identifies the audio synthesized for a text: the provider and the options
+        changing it (e.g. voice and model), without the credentials. Used by
+        CachedTTS, it is read again when the options change (e.g. set_voice)"""
+        raise NotImplementedError(
+            "this TTS can't be cached without a namespace, please pass one to CachedTTS"
+        )
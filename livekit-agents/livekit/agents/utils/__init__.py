@@ -1,13 +1,22 @@
+from .audio_buffer import AudioBuffer, AudioInput
+from .audio_byte_stream import AudioByteStream
+from .audio_frontend import AudioFrontEnd, AudioSubscription
 from .event_emitter import EventEmitter
 from .exp_filter import ExpFilter
-from .misc import AudioBuffer, merge_frames, time_ms
+from .misc import merge_frames, time_ms
 from .moving_average import MovingAverage
+from .resampler import Resampler
 
 __all__ = [
     "AudioBuffer",
+    "AudioInput",
+    "AudioByteStream",
     "merge_frames",
     "time_ms",
     "ExpFilter",
     "MovingAverage",
     "EventEmitter",
+    "AudioFrontEnd",
+    "AudioSubscription",
+    "Resampler",
 ]
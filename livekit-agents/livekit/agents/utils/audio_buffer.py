@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import struct
+from typing import List, Union
+
+import numpy as np
+from livekit import rtc
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+_WAV_HEADER_SIZE = _WAV_HEADER.size  # 44
+
+
+class AudioBuffer:
+    """Growable buffer of interleaved int16 samples.
+
+    The samples are stored in a preallocated array (doubled when full, so pushing a
+    frame is amortized O(1)) with room for a WAV header in front of them, so
+    to_wav() doesn't copy the audio. samples and slice() return NumPy views, they
+    are invalidated when the buffer grows or is cleared"""
+
+    def __init__(
+        self, sample_rate: int, num_channels: int, *, capacity: float = 1.0
+    ) -> None:
+        """
+        Args:
+            capacity: duration of audio preallocated, in seconds
+        """
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._len = 0  # samples, all channels
+        self._alloc(max(int(capacity * sample_rate) * num_channels, num_channels))
+
+    @classmethod
+    def from_frames(cls, frames: AudioInput) -> AudioBuffer:
+        """Buffer containing one or more AudioFrames, an AudioBuffer is returned
+        as is"""
+        if isinstance(frames, AudioBuffer):
+            return frames
+
+        if isinstance(frames, rtc.AudioFrame):
+            frames = [frames]
+
+        if len(frames) == 0:
+            raise ValueError("buffer is empty")
+
+        first = frames[0]
+        samples = sum(frame.samples_per_channel for frame in frames)
+        buffer = cls(first.sample_rate, first.num_channels, capacity=0)
+        buffer._alloc(samples * first.num_channels)
+        for frame in frames:
+            buffer.push_frame(frame)
+
+        return buffer
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def num_channels(self) -> int:
+        return self._num_channels
+
+    @property
+    def samples_per_channel(self) -> int:
+        return self._len // self._num_channels
+
+    @property
+    def duration(self) -> float:
+        return self.samples_per_channel / self._sample_rate
+
+    @property
+    def samples(self) -> np.ndarray:
+        """View of the interleaved samples"""
+        return self._samples[: self._len]
+
+    def __len__(self) -> int:
+        return self.samples_per_channel
+
+    def push_frame(self, frame: rtc.AudioFrame) -> None:
+        if frame.sample_rate != self._sample_rate:
+            raise ValueError("sample rate mismatch")
+
+        if frame.num_channels != self._num_channels:
+            raise ValueError("channel count mismatch")
+
+        self.push_samples(np.frombuffer(frame.data, dtype=np.int16))
+
+    def push_samples(self, samples: np.ndarray) -> None:
+        """Append interleaved int16 samples"""
+        end = self._len + len(samples)
+        if end > len(self._samples):
+            self._alloc(max(end, 2 * len(self._samples)))
+
+        self._samples[self._len : end] = samples
+        self._len = end
+
+    def slice(self, start: float = 0.0, end: float | None = None) -> np.ndarray:
+        """View of the interleaved samples between start and end (in seconds)"""
+        first = min(round(start * self._sample_rate), self.samples_per_channel)
+        last = self.samples_per_channel
+        if end is not None:
+            last = max(min(round(end * self._sample_rate), last), first)
+
+        return self._samples[first * self._num_channels : last * self._num_channels]
+
+    def clear(self) -> None:
+        """Empty the buffer, the allocated memory is kept"""
+        self._len = 0
+
+    def to_frame(self) -> rtc.AudioFrame:
+        return rtc.AudioFrame(
+            data=self.samples.tobytes(),
+            sample_rate=self._sample_rate,
+            num_channels=self._num_channels,
+            samples_per_channel=self.samples_per_channel,
+        )
+
+    def to_wav(self) -> memoryview:
+        """WAV file (16-bit PCM) of the buffer, the header is written in front of the
+        samples so the returned view shares the memory of the buffer"""
+        size = self._len * 2
+        _WAV_HEADER.pack_into(
+            self._data,
+            0,
+            b"RIFF",
+            _WAV_HEADER_SIZE - 8 + size,
+            b"WAVE",
+            b"fmt ",
+            16,
+            1,  # PCM
+            self._num_channels,
+            self._sample_rate,
+            self._sample_rate * self._num_channels * 2,
+            self._num_channels * 2,
+            16,
+            b"data",
+            size,
+        )
+        return memoryview(self._data)[: _WAV_HEADER_SIZE + size]
+
+    def _alloc(self, samples: int) -> None:
+        data = np.empty(_WAV_HEADER_SIZE + samples * 2, dtype=np.uint8)
+        view = data[_WAV_HEADER_SIZE:].view(np.int16)
+        if self._len > 0:
+            view[: self._len] = self._samples[: self._len]
+
+        self._data, self._samples = data, view
+
+
+AudioInput = Union[List[rtc.AudioFrame], rtc.AudioFrame, AudioBuffer]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Union
+
+from livekit import rtc
+
+AudioChunk = Union[bytes, bytearray, memoryview, rtc.AudioFrame]
+
+
+class AudioByteStream:
+    """Re-chunks a stream of int16 PCM of any chunk size (e.g. provider audio split
+    in the middle of a sample) into frames of exactly frame_duration.
+
+    The full frames are copied straight from the incoming chunks (rtc.AudioFrame
+    owns its data), only an incomplete frame is kept between two writes, in a
+    buffer preallocated to the size of a frame, so the chunks are never
+    concatenated"""
+
+    def __init__(
+        self, sample_rate: int, num_channels: int, *, frame_duration: float = 0.01
+    ) -> None:
+        """
+        Args:
+            frame_duration: duration of the frames emitted, e.g 0.01 or 0.02
+        """
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._samples_per_frame = int(sample_rate * frame_duration)  # per channel
+        self._frame_size = self._samples_per_frame * num_channels * 2  # bytes
+        self._pending = bytearray(self._frame_size)  # incomplete frame
+        self._pending_size = 0
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def num_channels(self) -> int:
+        return self._num_channels
+
+    def write(self, data: AudioChunk) -> list[rtc.AudioFrame]:
+        """Add a chunk, returns the frames completed by it"""
+        if isinstance(data, rtc.AudioFrame):
+            if (data.sample_rate, data.num_channels) != (
+                self._sample_rate,
+                self._num_channels,
+            ):
+                raise ValueError("unexpected frame format")
+
+            data = data.data
+
+        view = memoryview(data).cast("B")
+        frames: list[rtc.AudioFrame] = []
+        if self._pending_size > 0:
+            size = min(len(view), self._frame_size - self._pending_size)
+            end = self._pending_size + size
+            self._pending[self._pending_size : end] = view[:size]
+            self._pending_size, view = end, view[size:]
+            if self._pending_size < self._frame_size:
+                return frames
+
+            frames.append(self._frame(self._pending))
+            self._pending_size = 0
+
+        full = len(view) - len(view) % self._frame_size
+        for i in range(0, full, self._frame_size):
+            frames.append(self._frame(view[i : i + self._frame_size]))
+
+        rem = len(view) - full
+        self._pending[:rem] = view[full:]
+        self._pending_size = rem
+        return frames
+
+    def flush(self) -> list[rtc.AudioFrame]:
+        """The incomplete frame left at the end of the stream (shorter than
+        frame_duration, a trailing partial sample is dropped)"""
+        sample_size = self._num_channels * 2
+        size = self._pending_size - self._pending_size % sample_size
+        self._pending_size = 0
+        if size == 0:
+            return []
+
+        return [
+            rtc.AudioFrame(
+                data=self._pending[:size],
+                sample_rate=self._sample_rate,
+                num_channels=self._num_channels,
+                samples_per_channel=size // sample_size,
+            )
+        ]
+
+    def _frame(self, data: bytes | bytearray | memoryview) -> rtc.AudioFrame:
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=self._sample_rate,
+            num_channels=self._num_channels,
+            samples_per_channel=self._samples_per_frame,
+        )
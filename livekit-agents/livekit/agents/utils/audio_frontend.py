@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+
+from livekit import rtc
+
+from .resampler import Resampler
+
+
+class AudioFrontEnd:
+    """Fans out an audio stream to several consumers (e.g. the VAD and the STT).
+
+    Each frame is resampled/downmixed once per distinct format requested by the
+    subscriptions (with a streaming Resampler per format), and the same frame is
+    handed to all the subscriptions of that format (frames already in the right
+    format are passed as is), so the frames must not be modified by the consumers.
+
+    Each subscription has its own bounded queue: a consumer falling behind drops
+    its oldest frames without affecting the others"""
+
+    def __init__(self) -> None:
+        self._subscriptions: list[AudioSubscription] = []
+        self._resamplers: dict[tuple[int, int, int, int], Resampler] = {}
+        self._closed = False
+
+    def subscribe(
+        self,
+        sample_rate: int | None = None,
+        num_channels: int | None = None,
+        *,
+        max_queued: int = 100,
+    ) -> AudioSubscription:
+        """
+        Args:
+            sample_rate: sample rate of the frames received, None to keep the one of
+                the input
+            num_channels: channels of the frames received, None to keep the ones of
+                the input
+            max_queued: frames kept for the consumer before dropping the oldest ones
+        """
+        if self._closed:
+            raise RuntimeError("front-end closed")
+
+        sub = AudioSubscription(self, sample_rate, num_channels, max_queued)
+        self._subscriptions.append(sub)
+        return sub
+
+    def push_frame(self, frame: rtc.AudioFrame) -> None:
+        if self._closed:
+            raise RuntimeError("front-end closed")
+
+        converted: dict[tuple[int, int], rtc.AudioFrame | None] = {
+            (frame.sample_rate, frame.num_channels): frame
+        }
+        for sub in self._subscriptions:
+            fmt = (
+                sub.sample_rate or frame.sample_rate,
+                sub.num_channels or frame.num_channels,
+            )
+            if fmt not in converted:
+                converted[fmt] = self._resampler(frame, *fmt).push_frame(frame)
+
+            out = converted[fmt]
+            if out is not None:
+                sub._put(out)
+
+    def _resampler(
+        self, frame: rtc.AudioFrame, sample_rate: int, num_channels: int
+    ) -> Resampler:
+        key = (frame.sample_rate, frame.num_channels, sample_rate, num_channels)
+        resampler = self._resamplers.get(key)
+        if resampler is None:
+            resampler = Resampler(
+                frame.sample_rate,
+                sample_rate,
+                input_channels=frame.num_channels,
+                output_channels=num_channels,
+            )
+            self._resamplers[key] = resampler
+
+        return resampler
+
+    def close(self) -> None:
+        """The subscriptions end once they received the remaining frames"""
+        self._closed = True
+        for sub in self._subscriptions:
+            sub._ev.set()
+
+    def _unsubscribe(self, sub: AudioSubscription) -> None:
+        if sub in self._subscriptions:
+            self._subscriptions.remove(sub)
+
+
+class AudioSubscription:
+    """Async iterator over the frames of an AudioFrontEnd, in the requested format"""
+
+    def __init__(
+        self,
+        front_end: AudioFrontEnd,
+        sample_rate: int | None,
+        num_channels: int | None,
+        max_queued: int,
+    ) -> None:
+        self._front_end = front_end
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._frames: deque[rtc.AudioFrame] = deque(maxlen=max_queued)
+        self._ev = asyncio.Event()
+        self._dropped = 0
+        self._closed = False
+
+    @property
+    def sample_rate(self) -> int | None:
+        return self._sample_rate
+
+    @property
+    def num_channels(self) -> int | None:
+        return self._num_channels
+
+    @property
+    def queued(self) -> int:
+        """Frames waiting to be received"""
+        return len(self._frames)
+
+    @property
+    def dropped(self) -> int:
+        """Frames dropped because the consumer was too slow"""
+        return self._dropped
+
+    def close(self) -> None:
+        """Stop receiving frames"""
+        self._closed = True
+        self._frames.clear()
+        self._front_end._unsubscribe(self)
+        self._ev.set()
+
+    def _put(self, frame: rtc.AudioFrame) -> None:
+        if len(self._frames) == self._frames.maxlen:
+            self._dropped += 1  # the oldest frame is dropped by the deque
+
+        self._frames.append(frame)
+        self._ev.set()
+
+    def __aiter__(self) -> AudioSubscription:
+        return self
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        while not self._frames:
+            if self._closed or self._front_end._closed:
+                raise StopAsyncIteration
+
+            self._ev.clear()
+            await self._ev.wait()
+
+        return self._frames.popleft()
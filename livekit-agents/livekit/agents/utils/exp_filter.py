@@ -1,8 +1,14 @@
+from __future__ import annotations
+
+import numpy as np
+
+
 class ExpFilter:
     def __init__(self, alpha: float, max_val: float = -1.0) -> None:
         self._alpha = alpha
         self._filtered = -1.0
         self._max_val = max_val
+        self._steps = np.empty(0)  # 1..n, exponents used by apply_many
 
     def reset(self, alpha: float = -1.0) -> None:
         if alpha != -1.0:
@@ -21,6 +27,39 @@ class ExpFilter:
 
         return self._filtered
 
+    def apply_many(
+        self, exp: float, sample: float, count: int, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Same as calling apply(exp, sample) count times, returns every filtered
+        value. The sample is constant so the values are computed in closed form:
+        f(n) = sample + (f(0) - sample) * a^n"""
+        if out is None:
+            out = np.empty(count)
+        else:
+            out = out[:count]
+
+        if count == 0:
+            return out
+
+        if self._filtered == -1.0:
+            out.fill(sample)
+        else:
+            a = self._alpha**exp
+            if len(self._steps) < count:
+                self._steps = np.arange(1, count + 1, dtype=np.float64)
+
+            np.power(a, self._steps[:count], out=out)
+            out *= self._filtered - sample
+            out += sample
+
+        # the values move monotonically toward sample, so clamping each value is
+        # the same as clamping the state after each step
+        if self._max_val != -1.0:
+            np.minimum(out, self._max_val, out=out)
+
+        self._filtered = float(out[-1])
+        return out
+
     def filtered(self) -> float:
         return self._filtered
 
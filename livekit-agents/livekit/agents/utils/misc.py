@@ -1,44 +1,20 @@
 import time
-from typing import List, Union
 
 from livekit import rtc
 
-AudioBuffer = Union[List[rtc.AudioFrame], rtc.AudioFrame]
+from .audio_buffer import AudioBuffer, AudioInput
 
 
-def merge_frames(buffer: AudioBuffer) -> rtc.AudioFrame:
+def merge_frames(buffer: AudioInput) -> rtc.AudioFrame:
     """
     Merges one or more AudioFrames into a single one
     Args:
-        buffer: either a rtc.AudioFrame or a list of rtc.AudioFrame
+        buffer: a rtc.AudioFrame, a list of rtc.AudioFrame or an AudioBuffer
     """
-    if isinstance(buffer, list):
-        # merge all frames into one
-        if len(buffer) == 0:
-            raise ValueError("buffer is empty")
+    if isinstance(buffer, rtc.AudioFrame):
+        return buffer
 
-        sample_rate = buffer[0].sample_rate
-        num_channels = buffer[0].num_channels
-        samples_per_channel = 0
-        data = b""
-        for frame in buffer:
-            if frame.sample_rate != sample_rate:
-                raise ValueError("sample rate mismatch")
-
-            if frame.num_channels != num_channels:
-                raise ValueError("channel count mismatch")
-
-            data += frame.data
-            samples_per_channel += frame.samples_per_channel
-
-        return rtc.AudioFrame(
-            data=data,
-            sample_rate=sample_rate,
-            num_channels=num_channels,
-            samples_per_channel=samples_per_channel,
-        )
-
-    return buffer
+    return AudioBuffer.from_frames(buffer).to_frame()
 
 
 def time_ms() -> int:
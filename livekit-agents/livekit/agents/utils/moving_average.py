@@ -15,6 +15,18 @@ class MovingAverage:
         self._sum += sample
         self._hist[index] = sample
 
+    def add_samples(self, sample: float, count: int) -> None:
+        """Same as calling add_sample(sample) count times"""
+        if count < len(self._hist):
+            for _ in range(count):
+                self.add_sample(sample)
+            return
+
+        # the whole window is replaced
+        self._count += count
+        self._hist[:] = [sample] * len(self._hist)
+        self._sum = sample * len(self._hist)
+
     def get_avg(self) -> float:
         if self._count == 0:
             return 0
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from livekit import rtc
+
+
+class Resampler:
+    """Streaming resampler (polyphase windowed-sinc FIR) with channel remixing.
+
+    The filter state is carried over between the calls, so an audio stream can be
+    resampled frame by frame without discontinuities at the frame boundaries. A
+    block is processed in a single vectorized call. The filter is causal: the
+    output has the duration of the input (e.g. 10ms frames are resampled into 10ms
+    frames when the rates allow it) and is delayed by half the filter length (about
+    num_zeros / min(input_rate, output_rate) seconds), flush() returns the audio
+    still held back at the end of the stream.
+
+    Downmixing averages the channels, upmixing a mono input duplicates it. When the
+    rates are equal the audio is only remixed, without filtering nor delay"""
+
+    def __init__(
+        self,
+        input_rate: int,
+        output_rate: int,
+        *,
+        input_channels: int = 1,
+        output_channels: int | None = None,
+        num_zeros: int = 8,
+        rolloff: float = 0.945,
+    ) -> None:
+        """
+        Args:
+            num_zeros: zero crossings of the sinc kept on each side, higher is a
+                sharper filter but a slower and more delayed output
+            rolloff: cutoff of the low-pass filter, relative to the Nyquist
+                frequency of the lowest rate
+        """
+        output_channels = output_channels or input_channels
+        if output_channels != input_channels and 1 not in (
+            input_channels,
+            output_channels,
+        ):
+            raise ValueError("only remixing from or to mono is supported")
+
+        self._input_rate = input_rate
+        self._output_rate = output_rate
+        self._input_channels = input_channels
+        self._output_channels = output_channels
+        # the channels are remixed on the side with the lowest channel count
+        self._channels = min(input_channels, output_channels)
+
+        g = math.gcd(input_rate, output_rate)
+        self._up, self._down = output_rate // g, input_rate // g
+        self._taps = 2 * math.ceil(num_zeros * max(1, self._down / self._up))
+        self._filters = _polyphase_filters(self._up, self._down, self._taps, rolloff)
+
+        # the last taps - 1 input samples (zeros before the stream started)
+        self._history = np.zeros((self._taps - 1, self._channels), dtype=np.float32)
+        # peak of the filter (the delay), in upsampled samples
+        self._center = self._up * self._taps // 2
+        self._in_count = 0  # input samples received (per channel)
+        self._out_count = 0  # output samples produced (per channel)
+
+    @property
+    def input_rate(self) -> int:
+        return self._input_rate
+
+    @property
+    def output_rate(self) -> int:
+        return self._output_rate
+
+    @property
+    def input_channels(self) -> int:
+        return self._input_channels
+
+    @property
+    def output_channels(self) -> int:
+        return self._output_channels
+
+    @property
+    def delay(self) -> float:
+        """Delay added to the audio, in seconds"""
+        if self._input_rate == self._output_rate:
+            return 0.0
+
+        return self._center / self._up / self._input_rate
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """Resample interleaved int16 samples, returns the interleaved int16 samples
+        available (possibly none)"""
+        x = samples.reshape(-1, self._input_channels)
+        if self._input_channels > self._channels:
+            x = x.mean(axis=1, keepdims=True, dtype=np.float32)
+
+        if self._input_rate == self._output_rate:
+            y = x
+        else:
+            y = self._filter(x)
+
+        if self._output_channels > self._channels:
+            y = np.repeat(y, self._output_channels, axis=1)
+
+        if y.dtype != np.int16:
+            y = np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+        return y.reshape(-1)
+
+    def push_frame(self, frame: rtc.AudioFrame) -> rtc.AudioFrame | None:
+        """Resample a frame, None if no output is available yet"""
+        if (
+            frame.sample_rate != self._input_rate
+            or frame.num_channels != self._input_channels
+        ):
+            raise ValueError("unexpected frame format")
+
+        return self._to_frame(self.push(np.frombuffer(frame.data, dtype=np.int16)))
+
+    def flush(self) -> rtc.AudioFrame | None:
+        """Output the audio held back by the filter, at the end of the stream"""
+        if self._input_rate == self._output_rate:
+            return None
+
+        delay = -(-self._center // self._up)
+        silence = np.zeros(delay * self._input_channels, dtype=np.int16)
+        return self._to_frame(self.push(silence))
+
+    def _filter(self, x: np.ndarray) -> np.ndarray:
+        x = np.concatenate((self._history, x.astype(np.float32, copy=False)))
+        self._history = x[len(x) - (self._taps - 1) :]
+        in_prev = self._in_count
+        self._in_count += len(x) - (self._taps - 1)
+
+        # output n is the upsampled sample n * down, computed from the input samples
+        # up to (n * down) // up
+        end = -(-self._in_count * self._up // self._down)
+        n = np.arange(self._out_count, end, dtype=np.int64)
+        self._out_count += len(n)
+
+        pos = n * self._down
+        windows = np.lib.stride_tricks.sliding_window_view(x, self._taps, axis=0)
+        return np.einsum(
+            "nct,nt->nc",
+            windows[pos // self._up - in_prev],  # windows ending on that sample
+            self._filters[pos % self._up],
+        )
+
+    def _to_frame(self, samples: np.ndarray) -> rtc.AudioFrame | None:
+        if len(samples) == 0:
+            return None
+
+        return rtc.AudioFrame(
+            data=samples.tobytes(),
+            sample_rate=self._output_rate,
+            num_channels=self._output_channels,
+            samples_per_channel=len(samples) // self._output_channels,
+        )
+
+
+def _polyphase_filters(up: int, down: int, taps: int, rolloff: float) -> np.ndarray:
+    """Kaiser windowed sinc low-pass at the upsampled rate, split in up phases of
+    taps coefficients (reversed, so they apply to a window of the input)"""
+    length = up * taps
+    cutoff = rolloff * 0.5 / max(up, down)  # cycles per upsampled sample
+    t = np.arange(length) - length // 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, 8.6)
+    h *= up / h.sum()
+    return np.ascontiguousarray(h.reshape(taps, up).T[:, ::-1], dtype=np.float32)
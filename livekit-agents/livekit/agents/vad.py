@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List
+from typing import List, Optional, Tuple
 
 from livekit import rtc
 
@@ -68,6 +68,12 @@ class VADStream(ABC):
     async def aclose(self, *, wait: bool = True) -> None:
         pass
 
+    @property
+    def input_format(self) -> Optional[Tuple[int, int]]:
+        """(sample_rate, num_channels) the pushed frames are converted to, frames
+        already in this format are used as is. None if they are used as received"""
+        return None
+
     @abstractmethod
     async def __anext__(self) -> VADEvent:
         raise StopAsyncIteration
@@ -1,3 +1,8 @@
-from .assistant import AssistantContext, VoiceAssistant
+from .assistant import (
+    AssistantContext,
+    SpeculationStats,
+    TurnMetrics,
+    VoiceAssistant,
+)
 
-__all__ = ["VoiceAssistant", "AssistantContext"]
+__all__ = ["VoiceAssistant", "AssistantContext", "SpeculationStats", "TurnMetrics"]
@@ -1,19 +1,66 @@
 import asyncio
 import contextlib
 import contextvars
+import re
 import time
 from typing import Any, AsyncIterable, Callable, Literal
 
-from attrs import define
+import aiohttp
+import numpy as np
+from attrs import Factory, define
 from livekit import rtc
 
-from .. import aio, utils
+from .. import aio, metrics, utils
 from .. import llm as allm
 from .. import stt as astt
 from .. import tts as atts
 from .. import vad as avad
 from ..log import logger
 from . import plotter
+from .playout import PlayoutScheduler
+
+
+@define(kw_only=True)
+class TurnMetrics:
+    """Timeline of a speech of the assistant. The timestamps come from time.time(),
+    they are None when the stage didn't happen (e.g. the speech doesn't answer the
+    user, or the source isn't an LLM)"""
+
+    user_speech_end: float | None = None  # end of speech detected by the VAD
+    final_transcript: float | None = None
+    llm_request: float | None = None
+    llm_first_token: float | None = None
+    tts_first_sentence: float | None = None  # first sentence pushed to the TTS
+    tts_first_audio: float | None = None
+    first_frame_captured: float | None = None  # first frame sent to the AudioSource
+    playout_end: float | None = None  # end of the playout, or of the interruption
+    interrupted: bool = False
+    speculative: bool = False  # the LLM was started before the final transcript
+    upstream_cancelled: bool = False  # the LLM and TTS were stopped on interruption
+    dropped_audio: float = 0.0  # synthesized audio dropped on interruption
+
+    @property
+    def end_to_end(self) -> float | None:
+        """Time between the end of the user speech and the first audio of the answer"""
+        return _delay(self.user_speech_end, self.first_frame_captured)
+
+    @property
+    def stt_delay(self) -> float | None:
+        return _delay(self.user_speech_end, self.final_transcript)
+
+    @property
+    def llm_ttft(self) -> float | None:
+        return _delay(self.llm_request, self.llm_first_token)
+
+    @property
+    def tts_ttfb(self) -> float | None:
+        return _delay(self.tts_first_sentence, self.tts_first_audio)
+
+
+def _delay(start: float | None, end: float | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return max(end - start, 0.0)
 
 
 @define(kw_only=True)
@@ -27,8 +74,63 @@ class _SpeechData:
     collected_text: str = (
         ""  # if the source is a stream, this will be the collected text
     )
+    # text sent to the TTS when its last audio was received, the audio received
+    # covers at most this text (the LLM is usually ahead of the TTS)
+    synthesized_text: str = ""
 
     answering_user_speech: str | None = None  # the this speech is answering to
+    user_identity: str | None = None  # participant who said answering_user_speech
+
+    # set while the speech answers an interim transcript that isn't final yet
+    speculative_since: float | None = None
+    confirm_ch: aio.Chan[None] | None = None  # closed once the speculation is confirmed
+    metrics: TurnMetrics = Factory(TurnMetrics)
+    playout: PlayoutScheduler | None = None
+    synthesis_task: asyncio.Task | None = None
+
+
+@define
+class SpeculationStats:
+    """Outcome of the answers started on stable interim transcripts"""
+
+    started: int = 0
+    hits: int = 0  # the final transcript matched, the answer was kept
+    misses: int = 0  # the answer was cancelled
+    latency_saved: float = 0.0
+    """sum of the time the answers were started before their final transcript"""
+
+    @property
+    def hit_rate(self) -> float:
+        done = self.hits + self.misses
+        return self.hits / done if done else 0.0
+
+
+def _heard_text(text: str, ratio: float) -> str:
+    """Estimate the part of text heard by the user when only this ratio of its audio
+    was played (the word being said is kept)"""
+    if ratio <= 0:
+        return ""
+
+    end = text.find(" ", round(len(text) * ratio))
+    return text if end == -1 else text[:end]
+
+
+_SENTENCE_END = re.compile(r"[.!?](\s|$)")
+_NORMALIZE = re.compile(r"[^\w\s]")
+
+
+def _same_transcript(a: str, b: str) -> bool:
+    """Compare transcripts, ignoring the case and the punctuation"""
+    return (
+        _NORMALIZE.sub("", a).lower().split() == _NORMALIZE.sub("", b).lower().split()
+    )
+
+
+async def _forward_audio(
+    sub: utils.AudioSubscription, stream: avad.VADStream | astt.SpeechStream
+) -> None:
+    async for frame in sub:
+        stream.push_frame(frame)
 
 
 def _validate_speech(data: _SpeechData):
@@ -44,6 +146,57 @@ class _AssistantOptions:
     int_speech_duration: float
     int_min_words: int
     base_volume: float
+    playout_buffer: float
+    speculative: bool
+    speculation_delay: float
+    max_participants: int
+
+
+class _PlayoutGain:
+    """Applies the volume filter to the synthesized speech, 10ms at a time.
+
+    The output frames are reused: capture_frame copies the data before returning,
+    so there is only one frame per size (the last block of a frame can be
+    shorter)"""
+
+    def __init__(self, vol_filter: utils.ExpFilter) -> None:
+        self._vol_filter = vol_filter
+        self._frames: dict[tuple[int, int, int], tuple[rtc.AudioFrame, np.ndarray]] = {}
+        self._gains = np.empty(0)
+        self._tmp = np.empty(0)
+
+    def process(
+        self,
+        samples: np.ndarray,
+        sample_rate: int,
+        num_channels: int,
+        target_volume: float,
+    ) -> rtc.AudioFrame:
+        """samples are the interleaved int16 samples of the block"""
+        samples_per_channel = len(samples) // num_channels
+        key = (sample_rate, num_channels, samples_per_channel)
+        if key not in self._frames:
+            if len(self._frames) >= 4:
+                self._frames.clear()
+
+            frame = rtc.AudioFrame.create(*key)
+            data = np.frombuffer(frame.data, dtype=np.int16)
+            self._frames[key] = (frame, data.reshape(-1, num_channels))
+
+        if len(self._gains) < samples_per_channel:
+            self._gains = np.empty(samples_per_channel)
+        if len(self._tmp) < len(samples):
+            self._tmp = np.empty(len(samples))
+
+        frame, out = self._frames[key]
+        gains = self._vol_filter.apply_many(
+            1 / samples_per_channel, target_volume, samples_per_channel, self._gains
+        )
+        tmp = self._tmp[: len(samples)].reshape(-1, num_channels)
+        np.multiply(samples.reshape(-1, num_channels), gains[:, None], out=tmp)
+        np.clip(tmp, -32768, 32767, out=tmp)
+        np.copyto(out, tmp, casting="unsafe")  # truncated like int()
+        return frame
 
 
 @define(kw_only=True, frozen=True)
@@ -52,8 +205,30 @@ class _StartArgs:
     participant: rtc.RemoteParticipant | str | None
 
 
+@define(kw_only=True)
+class _Listener:
+    """A linked participant, each one has its own VAD and STT streams"""
+
+    identity: str
+    recognize_task: asyncio.Task | None = None
+    speaking: bool = False
+    speech_prob: float = 0.0
+    speech_end: float | None = None  # time.time() of the end of the last speech
+    transcripted_text: str = ""
+    interim_text: str = ""
+    transcripted_words: int = 0
+    interim_words: int = 0
+    speculation_timer: asyncio.TimerHandle | None = None
+
+
 _ContextVar = contextvars.ContextVar("voice_assistant_contextvar")
 
+# the speech averages are sampled every 10ms (see VoiceAssistant._advance_state)
+_STATE_TICK = 0.01
+_VAD_PW = 2.4  # should this be exposed
+# audio kept (and faded out) when the speech is interrupted, the rest is dropped
+_INTERRUPT_TAIL = 0.2
+
 
 class AssistantContext:
     def __init__(self, assistant: "VoiceAssistant", llm_stream: allm.LLMStream) -> None:
@@ -89,6 +264,7 @@ EventTypes = Literal[
     "agent_speech_interrupted",
     "function_calls_collected",
     "function_calls_finished",
+    "turn_metrics",
 ]
 
 
@@ -105,12 +281,17 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         llm: allm.LLM,
         tts: atts.TTS,
         chat_ctx: allm.ChatContext | None = None,
+        context_window: allm.ChatContextWindow | None = None,
         fnc_ctx: allm.FunctionContext | None = None,
         allow_interruptions: bool = True,
         interrupt_volume: float = 0.05,
         interrupt_speech_duration: float = 0.7,
         interrupt_min_words: int = 3,
         base_volume: float = 1.0,
+        playout_buffer: float = 0.1,
+        speculative: bool = False,
+        speculation_delay: float = 0.3,
+        max_participants: int = 1,
         debug: bool = False,
         plotting: bool = False,
         loop: asyncio.AbstractEventLoop | None = None,
@@ -124,21 +305,29 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             int_speech_duration=interrupt_speech_duration,
             int_min_words=interrupt_min_words,
             base_volume=base_volume,
+            playout_buffer=playout_buffer,
+            speculative=speculative,
+            speculation_delay=speculation_delay,
+            max_participants=max_participants,
         )
         self._vad, self._tts, self._llm, self._stt = vad, tts, llm, stt
         self._fnc_ctx = fnc_ctx
+        if context_window is not None:
+            if chat_ctx is not None and chat_ctx is not context_window.chat_ctx:
+                raise ValueError("chat_ctx must be the chat_ctx of the context_window")
+            chat_ctx = context_window.chat_ctx
+
+        self._ctx_window = context_window
         self._chat_ctx = chat_ctx or allm.ChatContext()
         self._speaking, self._user_speaking = False, False
         self._plotter = plotter.AssistantPlotter(self._loop)
 
-        self._audio_source, self._audio_stream = None, None
-        self._closed, self._started, self._ready = False, False, False
-        self._linked_participant = ""
+        self._audio_source = None
+        self._closed, self._started = False, False
+        self._listeners: dict[str, _Listener] = {}  # by participant identity
 
         # tasks
         self._launch_task: asyncio.Task | None = None
-        self._recognize_task: asyncio.Task | None = None
-        self._update_task: asyncio.Task | None = None
         self._play_task: asyncio.Task | None = None
         self._tasks = set[asyncio.Task]()
 
@@ -156,11 +345,13 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         self._target_volume = self._opts.base_volume
         self._vol_filter = utils.ExpFilter(0.9, max_val=self._opts.base_volume)
         self._vol_filter.apply(1.0, self._opts.base_volume)
-        self._speech_prob = 0.0
+        self._speech_prob = 0.0  # highest of the listeners
+        self._speech_prob_avg = utils.MovingAverage(100)  # avg over 1s
         self._speaking_avg = utils.MovingAverage(
             int(self._opts.int_speech_duration * 100)
         )
-        self._transcripted_text, self._interim_text = "", ""
+        self._state_time = time.monotonic()
+        self._speculation_stats = SpeculationStats()
         self._start_future = asyncio.Future()
 
     def on(self, event: EventTypes, callback: Callable | None = None) -> Callable:
@@ -176,6 +367,8 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 - agent_speech_committed: the agent speech was committed to the chat context
                 - agent_speech_interrupted: the agent speech was interrupted
                 - function_calls_completed: all function calls have been completed
+                - turn_metrics: a speech of the assistant ended, with its timeline
+                    (TurnMetrics)
                 - will_synthesize_llm: the assistant will synthesize the LLM output
             callback: the callback to call when the event is emitted
         """
@@ -185,10 +378,20 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
     def chat_context(self) -> allm.ChatContext:
         return self._chat_ctx
 
+    @property
+    def linked_participants(self) -> list[str]:
+        """Identities of the participants the assistant listens to"""
+        return list(self._listeners)
+
     @property
     def started(self) -> bool:
         return self._started
 
+    @property
+    def speculation_stats(self) -> SpeculationStats:
+        """Hits and misses of the speculative answers (see the speculative option)"""
+        return self._speculation_stats
+
     async def say(
         self,
         source: str | allm.LLMStream | AsyncIterable[str],
@@ -201,7 +404,12 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             if not self._started:
                 await self._start_future
 
-        if isinstance(source, str) and stream:
+        # the cached phrases are only served by synthesize()
+        if (
+            isinstance(source, str)
+            and stream
+            and not isinstance(self._tts, atts.CachedTTS)
+        ):
             text = source
 
             async def _gen():
@@ -230,6 +438,9 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             room: the room currently in use
             participant: the participant to listen to, can either be a participant or a participant identity
                 If None, the first participant in the room will be used
+                With max_participants > 1, the other participants are linked too as
+                long as there is room for them. The assistant answers whoever
+                finished speaking, all of them share the VAD, STT and playout
         """
         if self.started:
             logger.warning("voice assistant already started")
@@ -242,34 +453,10 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         room.on("track_subscribed", self._on_track_subscribed)
         room.on("track_unsubscribed", self._on_track_unsubscribed)
         room.on("participant_connected", self._on_participant_connected)
+        room.on("participant_disconnected", self._on_participant_disconnected)
 
         self._launch_task = asyncio.create_task(self._launch())
 
-    def _mark_dirty(self):
-        """Called when the AudioStream isn't valid anymore (microphone unsubscribed or participant
-        disconnected)"""
-        if not self._ready:
-            logger.warning("assistant already marked as dirty")
-            return
-
-        self._log_debug("marking assistant as dirty")
-        self._ready = False
-
-        if self._recognize_task is not None:
-            self._recognize_task.cancel()
-
-    def _mark_ready(self, audio_stream: rtc.AudioStream):
-        """We have everything we need to start the voice assistant (audio sources & audio
-        streams)"""
-        if self._ready:
-            logger.warning("assistant already marked as ready")
-            return
-
-        self._log_debug("marking assistant as ready")
-        self._audio_stream = audio_stream
-        self._ready = True
-        self._recognize_task = asyncio.create_task(self._recognize_loop())
-
     async def aclose(self, wait: bool = True) -> None:
         if not self.started:
             return
@@ -283,6 +470,9 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         self._start_args.room.off(
             "participant_connected", self._on_participant_connected
         )
+        self._start_args.room.off(
+            "participant_disconnected", self._on_participant_disconnected
+        )
 
         if self._opts.plotting:
             self._plotter.terminate()
@@ -292,26 +482,27 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 self._launch_task.cancel()
                 await self._launch_task
 
-        if self._recognize_task is not None:
-            self._recognize_task.cancel()
+        recognize_tasks = []
+        for listener in self._listeners.values():
+            self._cancel_speculation_timer(listener)
+            if listener.recognize_task is not None:
+                listener.recognize_task.cancel()
+                recognize_tasks.append(listener.recognize_task)
 
         if not wait:
-            if self._update_task is not None:
-                self._update_task.cancel()
-
             if self._play_task is not None:
                 self._play_task.cancel()
 
         with contextlib.suppress(asyncio.CancelledError):
-            if self._update_task is not None:
-                await self._update_task
-
-            if self._recognize_task is not None:
-                await self._recognize_task
+            for task in recognize_tasks:
+                await task
 
             if self._play_task is not None:
                 await self._play_task
 
+        if self._ctx_window is not None:
+            await self._ctx_window.aclose()  # stop the summarization in progress
+
     async def _launch(self):
         self._log_debug("assistant - launching")
 
@@ -323,15 +514,15 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 self._link_participant(self._start_args.participant.identity)
             else:
                 self._link_participant(self._start_args.participant)
-        else:
-            for participant in self._start_args.room.participants.values():
-                self._link_participant(participant.identity)
+
+        for participant in self._start_args.room.participants.values():
+            if len(self._listeners) >= self._opts.max_participants:
                 break
+            self._link_participant(participant.identity)
 
         self._audio_source = rtc.AudioSource(
             self._tts.sample_rate, self._tts.num_channels
         )
-        self._update_task = asyncio.create_task(self._update_loop())
 
         track = rtc.LocalAudioTrack.create_audio_track("voice", self._audio_source)
         options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
@@ -341,25 +532,46 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         self._start_future.set_result(None)
 
     def _link_participant(self, identity: str):
+        if identity in self._listeners:
+            return
+
         p = self._start_args.room.participants_by_identity.get(identity)
         assert p is not None
 
+        self._log_debug(f"assistant - linking participant {identity}")
+        self._listeners[identity] = _Listener(identity=identity)
         for pub in p.tracks.values():
             if pub.subscribed:
                 self._on_track_subscribed(pub.track, pub, p)  # type: ignore
             else:
                 self._on_track_published(pub, p)
 
-        self._linked_participant = identity
+    def _unlink_participant(self, identity: str):
+        listener = self._listeners.pop(identity, None)
+        if listener is None:
+            return
+
+        self._log_debug(f"assistant - unlinking participant {identity}")
+        self._cancel_speculation_timer(listener)
+        if listener.recognize_task is not None:
+            listener.recognize_task.cancel()
+
+        if listener.speaking:
+            self._user_stopped_speaking(listener, 0.0)
 
     def _on_participant_connected(self, participant: rtc.RemoteParticipant):
-        if not self._linked_participant:
+        if len(self._listeners) < self._opts.max_participants:
             self._link_participant(participant.identity)
 
+    def _on_participant_disconnected(self, participant: rtc.RemoteParticipant):
+        # a single linked participant stays linked, in case they reconnect
+        if self._opts.max_participants > 1:
+            self._unlink_participant(participant.identity)
+
     def _on_track_published(
         self, pub: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant
     ):
-        if participant.identity != self._linked_participant:
+        if participant.identity not in self._listeners:
             return
 
         if pub.source == rtc.TrackSource.SOURCE_MICROPHONE and not pub.subscribed:
@@ -371,12 +583,13 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         pub: rtc.RemoteTrackPublication,
         participant: rtc.RemoteParticipant,
     ):
-        if participant.identity != self._linked_participant:
+        listener = self._listeners.get(participant.identity)
+        if listener is None:
             return
 
         if pub.source == rtc.TrackSource.SOURCE_MICROPHONE:
             audio_stream = rtc.AudioStream(track)
-            self._stream_ready(audio_stream)
+            self._stream_ready(listener, audio_stream)
 
     def _on_track_unsubscribed(
         self,
@@ -384,71 +597,160 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         pub: rtc.RemoteTrackPublication,
         participant: rtc.RemoteParticipant,
     ):
-        if participant.identity != self._linked_participant:
+        listener = self._listeners.get(participant.identity)
+        if listener is None:
             return
 
         if pub.source == rtc.TrackSource.SOURCE_MICROPHONE:
-            self._stream_dirty()
+            self._stream_dirty(listener)
 
-    def _stream_dirty(self):
+    def _stream_dirty(self, listener: _Listener):
         """Called when the AudioStream isn't valid anymore (microphone unsubscribed or participant
         disconnected)"""
-        if not self._ready:
+        if listener.recognize_task is None:
             logger.warning("assistant already marked as dirty")
             return
 
-        self._log_debug("marking assistant as dirty")
-        self._ready = False
-
-        if self._recognize_task is not None:
-            self._recognize_task.cancel()
+        self._log_debug(f"marking {listener.identity} as dirty")
+        listener.recognize_task.cancel()
+        listener.recognize_task = None
 
-    def _stream_ready(self, audio_stream: rtc.AudioStream):
-        """We have everything we need to start the voice assistant (audio sources & audio
-        streams)"""
-        if self._ready:
+    def _stream_ready(self, listener: _Listener, audio_stream: rtc.AudioStream):
+        """We have everything we need to listen to the participant (audio stream)"""
+        if listener.recognize_task is not None:
             logger.warning("assistant already marked as ready")
             return
 
-        self._log_debug("marking assistant as ready")
-        self._audio_stream = audio_stream
-        self._ready = True
-        self._recognize_task = asyncio.create_task(self._recognize_loop())
+        self._log_debug(f"marking {listener.identity} as ready")
+        listener.recognize_task = asyncio.create_task(
+            self._recognize_loop(listener, audio_stream)
+        )
 
-    def _recv_final_transcript(self, ev: astt.SpeechEvent):
+    def _recv_final_transcript(self, listener: _Listener, ev: astt.SpeechEvent):
         self._log_debug(f"assistant - received transcript {ev.alternatives[0].text}")
-        self._transcripted_text += ev.alternatives[0].text
+        listener.transcripted_text += ev.alternatives[0].text
+        listener.transcripted_words += len(ev.alternatives[0].text.split())
         self._interrupt_if_needed()
-        self._maybe_answer(self._transcripted_text)
+        self._cancel_speculation_timer(listener)
+
+        answer = self._answer_speech
+        if answer is not None and answer.speculative_since is not None:
+            if answer.user_identity == listener.identity and _same_transcript(
+                answer.answering_user_speech, listener.transcripted_text
+            ):
+                self._confirm_speculation(answer, listener)
+                return
+
+            self._speculation_missed(answer)
 
-    def _recv_interim_transcript(self, ev: astt.SpeechEvent):
-        self._interim_text = ev.alternatives[0].text
+        self._maybe_answer(listener.transcripted_text, listener)
+
+    def _recv_interim_transcript(self, listener: _Listener, ev: astt.SpeechEvent):
+        changed = ev.alternatives[0].text != listener.interim_text
+        listener.interim_text = ev.alternatives[0].text
+        listener.interim_words = len(listener.interim_text.split())
         self._interrupt_if_needed()
 
-    def _transcript_finished(self, ev: astt.SpeechEvent):
+        if self._opts.speculative and changed:
+            # answer once the interim transcript is stable for speculation_delay
+            self._cancel_speculation_timer(listener)
+            listener.speculation_timer = self._loop.call_later(
+                self._opts.speculation_delay, self._speculate, listener
+            )
+
+    def _cancel_speculation_timer(self, listener: _Listener) -> None:
+        if listener.speculation_timer is not None:
+            listener.speculation_timer.cancel()
+            listener.speculation_timer = None
+
+    def _speculate(self, listener: _Listener) -> None:
+        listener.speculation_timer = None
+        text = listener.transcripted_text + listener.interim_text
+        if not text.strip():
+            return
+
+        answer = self._answer_speech
+        if answer is not None and not answer.validated:
+            if answer.speculative_since is not None:
+                if answer.user_identity == listener.identity and _same_transcript(
+                    answer.answering_user_speech, text
+                ):
+                    return  # already answering this text
+
+                self._speculation_missed(answer)
+
+        self._log_debug(f"assistant - speculative answer to {text}")
+        self._speculation_stats.started += 1
+        self._maybe_answer(text, listener, speculative=True)
+
+    def _confirm_speculation(self, data: _SpeechData, listener: _Listener) -> None:
+        assert data.speculative_since is not None and data.confirm_ch is not None
+        saved = time.monotonic() - data.speculative_since
+        self._speculation_stats.hits += 1
+        self._speculation_stats.latency_saved += saved
+        self._log_debug(
+            "assistant - speculative answer confirmed",
+            extra={"latency_saved": round(saved, 3)},
+        )
+
+        data.speculative_since = None
+        data.answering_user_speech = listener.transcripted_text
+        data.metrics.final_transcript = time.time()
+        data.confirm_ch.close()
+        if not listener.speaking:
+            self._validate_answer_if_needed()
+
+    def _speculation_missed(self, data: _SpeechData) -> None:
+        self._speculation_stats.misses += 1
+        self._log_debug("assistant - speculative answer cancelled")
+        data.speculative_since = None
+
+    def _transcript_finished(self, listener: _Listener, ev: astt.SpeechEvent):
         self._log_debug("assistant - transcript finished")
-        self._transcripted_text = self._interim_text = ""
+        self._cancel_speculation_timer(listener)
+        listener.transcripted_text = listener.interim_text = ""
+        listener.transcripted_words = listener.interim_words = 0
         self._interrupt_if_needed()
         self._validate_answer_if_needed()
 
-    def _did_vad_inference(self, ev: avad.VADEvent):
+    def _did_vad_inference(self, listener: _Listener, ev: avad.VADEvent):
         self._plotter.plot_value("vad_raw", ev.raw_inference_prob)
         self._plotter.plot_value("vad_smoothed", ev.probability)
         self._plotter.plot_value("vad_dur", ev.inference_duration * 1000)
-        self._speech_prob = ev.raw_inference_prob
+        self._advance_state()
+        listener.speech_prob = ev.raw_inference_prob
+        self._speech_prob = max(
+            (lst.speech_prob for lst in self._listeners.values()), default=0.0
+        )
+        self._update_target_volume()
 
-    def _user_started_speaking(self):
-        self._log_debug("assistant - user started speaking")
+    def _user_started_speaking(self, listener: _Listener):
+        self._log_debug(f"assistant - {listener.identity} started speaking")
         self._plotter.plot_event("user_started_speaking")
+        self._advance_state()
+        listener.speaking = True
+        listener.speech_end = None
         self._user_speaking = True
         self.emit("user_started_speaking")
 
-    def _user_stopped_speaking(self, speech_duration: float):
-        self._log_debug(f"assistant - user stopped speaking {speech_duration:.2f}s")
+    def _user_stopped_speaking(self, listener: _Listener, speech_duration: float):
+        self._log_debug(
+            f"assistant - {listener.identity} stopped speaking {speech_duration:.2f}s"
+        )
         self._plotter.plot_event("user_started_speaking")
         self._interrupt_if_needed()
         self._validate_answer_if_needed()
-        self._user_speaking = False
+        self._advance_state()
+        listener.speaking = False
+        listener.speech_end = time.time()
+        self._user_speaking = any(lst.speaking for lst in self._listeners.values())
+        answer = self._answer_speech
+        if (
+            answer is not None
+            and not answer.validated
+            and answer.user_identity == listener.identity
+        ):
+            answer.metrics.user_speech_end = listener.speech_end
         self.emit("user_stopped_speaking")
 
     def _agent_started_speaking(self):
@@ -463,77 +765,105 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         self._agent_speaking = False
         self.emit("agent_stopped_speaking")
 
-    async def _recognize_loop(self):
-        """Recognize speech from the audio stream and do voice activity detection"""
-        assert self._audio_stream is not None
-
+    async def _recognize_loop(
+        self, listener: _Listener, audio_stream: rtc.AudioStream
+    ) -> None:
+        """Recognize speech from the audio stream of a participant and do voice
+        activity detection"""
         vad_stream = self._vad.stream()
         stt_stream = self._stt.stream()
 
-        select = aio.select([self._audio_stream, vad_stream, stt_stream])
+        # the frames are resampled once per format needed by the VAD and the STT
+        front_end = utils.AudioFrontEnd()
+        subs = {
+            stream: front_end.subscribe(*(stream.input_format or (None, None)))
+            for stream in (vad_stream, stt_stream)
+        }
+        forward_tasks = [
+            asyncio.create_task(_forward_audio(sub, stream))
+            for stream, sub in subs.items()
+        ]
+
+        select = aio.select([audio_stream, vad_stream, stt_stream])
         try:
             while True:
                 s = await select()
-                if s.selected is self._audio_stream:
+                if s.selected is audio_stream:
                     audio_event: rtc.AudioFrameEvent = s.result()
-                    stt_stream.push_frame(audio_event.frame)
-                    vad_stream.push_frame(audio_event.frame)
+                    front_end.push_frame(audio_event.frame)
 
                 if s.selected is vad_stream:
                     vad_event: avad.VADEvent = s.result()
                     if vad_event.type == avad.VADEventType.START_OF_SPEECH:
-                        self._user_started_speaking()
+                        self._user_started_speaking(listener)
                     elif vad_event.type == avad.VADEventType.INFERENCE_DONE:
-                        self._did_vad_inference(vad_event)
+                        self._did_vad_inference(listener, vad_event)
                     elif vad_event.type == avad.VADEventType.END_OF_SPEECH:
-                        self._user_stopped_speaking(vad_event.duration)
+                        self._user_stopped_speaking(listener, vad_event.duration)
 
                 if s.selected is stt_stream:
                     stt_event = s.result()
                     if stt_event.type == astt.SpeechEventType.FINAL_TRANSCRIPT:
-                        self._recv_final_transcript(stt_event)
+                        self._recv_final_transcript(listener, stt_event)
                     elif stt_event.type == astt.SpeechEventType.INTERIM_TRANSCRIPT:
-                        self._recv_interim_transcript(stt_event)
+                        self._recv_interim_transcript(listener, stt_event)
                     elif stt_event.type == astt.SpeechEventType.END_OF_SPEECH:
-                        self._transcript_finished(stt_event)
+                        self._transcript_finished(listener, stt_event)
         except Exception:
             logger.exception("error in recognize loop")
         finally:
+            front_end.close()
+            for task in forward_tasks:
+                task.cancel()
+            await asyncio.gather(*forward_tasks, return_exceptions=True)
+            dropped = {type(st).__name__: sub.dropped for st, sub in subs.items()}
+            if any(dropped.values()):
+                logger.warning(
+                    "audio frames dropped by slow consumers", extra={"dropped": dropped}
+                )
+
             await stt_stream.aclose(wait=False)
             await vad_stream.aclose(wait=False)
             await select.aclose()
 
-    async def _update_loop(self):
-        """Update the volume every 10ms based on the speech probability"""
-        speech_prob_avg = utils.MovingAverage(100)  # avg over 1s
-
-        vad_pw = 2.4  # should this be exposed
-        while not self._closed:
-            bvol = self._opts.base_volume
+    def _advance_state(self) -> None:
+        """Sample the speech averages for every 10ms elapsed since the last call.
+        It is called before the VAD state changes (it is constant in between), so
+        nothing needs to run while the assistant is idle"""
+        ticks = int((time.monotonic() - self._state_time) / _STATE_TICK)
+        if ticks <= 0:
+            return
 
-            self._speaking_avg.add_sample(int(self._user_speaking))
-            speech_prob_avg.add_sample(
-                self._speech_prob
-            )  # not totally accurate due to timing between vad inference and this task
-            self._target_volume = max(0, 1 - speech_prob_avg.get_avg() * vad_pw) * bvol
+        self._state_time += ticks * _STATE_TICK
+        self._speaking_avg.add_samples(int(self._user_speaking), ticks)
+        self._speech_prob_avg.add_samples(self._speech_prob, ticks)
+
+    def _update_target_volume(self) -> float:
+        """Update the volume based on the speech probability, called on every VAD
+        inference and every 10ms of playout"""
+        self._advance_state()
+        bvol = self._opts.base_volume
+        self._target_volume = (
+            max(0, 1 - self._speech_prob_avg.get_avg() * _VAD_PW) * bvol
+        )
 
-            if self._playing_speech:
-                if not self._playing_speech.allow_interruptions:
-                    # avoid volume to go to 0 even if speech probability is high
-                    self._target_volume = max(self._target_volume, bvol * 0.5)
+        if self._playing_speech:
+            if not self._playing_speech.allow_interruptions:
+                # avoid volume to go to 0 even if speech probability is high
+                self._target_volume = max(self._target_volume, bvol * 0.5)
 
-                if self._playing_speech.interrupted:
-                    # the current speech is interrupted, target volume should be 0
-                    self._target_volume = 0
+            if self._playing_speech.interrupted:
+                # the current speech is interrupted, target volume should be 0
+                self._target_volume = 0
 
-            if self._user_speaking:
-                self._interrupt_if_needed()
+        if self._user_speaking:
+            self._interrupt_if_needed()
 
-            if self._opts.plotting:
-                self._plotter.plot_value("raw_t_vol", self._target_volume)
-                self._plotter.plot_value("vol", self._vol_filter.filtered())
+        if self._opts.plotting:
+            self._plotter.plot_value("raw_t_vol", self._target_volume)
+            self._plotter.plot_value("vol", self._vol_filter.filtered())
 
-            await asyncio.sleep(0.01)
+        return self._target_volume
 
     def _interrupt_if_needed(self):
         """Check whether the current speech should be interrupted"""
@@ -544,6 +874,7 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         ):
             return
 
+        self._advance_state()
         if (
             self._speaking_avg.get_avg() < 0.9
         ):  # allow 10% of "noise"/false positives in the VAD?
@@ -553,11 +884,12 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             # some STT doesn't support streaming (e.g Whisper)
             # so it doesn't make sense to wait for a certain amount of words
             # before interrupting the speech
-            txt = self._transcripted_text.strip().split()
-            if len(txt) <= self._opts.int_min_words:
-                txt = self._interim_text.strip().split()
-                if len(txt) <= self._opts.int_min_words:
-                    return
+            min_words = self._opts.int_min_words
+            if all(
+                lst.transcripted_words <= min_words and lst.interim_words <= min_words
+                for lst in self._listeners.values()
+            ):
+                return
 
         if (
             self._playout_start_time is not None
@@ -566,12 +898,33 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             return
 
         self._log_debug("assistant - interrupting speech")
-        self._playing_speech.interrupted = True
+        self._interrupt_speech(self._playing_speech)
+
+    def _interrupt_speech(self, data: _SpeechData) -> None:
+        """Interrupt the playing speech and stop the work upstream right away: the
+        LLM and the TTS streams are closed and only a short tail of the synthesized
+        audio is kept for the fade out"""
+        data.interrupted = True
+        running_fncs = (
+            isinstance(data.source, allm.LLMStream)
+            and len(data.source.called_functions) > 0
+        )
+        task = data.synthesis_task
+        if task is not None and not task.done() and not running_fncs:
+            # the called functions are left running, they may have side effects
+            data.metrics.upstream_cancelled = True
+            task.cancel()
+
+        if data.playout is not None:
+            data.metrics.dropped_audio = data.playout.truncate(_INTERRUPT_TAIL)
 
     def _validate_answer_if_needed(self):
         if self._answer_speech is None:
             return
 
+        if self._answer_speech.speculative_since is not None:
+            return  # wait for the final transcript to confirm it
+
         if self._agent_speaking and (
             self._playing_speech and not self._playing_speech.interrupted
         ):
@@ -580,11 +933,14 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
         self._log_debug("assistant - validating answer")
         _validate_speech(self._answer_speech)
 
-    def _maybe_answer(self, text: str) -> None:
+    def _maybe_answer(
+        self, text: str, listener: _Listener, *, speculative: bool = False
+    ) -> None:
         async def _answer_if_validated(
             ctx: allm.ChatContext, data: _SpeechData
         ) -> None:
             try:
+                data.metrics.llm_request = time.time()
                 data.source = await self._llm.chat(ctx, fnc_ctx=self._fnc_ctx)
                 await self._start_speech(data, interrupt_current_if_possible=False)
             except Exception:
@@ -595,15 +951,27 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             add_to_ctx=True,
             val_ch=aio.Chan[None](),
             answering_user_speech=text,
+            user_identity=listener.identity,
+            speculative_since=time.monotonic() if speculative else None,
+            confirm_ch=aio.Chan[None]() if speculative else None,
         )
+        turn = self._answer_speech.metrics
+        turn.user_speech_end = listener.speech_end
+        turn.speculative = speculative
+        if not speculative:
+            turn.final_transcript = time.time()
 
-        messages = self._chat_ctx.messages.copy()
         user_msg = allm.ChatMessage(
             text=text,
             role=allm.ChatRole.USER,
         )
-        messages.append(user_msg)
-        ctx = allm.ChatContext(messages=messages)
+        if self._ctx_window is not None:
+            # only the messages fitting in the token budget are sent
+            ctx = self._ctx_window.build(extra=[user_msg])
+        else:
+            messages = self._chat_ctx.messages.copy()
+            messages.append(user_msg)
+            ctx = allm.ChatContext(messages=messages)
 
         if self._maybe_answer_task is not None:
             self._maybe_answer_task.cancel()
@@ -629,7 +997,7 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 and self._playing_speech.allow_interruptions
             ):
                 logger.debug("assistant - interrupting current speech")
-                self._playing_speech.interrupted = True
+                self._interrupt_speech(self._playing_speech)
 
             logger.debug("assistant - waiting for current speech to finish")
             await self._play_task
@@ -648,9 +1016,14 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
 
         # reset volume before starting a new speech
         self._vol_filter.reset()
-        po_tx, po_rx = aio.channel()  # playout channel
-        tts_co = self._synthesize_task(data, po_tx)
+        playout = PlayoutScheduler(
+            self._tts.sample_rate,
+            self._tts.num_channels,
+            target_buffer=self._opts.playout_buffer,
+        )
+        tts_co = self._synthesize_task(data, playout)
         _synthesize_task = asyncio.create_task(tts_co)
+        data.playout, data.synthesis_task = playout, _synthesize_task
 
         try:
             with contextlib.suppress(aio.ChanClosed):
@@ -668,7 +1041,16 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 self._chat_ctx.messages.append(msg)
                 self.emit("user_speech_committed", self._chat_ctx, msg)
 
-            await self._playout_task(po_rx)
+            await self._playout_task(playout)
+            if data.interrupted:
+                # only keep what the user heard, out of the text synthesized
+                heard = 0.0
+                if playout.input_duration > 0:
+                    heard = playout.pushed_duration / playout.input_duration
+
+                data.collected_text = _heard_text(data.synthesized_text, heard)
+
+            self._turn_finished(data)
 
             msg = allm.ChatMessage(
                 text=data.collected_text,
@@ -695,10 +1077,28 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
 
             self._log_debug("assistant - maybe_play_speech finished")
 
+    def _turn_finished(self, data: _SpeechData) -> None:
+        turn = data.metrics
+        turn.playout_end = time.time()
+        turn.interrupted = data.interrupted
+        for histogram, value in (
+            (metrics.TURN_LATENCY, turn.end_to_end),
+            (metrics.TURN_STT_DELAY, turn.stt_delay),
+            (metrics.TURN_LLM_TTFT, turn.llm_ttft),
+            (metrics.TURN_TTS_TTFB, turn.tts_ttfb),
+        ):
+            if value is not None:
+                histogram.observe(value)
+
+        if turn.interrupted:
+            metrics.TURN_DROPPED_AUDIO.observe(turn.dropped_audio)
+
+        self.emit("turn_metrics", turn)
+
     async def _synthesize_task(
         self,
         data: _SpeechData,
-        po_tx: aio.ChanSender[rtc.AudioFrame],
+        playout: PlayoutScheduler,
     ) -> None:
         """Synthesize speech from the source"""
         assert data.source is not None
@@ -708,18 +1108,20 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
             # No streaming is needed, use the TTS directly
             # This should be faster when the whole text is known in advance
             # (no buffering on the provider side)
-            data.collected_text = data.source
+            data.collected_text = data.synthesized_text = data.source
             _start_time = time.time()
+            data.metrics.tts_first_sentence = _start_time
             _first_frame = True
             async for audio in self._tts.synthesize(data.source):
                 if _first_frame:
                     dt = time.time() - _start_time
+                    data.metrics.tts_first_audio = time.time()
                     _first_frame = False
                     self._log_debug(f"assistant - tts first frame in {dt:.2f}s")
 
-                po_tx.send_nowait(audio.data)
+                playout.push_frame(audio.data)
 
-            po_tx.close()
+            playout.end_input()
             self._log_debug("tts inference finished")
             return
 
@@ -737,13 +1139,16 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 if event.type == atts.SynthesisEventType.AUDIO:
                     if _first_frame:
                         dt = time.time() - _start_time
+                        data.metrics.tts_first_audio = time.time()
                         _first_frame = False
                         self._log_debug(
                             f"assistant - tts first frame in {dt:.2f}s (streamed)"
                         )
 
                     assert event.audio is not None
-                    po_tx.send_nowait(event.audio.data)
+                    if not data.interrupted:  # ignored by the playout otherwise
+                        data.synthesized_text = data.collected_text
+                    playout.push_frame(event.audio.data)
 
         _forward_task = asyncio.create_task(_forward_stream())
         try:
@@ -755,10 +1160,27 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                     alt = chunk.choices[0].delta.content
                     if not alt:
                         continue
+                    if data.metrics.llm_first_token is None:
+                        data.metrics.llm_first_token = time.time()
+
                     data.collected_text += alt
                     tts_stream.push_text(alt)
+                    self._first_sentence_pushed(data)
+
+                    if (
+                        data.confirm_ch is not None
+                        and data.speculative_since is not None
+                        and _SENTENCE_END.search(data.collected_text)
+                    ):
+                        # only synthesize the first sentence until the speculation
+                        # is confirmed (the answer is cancelled otherwise)
+                        with contextlib.suppress(aio.ChanClosed):
+                            await data.confirm_ch.recv()
 
                 tts_stream.mark_segment_end()
+                if data.metrics.tts_first_sentence is None:
+                    data.metrics.tts_first_sentence = time.time()
+
                 if len(data.source.called_functions) > 0:
                     self.emit("function_calls_collected", assistant_ctx)
 
@@ -773,29 +1195,46 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 async for seg in data.source:
                     data.collected_text += seg
                     tts_stream.push_text(seg)
+                    self._first_sentence_pushed(data)
 
                 tts_stream.mark_segment_end()
+                if data.metrics.tts_first_sentence is None:
+                    data.metrics.tts_first_sentence = time.time()
 
             await tts_stream.aclose()
+        except asyncio.CancelledError:
+            # interrupted, stop generating and synthesizing. The requests in flight
+            # are aborted, their connection errors are expected
+            try:
+                if isinstance(data.source, allm.LLMStream):
+                    with contextlib.suppress(aiohttp.ClientError, OSError):
+                        await data.source.aclose(wait=False)
+            finally:
+                with contextlib.suppress(aiohttp.ClientError, OSError):
+                    await tts_stream.aclose(wait=False)
+            raise
         except Exception:
             logger.exception("error while streaming text to TTS")
         finally:
-            po_tx.close()
+            playout.end_input()
             with contextlib.suppress(asyncio.CancelledError):
                 _forward_task.cancel()
                 await _forward_task
 
             self._log_debug("tts inference finished")
 
-    async def _playout_task(
-        self,
-        po_rx: aio.ChanReceiver[rtc.AudioFrame],
-    ) -> None:
+    def _first_sentence_pushed(self, data: _SpeechData) -> None:
+        if data.metrics.tts_first_sentence is None and _SENTENCE_END.search(
+            data.collected_text
+        ):
+            data.metrics.tts_first_sentence = time.time()
+
+    async def _playout_task(self, playout: PlayoutScheduler) -> None:
         """Playout the synthesized speech with volume control"""
         assert self._audio_source is not None
 
-        sample_idx = 0
         first_frame = True
+        gain = _PlayoutGain(self._vol_filter)
 
         def _should_break():
             eps = 1e-6
@@ -804,39 +1243,25 @@ class VoiceAssistant(utils.EventEmitter[EventTypes]):
                 self._playing_speech.interrupted and self._vol_filter.filtered() <= eps
             )
 
-        async for buf in po_rx:
+        async for samples in playout:
             if first_frame and self._opts.debug:
                 self._agent_started_speaking()
                 first_frame = False
 
+            target_volume = self._update_target_volume()  # playout tick
             if _should_break():
                 break
 
-            i = 0
-            while i < len(buf.data):
-                if _should_break():
-                    break
-
-                ms10 = buf.sample_rate // 100
-                rem = min(ms10, len(buf.data) - i)
-                data = buf.data[i : i + rem]
-                i += rem
-
-                dt = 1 / len(data)
-                for si in range(0, len(data)):
-                    vol = self._vol_filter.apply(dt, self._target_volume)
-                    j = data[si] / 32768
-                    data[si] = int(j * vol * 32768)
-                    sample_idx += 1
-
-                frame = rtc.AudioFrame(
-                    data=data.tobytes(),
-                    sample_rate=buf.sample_rate,
-                    num_channels=buf.num_channels,
-                    samples_per_channel=rem,
-                )
-                await self._audio_source.capture_frame(frame)
+            frame = gain.process(
+                samples, playout.sample_rate, playout.num_channels, target_volume
+            )
+            await self._audio_source.capture_frame(frame)
+            turn = self._playing_speech.metrics  # type: ignore
+            if turn.first_frame_captured is None:
+                turn.first_frame_captured = time.time()
 
+        # the audio already captured is still being played
+        await asyncio.sleep(playout.queued_duration)
         self._agent_stopped_speaking()
 
     def _log_debug(self, msg: str, **kwargs) -> None:
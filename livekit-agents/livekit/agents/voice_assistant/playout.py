@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+from livekit import rtc
+
+
+class PlayoutScheduler:
+    """Paces the playout of synthesized speech.
+
+    The frames received from the TTS go through a jitter buffer and are re-chunked
+    into frames of exactly frame_duration (the last one is padded with silence).
+    Iterating over the scheduler releases them in real time, keeping target_buffer
+    of audio queued downstream (inside the rtc.AudioSource) ahead of an audio
+    clock. So the position of the playout is known, and once the iteration stops
+    only the queued audio is still played"""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        num_channels: int,
+        *,
+        target_buffer: float = 0.1,
+        frame_duration: float = 0.01,
+    ) -> None:
+        """
+        Args:
+            target_buffer: duration of audio queued downstream, also buffered before
+                starting the playout (or resuming it after an underrun) unless the
+                input ended
+            frame_duration: duration of the frames released, e.g 0.01 or 0.02
+        """
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._target_buffer = target_buffer
+        self._frame_samples = int(sample_rate * frame_duration)  # per channel
+        self._frames: deque[np.ndarray] = deque()  # interleaved int16 samples
+        self._pending = np.empty(0, dtype=np.int16)  # incomplete frame
+        self._input_ev = asyncio.Event()
+        self._input_ended = False
+        self._truncated = False
+        self._input_samples = 0
+        self._pushed_samples = 0
+        # time at which the first released sample was (or will be) played, it is
+        # moved forward after an underrun
+        self._clock_start: float | None = None
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def num_channels(self) -> int:
+        return self._num_channels
+
+    def push_frame(self, frame: rtc.AudioFrame) -> None:
+        """Add a frame received from the TTS"""
+        if self._truncated:
+            return  # the synthesis is being cancelled
+
+        if self._input_ended:
+            raise RuntimeError("input already ended")
+
+        if (
+            frame.sample_rate != self._sample_rate
+            or frame.num_channels != self._num_channels
+        ):
+            raise ValueError(
+                f"expected frames of {self._sample_rate}Hz with {self._num_channels} "
+                f"channels, got {frame.sample_rate}Hz with {frame.num_channels}"
+            )
+
+        samples = np.frombuffer(frame.data, dtype=np.int16)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+
+        size = self._frame_samples * self._num_channels
+        end = len(samples) // size * size
+        for i in range(0, end, size):
+            self._frames.append(samples[i : i + size])
+
+        self._pending = samples[end:]
+        self._input_samples += frame.samples_per_channel
+        self._input_ev.set()
+
+    def end_input(self) -> None:
+        """No more frames will be pushed"""
+        if self._input_ended:
+            return
+
+        if len(self._pending):
+            size = self._frame_samples * self._num_channels
+            last = np.zeros(size, dtype=np.int16)
+            last[: len(self._pending)] = self._pending
+            self._frames.append(last)
+            self._pending = np.empty(0, dtype=np.int16)
+
+        self._input_ended = True
+        self._input_ev.set()
+
+    def truncate(self, tail: float) -> float:
+        """Drop the buffered audio after the first tail seconds (e.g. the speech is
+        interrupted) and fade the tail out linearly. The input is ended, the frames
+        still pushed are ignored. Returns the duration of the audio dropped"""
+        dropped = self.buffered_duration
+        keep = min(
+            len(self._frames), round(tail * self._sample_rate / self._frame_samples)
+        )
+        frames = [self._frames.popleft() for _ in range(keep)]
+        self._frames.clear()
+        self._pending = np.empty(0, dtype=np.int16)
+
+        if frames:
+            samples = np.concatenate(frames).reshape(-1, self._num_channels)
+            ramp = np.linspace(1, 0, len(samples))[:, None]
+            faded = (samples * ramp).astype(np.int16).reshape(-1)
+            size = self._frame_samples * self._num_channels
+            self._frames.extend(faded[i : i + size] for i in range(0, len(faded), size))
+            dropped -= len(samples) / self._sample_rate
+
+        self._truncated = True
+        self.end_input()
+        return dropped
+
+    @property
+    def input_duration(self) -> float:
+        """Duration of the audio received from the TTS"""
+        return self._input_samples / self._sample_rate
+
+    @property
+    def buffered_duration(self) -> float:
+        """Duration of the audio received and not released yet"""
+        samples = len(self._frames) * self._frame_samples
+        return (samples + len(self._pending) // self._num_channels) / self._sample_rate
+
+    @property
+    def pushed_duration(self) -> float:
+        """Duration of the audio released, it is all played once queued_duration is 0"""
+        return self._pushed_samples / self._sample_rate
+
+    @property
+    def playout_position(self) -> float:
+        """Duration of the audio played so far, according to the audio clock"""
+        if self._clock_start is None:
+            return 0.0
+
+        return min(time.monotonic() - self._clock_start, self.pushed_duration)
+
+    @property
+    def queued_duration(self) -> float:
+        """Duration of the audio released but not played yet"""
+        return self.pushed_duration - self.playout_position
+
+    def __aiter__(self) -> PlayoutScheduler:
+        return self
+
+    async def __anext__(self) -> np.ndarray:
+        """Next frame to capture (interleaved int16 samples), waits until it should
+        be queued"""
+        while True:
+            if not self._frames and self._input_ended:
+                raise StopAsyncIteration
+
+            # nothing is queued, wait for the jitter buffer to be filled
+            prefill = self.queued_duration <= 0
+            if self._frames and (
+                not prefill
+                or self._input_ended
+                or self.buffered_duration >= self._target_buffer
+            ):
+                break
+
+            self._input_ev.clear()
+            await self._input_ev.wait()
+
+        frame_duration = self._frame_samples / self._sample_rate
+        delay = self.queued_duration + frame_duration - self._target_buffer
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        if self._clock_start is None or now - self._clock_start > self.pushed_duration:
+            # first frame or underrun, the playout (re)starts now
+            self._clock_start = now - self.pushed_duration
+
+        self._pushed_samples += self._frame_samples
+        return self._frames.popleft()
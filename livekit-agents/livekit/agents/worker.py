@@ -17,6 +17,7 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import os
+import time
 from typing import (
     Callable,
     Coroutine,
@@ -25,21 +26,58 @@ from urllib.parse import urlparse
 
 import aiohttp
 import psutil
-from attr import define
+from aiohttp import web
+from attr import Factory, asdict, define
 from livekit import api
 from livekit.protocol import agent, models
 
-from . import aio, consts, http_server, ipc
+from . import aio, consts, http_server, ipc, metrics
+from .exceptions import AvailabilityAnsweredError
 from .job_request import AcceptData, AvailRes, JobRequest
 from .log import logger
+from .utils import MovingAverage
 from .version import __version__
 
+
+@define(kw_only=True)
+class WorkerLoad:
+    """Signals sampled by the worker, used to compute its load"""
+
+    active_jobs: int
+    pending_jobs: int
+    """jobs accepted by the worker that are not running yet"""
+    max_jobs: int | None
+    jobs_cpu: float
+    """cpu usage of the job processes (and their children), 1.0 being all the cpus"""
+    jobs_memory: int
+    """rss of the job processes (and their children) in bytes"""
+    system_cpu: float
+    system_memory_used: int
+    system_memory_total: int
+    loop_lag: float
+    """average delay of the worker event loop in seconds"""
+
+
 JobRequestFnc = Callable[[JobRequest], Coroutine]
-LoadFnc = Callable[[], float]
+LoadFnc = Callable[[WorkerLoad], float]
 
 
-def cpu_load_fnc() -> float:
-    return psutil.cpu_percent() / 100
+def default_load_fnc(load: WorkerLoad) -> float:
+    """Load of the most constrained resource (cpu, memory or the event loop).
+    Jobs that are still being set up don't show up in the cpu and memory usage yet,
+    they are counted as using as much as an average running job"""
+    job_cpu, job_memory = 0.0, 0
+    if load.active_jobs > 0:
+        job_cpu = load.jobs_cpu / load.active_jobs
+        job_memory = load.jobs_memory // load.active_jobs
+
+    cpu = load.system_cpu + job_cpu * load.pending_jobs
+    memory = load.system_memory_used + job_memory * load.pending_jobs
+    return max(
+        cpu,
+        memory / load.system_memory_total,
+        load.loop_lag / consts.MAX_LOOP_LAG,
+    )
 
 
 @define(kw_only=True)
@@ -55,8 +93,10 @@ class WorkerPermissions:
 @define
 class WorkerOptions:
     request_fnc: JobRequestFnc
-    load_fnc: LoadFnc = cpu_load_fnc
+    load_fnc: LoadFnc = default_load_fnc
     load_threshold: float = 0.8
+    max_jobs: int | None = None
+    """maximum number of jobs running (or being set up) at the same time"""
     namespace: str = "default"
     permissions: WorkerPermissions = WorkerPermissions()
     worker_type: agent.JobType = agent.JobType.JT_ROOM
@@ -66,12 +106,77 @@ class WorkerOptions:
     api_secret: str | None = None
     host: str = "localhost"
     port: int = 8081
+    num_idle_processes: int = 3
+    """number of job processes to keep initialized and waiting for a job"""
+    max_jobs_per_process: int = 1
+    """number of jobs a process can run (one at a time) before being recycled"""
+    job_start_method: ipc.JobStartMethod | None = None
+    """how job processes are started, "zygote" forks them from a process where the
+    user module and the plugins (with their models) are already loaded"""
 
 
 @define(kw_only=True)
 class ActiveJob:
     job: agent.Job
     accept_data: AcceptData
+    created_at: float = Factory(time.time)
+
+
+class _LoadSampler:
+    def __init__(self) -> None:
+        # keep the same psutil.Process objects, cpu_percent is computed since last call
+        self._procs: dict[int, psutil.Process] = {}
+        self._jobs_cpu = 0.0
+        self._jobs_memory = 0
+        self._system_cpu = 0.0
+        self._system_memory = psutil.virtual_memory()
+
+    def sample(self, pids: list[int]) -> None:
+        procs: dict[int, psutil.Process] = {}
+        cpu, memory = 0.0, 0
+        for pid in pids:
+            try:
+                root = self._procs.get(pid) or psutil.Process(pid)
+                tree = [root, *root.children(recursive=True)]
+            except psutil.Error:
+                continue
+
+            for proc in tree:
+                proc = self._procs.get(proc.pid, proc)
+                try:
+                    cpu += proc.cpu_percent()
+                    memory += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+
+                procs[proc.pid] = proc
+
+        self._procs = procs
+        self._jobs_cpu = cpu / (100 * (psutil.cpu_count() or 1))
+        self._jobs_memory = memory
+        self._system_cpu = psutil.cpu_percent() / 100
+        self._system_memory = psutil.virtual_memory()
+
+    def load(
+        self,
+        *,
+        active_jobs: int,
+        pending_jobs: int,
+        max_jobs: int | None,
+        loop_lag: float,
+    ) -> WorkerLoad:
+        return WorkerLoad(
+            active_jobs=active_jobs,
+            pending_jobs=pending_jobs,
+            max_jobs=max_jobs,
+            jobs_cpu=self._jobs_cpu,
+            jobs_memory=self._jobs_memory,
+            system_cpu=self._system_cpu,
+            system_memory_used=self._system_memory.total
+            - self._system_memory.available,
+            system_memory_total=self._system_memory.total,
+            loop_lag=loop_lag,
+        )
 
 
 class Worker:
@@ -93,14 +198,35 @@ class Worker:
         self._tasks = set()
         self._draining = False
         self._pending_assignments: dict[str, asyncio.Future[agent.JobAssignment]] = {}
+        # jobs admitted (waiting for an answer or an assignment) and not running yet
+        self._pending_jobs = set[str]()
+        # tasks of the jobs, from the availability request to the end of the job
+        self._job_tasks = set[asyncio.Task]()
         self._processes = dict[str, tuple[ipc.JobProcess, ActiveJob]]()
+
+        self._load_sampler = _LoadSampler()
+        self._loop_lag = MovingAverage(10)
+        self._load_changed = asyncio.Event()
         self._close_future = asyncio.Future(loop=self._loop)
 
+        self._proc_pool = ipc.ProcPool(
+            num_idle_processes=opts.num_idle_processes,
+            max_jobs_per_process=opts.max_jobs_per_process,
+            start_method=opts.job_start_method,
+            loop=self._loop,
+        )
+
         self._chan = aio.Chan[agent.WorkerMessage](32, loop=self._loop)
         # We use the same event loop as the worker (so the health checks are more accurate)
         self._http_server = http_server.HttpServer(
             opts.host, opts.port, loop=self._loop
         )
+        self._http_server.app.add_routes(
+            [
+                web.get("/metrics", self._metrics_handler),
+                web.get("/debug/jobs", self._debug_jobs_handler),
+            ]
+        )
 
     async def run(self):
         logger.info("starting worker", extra={"version": __version__})
@@ -117,6 +243,7 @@ class Worker:
             )
 
         self._session = aiohttp.ClientSession()
+        self._proc_pool.start()
 
         async def _worker_ws():
             assert self._session is not None
@@ -175,6 +302,32 @@ class Worker:
     def active_jobs(self) -> list[ActiveJob]:
         return [active_job for (_, active_job) in self._processes.values()]
 
+    @property
+    def proc_pool_stats(self) -> ipc.ProcPoolStats:
+        return self._proc_pool.stats
+
+    @property
+    def load(self) -> WorkerLoad:
+        """Latest load sample, the job counts are always up to date"""
+        return self._load_sampler.load(
+            active_jobs=len(self._processes),
+            pending_jobs=len(self._pending_jobs),
+            max_jobs=self._opts.max_jobs,
+            loop_lag=self._loop_lag.get_avg(),
+        )
+
+    def _is_full(self, load: WorkerLoad, load_value: float) -> bool:
+        if load_value >= self._opts.load_threshold:
+            return True
+
+        return (
+            load.max_jobs is not None
+            and load.active_jobs + load.pending_jobs >= load.max_jobs
+        )
+
+    def _notify_load_changed(self) -> None:
+        self._load_changed.set()
+
     async def drain(self, timeout: int | None = None) -> None:
         if self._draining:
             return
@@ -192,10 +345,11 @@ class Worker:
         except aio.ChanClosed:
             return
 
-        # wait for all jobs to finish with a final timeout
+        # wait for all jobs to finish with a final timeout, including the ones
+        # admitted before draining and still being answered/assigned
         async def _join_jobs():
-            for proc, _ in self._processes.values():
-                await proc.join()
+            while self._job_tasks:
+                await asyncio.wait(list(self._job_tasks))
 
         if timeout:
             with contextlib.suppress(asyncio.TimeoutError):
@@ -210,11 +364,7 @@ class Worker:
         logger.info("shutting down worker", extra={"id": self.id})
 
         # shutdown processes before closing the connection to the lkserver
-        close_co = []
-        for proc, _ in self._processes.values():
-            close_co.append(proc.aclose())
-
-        await asyncio.gather(*close_co, return_exceptions=True)
+        await self._proc_pool.aclose()
 
         await self._http_server.aclose()
         assert self._session is not None
@@ -244,28 +394,42 @@ class Worker:
         req.register.version = __version__
         await self._chan.send(req)
 
+        async def loop_lag_task():
+            while True:
+                start = self._loop.time()
+                await asyncio.sleep(consts.LOOP_LAG_INTERVAL)
+                lag = self._loop.time() - start - consts.LOOP_LAG_INTERVAL
+                self._loop_lag.add_sample(max(lag, 0.0))
+
         async def load_monitor_task():
-            interval = aio.interval(consts.LOAD_INTERVAL)
+            # the resource usage is sampled every LOAD_INTERVAL, but the status is
+            # also updated as soon as a job is accepted or finishes
             registered = True
+            self._load_sampler.sample(self._job_pids())
             while True:
-                await interval.tick()
-                load = self._opts.load_fnc()
-                is_full = load >= self._opts.load_threshold
+                worker_load = self.load
+                load = self._opts.load_fnc(worker_load)
+                is_full = self._is_full(worker_load, load)
                 should_register = not is_full and not self._draining
 
                 update = agent.UpdateWorkerStatus(
                     load=load,
                     status=(
-                        agent.WorkerStatus.WS_FULL
-                        if is_full
-                        else agent.WorkerStatus.WS_AVAILABLE
+                        agent.WorkerStatus.WS_AVAILABLE
+                        if should_register
+                        else agent.WorkerStatus.WS_FULL
                     ),
                 )
 
                 if should_register != registered:
                     registered = should_register
 
-                    extra = {"load": load, "threshold": self._opts.load_threshold}
+                    extra = {
+                        "load": load,
+                        "threshold": self._opts.load_threshold,
+                        "active_jobs": worker_load.active_jobs,
+                        "pending_jobs": worker_load.pending_jobs,
+                    }
                     if is_full:
                         logger.info(
                             "worker is at full capacity, marking as unavailable",
@@ -283,6 +447,15 @@ class Worker:
                 except aio.ChanClosed:
                     return
 
+                try:
+                    await asyncio.wait_for(
+                        self._load_changed.wait(), consts.LOAD_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    self._load_sampler.sample(self._job_pids())
+
+                self._load_changed.clear()
+
         async def send_task():
             nonlocal closing_ws
             while True:
@@ -324,7 +497,162 @@ class Worker:
                 elif which == "assignment":
                     self._handle_assignment(msg.assignment)
 
-        await asyncio.gather(send_task(), recv_task(), load_monitor_task())
+        await asyncio.gather(
+            send_task(), recv_task(), load_monitor_task(), loop_lag_task()
+        )
+
+    def _job_pids(self) -> list[int]:
+        return [proc.pid for proc, _ in self._processes.values() if proc.pid]
+
+    async def _metrics_handler(self, _: web.Request) -> web.Response:
+        return web.Response(
+            text=self._render_metrics(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    def _render_metrics(self) -> str:
+        load = self.load
+        stats = self._proc_pool.stats
+        job_ids = {proc: job_id for job_id, (proc, _) in self._processes.items()}
+
+        def _labels(proc: ipc.JobProcess) -> dict[str, str]:
+            return {"pid": str(proc.pid), "job_id": job_ids.get(proc, "")}
+
+        procs = [p for p in self._proc_pool.processes if p.pid is not None]
+        reported = [(p, p.metrics) for p in procs if p.metrics is not None]
+        ipc_queues = []
+        for proc in procs:
+            ipc_queues.append(
+                (
+                    {**_labels(proc), "side": "worker", "direction": "read"},
+                    proc.ipc_read_queue,
+                )
+            )
+            ipc_queues.append(
+                (
+                    {**_labels(proc), "side": "worker", "direction": "write"},
+                    proc.ipc_write_queue,
+                )
+            )
+        for proc, m in reported:
+            ipc_queues.append(
+                (
+                    {**_labels(proc), "side": "job", "direction": "read"},
+                    m.ipc_read_queue,
+                )
+            )
+            ipc_queues.append(
+                (
+                    {**_labels(proc), "side": "job", "direction": "write"},
+                    m.ipc_write_queue,
+                )
+            )
+
+        render = metrics.render_samples
+        parts = [
+            render(
+                "livekit_agents_active_jobs",
+                "Number of running jobs",
+                [(None, load.active_jobs)],
+            ),
+            render(
+                "livekit_agents_pending_jobs",
+                "Number of jobs accepted by the worker that are not running yet",
+                [(None, load.pending_jobs)],
+            ),
+            render(
+                "livekit_agents_worker_load",
+                "Load reported to the server",
+                [(None, self._opts.load_fnc(load))],
+            ),
+            render(
+                "livekit_agents_worker_loop_lag_seconds",
+                "Average delay of the worker event loop",
+                [(None, load.loop_lag)],
+            ),
+            render(
+                "livekit_agents_job_processes",
+                "Number of job processes, idle ones are waiting for a job",
+                [
+                    ({"state": "idle"}, len(self._proc_pool.idle_processes)),
+                    ({"state": "all"}, len(procs)),
+                ],
+            ),
+            render(
+                "livekit_agents_processes_spawned_total",
+                "Number of job processes spawned",
+                [(None, stats.processes_spawned)],
+                type="counter",
+            ),
+            render(
+                "livekit_agents_processes_recycled_total",
+                "Number of job processes reused for another job",
+                [(None, stats.processes_recycled)],
+                type="counter",
+            ),
+            render(
+                "livekit_agents_pool_requests_total",
+                "Number of jobs launched, by whether a process was already initialized",
+                [
+                    ({"result": "hit"}, stats.pool_hits),
+                    ({"result": "miss"}, stats.pool_misses),
+                ],
+                type="counter",
+            ),
+            *[h.render() for h in metrics.HISTOGRAMS],
+            *[c.render() for c in metrics.COUNTERS],
+            render(
+                "livekit_agents_job_cpu_seconds_total",
+                "CPU time used by a job process and its children",
+                [(_labels(p), m.cpu_time) for p, m in reported],
+                type="counter",
+            ),
+            render(
+                "livekit_agents_job_rss_bytes",
+                "Resident memory of a job process and its children",
+                [(_labels(p), m.rss) for p, m in reported],
+            ),
+            render(
+                "livekit_agents_job_loop_lag_seconds",
+                "Max delay of the job process event loop over the last interval",
+                [(_labels(p), m.loop_lag) for p, m in reported],
+            ),
+            render(
+                "livekit_agents_job_tasks",
+                "Number of asyncio tasks inside a job process",
+                [(_labels(p), m.tasks) for p, m in reported],
+            ),
+            render(
+                "livekit_agents_ipc_queue_depth",
+                "Number of IPC messages waiting to be read or written",
+                ipc_queues,
+            ),
+        ]
+        return "".join(parts)
+
+    async def _debug_jobs_handler(self, _: web.Request) -> web.Response:
+        now = time.time()
+        jobs = []
+        for proc, active_job in list(self._processes.values()):
+            job = active_job.job
+            jobs.append(
+                {
+                    "id": job.id,
+                    "type": agent.JobType.Name(job.type),
+                    "room": job.room.name,
+                    "participant": job.participant.identity
+                    if job.HasField("participant")
+                    else None,
+                    "agent_identity": active_job.accept_data.identity,
+                    "agent_name": active_job.accept_data.name,
+                    "running_time": round(now - active_job.created_at, 3),
+                    "pid": proc.pid,
+                    "process_job_count": proc.job_count,
+                    "metrics": asdict(proc.metrics) if proc.metrics else None,
+                }
+            )
+
+        return web.json_response({"worker_id": self.id, "jobs": jobs})
 
     def _reload_jobs(self, jobs: list[ActiveJob]):
         for aj in jobs:
@@ -351,23 +679,34 @@ class Worker:
     def _start_process(
         self, job: agent.Job, url: str, token: str, accept_data: AcceptData
     ):
-        proc = ipc.JobProcess(job, url, token, accept_data)
-        self._processes[job.id] = (proc, ActiveJob(job=job, accept_data=accept_data))
+        active_job = ActiveJob(job=job, accept_data=accept_data)
+        assigned_at = time.monotonic()
 
-        async def _run_proc():
+        async def _run_job():
             try:
-                await proc.run()
+                proc = await self._proc_pool.launch_job(job, url, token, accept_data)
+                self._processes[job.id] = (proc, active_job)
+                self._pending_jobs.discard(job.id)
+                if await proc.wait_job_started():
+                    start_latency = time.monotonic() - assigned_at
+                    metrics.JOB_START_LATENCY.observe(start_latency)
+
+                await proc.join_job()
             except Exception:
-                logger.exception(
-                    f"error running job process {proc.job.id}",
-                    extra=proc.logging_extra(),
-                )
+                logger.exception(f"error running job {job.id}", extra={"job": job})
+            finally:
+                self._pending_jobs.discard(job.id)
+                self._processes.pop(job.id, None)
+                self._notify_load_changed()
 
-            self._processes.pop(proc.job.id)
+        task = self._loop.create_task(_run_job())
+        self._add_job_task(task)
 
-        task = self._loop.create_task(_run_proc())
+    def _add_job_task(self, task: asyncio.Task) -> None:
         self._tasks.add(task)
+        self._job_tasks.add(task)
         task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(self._job_tasks.discard)
 
     def _handle_register(self, reg: agent.RegisterWorkerResponse):
         self._id = reg.worker_id
@@ -377,10 +716,41 @@ class Worker:
         )
 
     def _handle_availability(self, msg: agent.AvailabilityRequest):
+        worker_load = self.load
+        load = self._opts.load_fnc(worker_load)
+        if self._draining or self._is_full(worker_load, load):
+            # the server may still send requests before receiving our status update
+            logger.info(
+                f"worker is full, rejecting job {msg.job.id}",
+                extra={"load": load, "active_jobs": worker_load.active_jobs},
+            )
+            resp = agent.AvailabilityResponse(job_id=msg.job.id, available=False)
+            task = self._loop.create_task(
+                _send_ignore_err(self._chan, agent.WorkerMessage(availability=resp))
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+
+        # reserve the slot now, the concurrent requests are checked against it
+        # while this one is answered. It is released if the job is rejected or not
+        # assigned, and once the job is running
+        self._pending_jobs.add(msg.job.id)
+        self._notify_load_changed()
+
         answer_tx, answer_rx = aio.channel(1)  # wait for the user res
         req = JobRequest(msg.job, answer_tx)
 
         async def _wait_response():
+            started = False
+            try:
+                started = await _answer()
+            finally:
+                if not started:
+                    self._pending_jobs.discard(req.id)
+                    self._notify_load_changed()
+
+        async def _answer() -> bool:
             async def _user_cb():
                 try:
                     await self._opts.request_fnc(req)
@@ -395,12 +765,8 @@ class Worker:
                         f"no answer for job {req.id}, automatically rejecting the job",
                         extra={"req": req},
                     )
-                    await _send_ignore_err(
-                        self._chan,
-                        agent.WorkerMessage(
-                            availability=agent.AvailabilityResponse(available=False)
-                        ),
-                    )
+                    with contextlib.suppress(AvailabilityAnsweredError):
+                        await req.reject()
 
             user_task = self._loop.create_task(_user_cb())
 
@@ -411,7 +777,7 @@ class Worker:
 
             if not av.avail:
                 await _send_ignore_err(self._chan, msg)
-                return
+                return False
 
             assert av.data is not None
             assert av.assignment_tx is not None
@@ -434,7 +800,8 @@ class Worker:
                     extra={"req": req},
                 )
                 await av.assignment_tx.send(e)
-                return
+                self._pending_assignments.pop(req.id, None)
+                return False
             finally:
                 await user_task
 
@@ -445,10 +812,10 @@ class Worker:
                 url = self._opts.ws_url
 
             self._start_process(asgn.job, url, asgn.token, av.data)
+            return True
 
         task = self._loop.create_task(_wait_response())
-        self._tasks.add(task)
-        task.add_done_callback(self._tasks.discard)
+        self._add_job_task(task)
 
     def _handle_assignment(self, assignment: agent.JobAssignment):
         job = assignment.job
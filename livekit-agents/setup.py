@@ -58,6 +58,7 @@ setuptools.setup(
         "watchfiles~=0.21",
         "colorlog~=6.0",
         "psutil~=5.9",
+        "numpy>=1.26",
     ],
     extras_require={
         "codecs": ["av>=11.0.0"],
@@ -4,9 +4,7 @@ from dataclasses import dataclass
 from typing import AsyncIterable, Optional
 import aiohttp
 from livekit import rtc
-from livekit.agents import tts, utils
-import io
-import wave
+from livekit.agents import http, tts, utils
 import base64
 import contextlib
 
@@ -27,18 +25,29 @@ class TTS(tts.TTS):
         voice: str = DEFAULT_VOICE,
         base_url: Optional[str] = None,
         sample_rate: int = 24000,
+        http_session: Optional[aiohttp.ClientSession] = None,
     ) -> None:
+        """
+        Args:
+            http_session: session used for the requests, the one shared by the
+                plugins of the process (livekit.agents.http) by default
+        """
         super().__init__(streaming_supported=True)
-        self._session = aiohttp.ClientSession()
+        self._session = http_session
         self._config = TTSOptions(
             voice=voice,
             base_url=base_url or API_BASE_URL,
             sample_rate=sample_rate,
         )
+        if http_session is None:
+            http.add_warmup_url(self._config.base_url)
     
     def set_voice(self, voice: str) -> None:
         self._config.voice = voice
 
+    def cache_namespace(self) -> str:
+        return f"coqui:{self._config!r}"
+
     @staticmethod
     async def load_voice(voice_id: str, session: aiohttp.ClientSession, base_url: str) -> None:
         data = {
@@ -69,24 +78,11 @@ class TTS(tts.TTS):
             if resp.status != 200:
                 logging.error(f"Failed to discard custom voice model: {resp.status}")
     
-    async def upload_audio(self, file_name: str, buffer: list[rtc.AudioFrame]) -> None:
+    async def upload_audio(self, file_name: str, buffer: utils.AudioInput) -> None:
         print("uploading audio")
-        # Merge the audio frames in the buffer
-        merged_frame = utils.merge_frames(buffer)
-
-        # Create a BytesIO object and write the audio data as a WAV file
-        io_buffer = io.BytesIO()
-        with wave.open(io_buffer, "wb") as wav:
-            wav.setnchannels(1)
-            wav.setsampwidth(2)  # 16-bit
-            wav.setframerate(16000)
-            wav.writeframes(merged_frame.data)
-
-        # Reset the BytesIO object to the beginning
-        io_buffer.seek(0)
-
-        # Read the audio data and encode it in base64
-        audio_data = base64.b64encode(io_buffer.read()).decode('utf-8')
+        # Write the audio frames as a WAV file and encode it in base64
+        wav = utils.AudioBuffer.from_frames(buffer).to_wav()
+        audio_data = base64.b64encode(wav).decode('utf-8')
 
         # Create the data dictionary for the POST request
         data = {
@@ -95,7 +91,7 @@ class TTS(tts.TTS):
         }
 
         # Send the POST request to upload the audio file
-        async with self._session.post(
+        async with self._ensure_session().post(
             f"{self._config.base_url}/api/upload-audio",
             data=data,
         ) as resp:
@@ -111,7 +107,7 @@ class TTS(tts.TTS):
         results = utils.AsyncIterableQueue()
 
         async def fetch_task():
-            async with self._session.get(
+            async with self._ensure_session().get(
                 f"{self._config.base_url}/api/tts-custom-model",
                 params={
                     "text": text,
@@ -119,18 +115,13 @@ class TTS(tts.TTS):
                     "model_id": self._config.voice,
                 },
             ) as resp:
-                data = await resp.read()
-                results.put_nowait(
-                    tts.SynthesizedAudio(
-                        text=text,
-                        data=rtc.AudioFrame(
-                            data=data,
-                            sample_rate=self._config.sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,  # 16-bit
-                        ),
-                    )
-                )
+                bstream = utils.AudioByteStream(self._config.sample_rate, 1)
+                async for chunk in resp.content.iter_chunked(4096):
+                    for frame in bstream.write(chunk):
+                        results.put_nowait(tts.SynthesizedAudio(text=text, data=frame))
+
+                for frame in bstream.flush():
+                    results.put_nowait(tts.SynthesizedAudio(text=text, data=frame))
                 results.close()
 
         asyncio.ensure_future(fetch_task())
@@ -140,7 +131,11 @@ class TTS(tts.TTS):
     def stream(
         self,
     ) -> tts.SynthesizeStream:
-        return SynthesizeStream(self._session, self._config)
+        return SynthesizeStream(self._ensure_session(), self._config)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # resolved on each request, the shared session is closed at the end of a job
+        return self._session or http.session()
 
 
 class SynthesizeStream(tts.SynthesizeStream):
@@ -177,6 +172,8 @@ class SynthesizeStream(tts.SynthesizeStream):
         try:
             text = await self._queue.get()
             self._queue.task_done()
+            if not text:
+                return
 
             async with self._session.get(
                 f"{self._config.base_url}/api/tts-custom-model",
@@ -190,19 +187,15 @@ class SynthesizeStream(tts.SynthesizeStream):
                     tts.SynthesisEvent(type=tts.SynthesisEventType.STARTED)
                 )
 
+                # the chunks can split a sample in half
+                bstream = utils.AudioByteStream(self._config.sample_rate, 1)
                 async for chunk in resp.content.iter_chunked(4096):
-                    audio_frame = rtc.AudioFrame(
-                        data=chunk,
-                        sample_rate=self._config.sample_rate,
-                        num_channels=1,
-                        samples_per_channel=len(chunk) // 2,  # 16-bit
-                    )
-                    self._event_queue.put_nowait(
-                        tts.SynthesisEvent(
-                            type=tts.SynthesisEventType.AUDIO,
-                            audio=tts.SynthesizedAudio(text=text, data=audio_frame),
-                        )
-                    )
+                    for frame in bstream.write(chunk):
+                        self._send_frame(text, frame)
+
+                for frame in bstream.flush():
+                    self._send_frame(text, frame)
+
                 print("putting finished")
                 self._event_queue.put_nowait(
                     tts.SynthesisEvent(type=tts.SynthesisEventType.FINISHED)
@@ -212,16 +205,30 @@ class SynthesizeStream(tts.SynthesizeStream):
             raise
 
         finally:
-            await self._session.close()
+            # the session is shared with the other streams, it is kept open
             self._closed = True
 
+    def _send_frame(self, text: str, frame: rtc.AudioFrame) -> None:
+        self._event_queue.put_nowait(
+            tts.SynthesisEvent(
+                type=tts.SynthesisEventType.AUDIO,
+                audio=tts.SynthesizedAudio(text=text, data=frame),
+            )
+        )
+
     async def flush(self) -> None:
         self._queue.put_nowait(self._text)
         self._text = ""
         await self._queue.join()
 
-    async def aclose(self) -> None:
-        self._main_task.cancel()
+    async def aclose(self, *, wait: bool = True) -> None:
+        if wait:
+            # synthesize the text not flushed yet, an empty text ends the stream
+            self._queue.put_nowait(self._text)
+            self._text = ""
+        else:
+            self._main_task.cancel()
+
         with contextlib.suppress(asyncio.CancelledError):
             await self._main_task
             print("TTS CLOSED")
@@ -16,10 +16,8 @@ from __future__ import annotations
 
 import asyncio
 import dataclasses
-import io
 import json
 import os
-import wave
 from contextlib import suppress
 from dataclasses import dataclass
 from typing import List
@@ -27,8 +25,8 @@ from urllib.parse import urlencode
 
 import aiohttp
 from livekit import rtc
-from livekit.agents import stt
-from livekit.agents.utils import AudioBuffer, merge_frames
+from livekit.agents import http, stt, utils
+from livekit.agents.utils import AudioBuffer, AudioInput
 
 from .log import logger
 from .models import DeepgramLanguages, DeepgramModels
@@ -57,7 +55,13 @@ class STT(stt.STT):
         model: DeepgramModels = "nova-2-general",
         api_key: str | None = None,
         min_silence_duration: int = 0,
+        http_session: aiohttp.ClientSession | None = None,
     ) -> None:
+        """
+        Args:
+            http_session: session used for the requests, the one shared by the
+                plugins of the process (livekit.agents.http) by default
+        """
         super().__init__(streaming_supported=True)
         api_key = api_key or os.environ.get("DEEPGRAM_API_KEY")
         if api_key is None:
@@ -73,11 +77,18 @@ class STT(stt.STT):
             smart_format=smart_format,
             endpointing=min_silence_duration,
         )
+        self._session = http_session
+        if http_session is None:
+            http.add_warmup_url("https://api.deepgram.com")
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # resolved on each request, the shared session is closed at the end of a job
+        return self._session or http.session()
 
     async def recognize(
         self,
         *,
-        buffer: AudioBuffer,
+        buffer: AudioInput,
         language: DeepgramLanguages | str | None = None,
     ) -> stt.SpeechEvent:
         config = self._sanitize_options(language=language)
@@ -97,15 +108,7 @@ class STT(stt.STT):
             f"https://api.deepgram.com/v1/listen?{urlencode(recognize_config).lower()}"
         )
 
-        buffer = merge_frames(buffer)
-        io_buffer = io.BytesIO()
-        with wave.open(io_buffer, "wb") as wav:
-            wav.setnchannels(buffer.num_channels)
-            wav.setsampwidth(2)  # 16-bit
-            wav.setframerate(buffer.sample_rate)
-            wav.writeframes(buffer.data)
-
-        data = io_buffer.getvalue()
+        data = AudioBuffer.from_frames(buffer).to_wav()
 
         headers = {
             "Authorization": f"Token {self._api_key}",
@@ -113,11 +116,10 @@ class STT(stt.STT):
             "Content-Type": "audio/wav",
         }
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.post(url, data=data) as res:
-                return prerecorded_transcription_to_speech_event(
-                    config.language, await res.json()
-                )
+        async with self._ensure_session().post(url, data=data, headers=headers) as res:
+            return prerecorded_transcription_to_speech_event(
+                config.language, await res.json()
+            )
 
     def stream(
         self,
@@ -125,7 +127,9 @@ class STT(stt.STT):
         language: DeepgramLanguages | str | None = None,
     ) -> "SpeechStream":
         config = self._sanitize_options(language=language)
-        return SpeechStream(config, api_key=self._api_key)
+        return SpeechStream(
+            config, api_key=self._api_key, session=self._ensure_session()
+        )
 
     def _sanitize_options(
         self,
@@ -149,6 +153,7 @@ class SpeechStream(stt.SpeechStream):
         self,
         opts: STTOptions,
         api_key: str,
+        session: aiohttp.ClientSession,
         sample_rate: int = 16000,
         num_channels: int = 1,
         max_retry: int = 32,
@@ -164,7 +169,8 @@ class SpeechStream(stt.SpeechStream):
         self._api_key = api_key
         self._speaking = False
 
-        self._session = aiohttp.ClientSession()
+        self._session = session
+        self._resampler: utils.Resampler | None = None
         self._queue = asyncio.Queue[rtc.AudioFrame | str]()
         self._event_queue = asyncio.Queue[stt.SpeechEvent | None]()
         self._closed = False
@@ -173,6 +179,25 @@ class SpeechStream(stt.SpeechStream):
         # keep a list of final transcripts to combine them inside the END_OF_SPEECH event
         self._final_events: List[stt.SpeechEvent] = []
 
+    @property
+    def input_format(self) -> tuple[int, int]:
+        return self._sample_rate, self._num_channels
+
+    def _resample(self, frame: rtc.AudioFrame) -> rtc.AudioFrame | None:
+        # continuous resampling, the filter state is kept between the frames
+        if self._resampler is None or (
+            self._resampler.input_rate,
+            self._resampler.input_channels,
+        ) != (frame.sample_rate, frame.num_channels):
+            self._resampler = utils.Resampler(
+                frame.sample_rate,
+                self._sample_rate,
+                input_channels=frame.num_channels,
+                output_channels=self._num_channels,
+            )
+
+        return self._resampler.push_frame(frame)
+
     def push_frame(self, frame: rtc.AudioFrame) -> None:
         if self._closed:
             raise ValueError("cannot push frame to closed stream")
@@ -189,8 +214,6 @@ class SpeechStream(stt.SpeechStream):
         with suppress(asyncio.CancelledError):
             await self._main_task
 
-        await self._session.close()
-
     async def _run(self, max_retry: int) -> None:
         """
         Run a single websocket connection to Deepgram and make sure to reconnect
@@ -271,11 +294,12 @@ class SpeechStream(stt.SpeechStream):
                 self._queue.task_done()
 
                 if isinstance(data, rtc.AudioFrame):
-                    # TODO(theomonnom): The remix_and_resample method is low quality
-                    # and should be replaced with a continuous resampling
-                    frame = data.remix_and_resample(
-                        self._sample_rate, self._num_channels
-                    )
+                    frame = data
+                    if (frame.sample_rate, frame.num_channels) != self.input_format:
+                        frame = self._resample(frame)
+                        if frame is None:
+                            continue
+
                     await ws.send_bytes(frame.data.tobytes())
                 elif data == SpeechStream._CLOSE_MSG:
                     closing_ws = True
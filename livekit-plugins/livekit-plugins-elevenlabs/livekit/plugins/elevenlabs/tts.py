@@ -23,7 +23,7 @@ from typing import AsyncIterable, List
 
 import aiohttp
 from livekit import rtc
-from livekit.agents import aio, tts
+from livekit.agents import aio, http, tts, utils
 
 from .log import logger
 from .models import TTSModels
@@ -78,7 +78,13 @@ class TTS(tts.TTS):
         base_url: str | None = None,
         sample_rate: int = 24000,
         latency: int = 3,
+        http_session: aiohttp.ClientSession | None = None,
     ) -> None:
+        """
+        Args:
+            http_session: session used for the requests, the one shared by the
+                plugins of the process (livekit.agents.http) by default
+        """
         super().__init__(
             streaming_supported=True, sample_rate=sample_rate, num_channels=1
         )
@@ -86,7 +92,7 @@ class TTS(tts.TTS):
         if not api_key:
             raise ValueError("ELEVEN_API_KEY must be set")
 
-        self._session = aiohttp.ClientSession()
+        self._session = http_session
         self._opts = TTSOptions(
             voice=voice,
             model_id=model_id,
@@ -95,15 +101,21 @@ class TTS(tts.TTS):
             sample_rate=sample_rate,
             latency=latency,
         )
+        if http_session is None:
+            http.add_warmup_url(self._opts.base_url)
 
     async def list_voices(self) -> List[Voice]:
-        async with self._session.get(
+        async with self._ensure_session().get(
             f"{self._opts.base_url}/voices",
             headers={AUTHORIZATION_HEADER: self._opts.api_key},
         ) as resp:
             data = await resp.json()
             return dict_to_voices_list(data)
 
+    def cache_namespace(self) -> str:
+        opts = dataclasses.replace(self._opts, api_key="")
+        return f"elevenlabs:{opts!r}"
+
     def synthesize(
         self,
         text: str,
@@ -113,7 +125,7 @@ class TTS(tts.TTS):
 
         async def generator():
             try:
-                async with self._session.post(
+                async with self._ensure_session().post(
                     url,
                     headers={AUTHORIZATION_HEADER: self._opts.api_key},
                     json=dict(
@@ -124,16 +136,13 @@ class TTS(tts.TTS):
                         else None,
                     ),
                 ) as resp:
-                    data = await resp.read()
-                    yield tts.SynthesizedAudio(
-                        text=text,
-                        data=rtc.AudioFrame(
-                            data=data,
-                            sample_rate=self._opts.sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,  # 16-bit
-                        ),
-                    )
+                    bstream = utils.AudioByteStream(self._opts.sample_rate, 1)
+                    async for chunk in resp.content.iter_any():
+                        for frame in bstream.write(chunk):
+                            yield tts.SynthesizedAudio(text=text, data=frame)
+
+                    for frame in bstream.flush():
+                        yield tts.SynthesizedAudio(text=text, data=frame)
             except Exception as e:
                 logger.error(f"failed to synthesize: {e}")
 
@@ -142,7 +151,11 @@ class TTS(tts.TTS):
     def stream(
         self,
     ) -> "SynthesizeStream":
-        return SynthesizeStream(self._session, self._opts)
+        return SynthesizeStream(self._ensure_session(), self._opts)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # resolved on each request, the shared session is closed at the end of a job
+        return self._session or http.session()
 
 
 class SynthesizeStream(tts.SynthesizeStream):
@@ -292,6 +305,8 @@ class SynthesizeStream(tts.SynthesizeStream):
         self, ws: aiohttp.ClientWebSocketResponse, data_rx: aio.ChanReceiver[str]
     ) -> None:
         closing_ws = False
+        # the base64 chunks can have any size
+        bstream = utils.AudioByteStream(self._opts.sample_rate, 1)
 
         self._event_queue.put_nowait(
             tts.SynthesisEvent(type=tts.SynthesisEventType.STARTED)
@@ -346,18 +361,8 @@ class SynthesizeStream(tts.SynthesizeStream):
                 data: dict = json.loads(msg.data)
                 if data.get("audio"):
                     b64data = base64.b64decode(data["audio"])
-                    frame = rtc.AudioFrame(
-                        data=b64data,
-                        sample_rate=self._opts.sample_rate,
-                        num_channels=1,
-                        samples_per_channel=len(data) // 2,
-                    )
-                    self._event_queue.put_nowait(
-                        tts.SynthesisEvent(
-                            type=tts.SynthesisEventType.AUDIO,
-                            audio=tts.SynthesizedAudio(text="", data=frame),
-                        )
-                    )
+                    for frame in bstream.write(b64data):
+                        self._send_frame(frame)
                 elif data.get("isFinal"):
                     return
 
@@ -366,10 +371,21 @@ class SynthesizeStream(tts.SynthesizeStream):
         except Exception:
             logger.exception("11labs connection failed")
         finally:
+            for frame in bstream.flush():
+                self._send_frame(frame)
+
             self._event_queue.put_nowait(
                 tts.SynthesisEvent(type=tts.SynthesisEventType.FINISHED)
             )
 
+    def _send_frame(self, frame: rtc.AudioFrame) -> None:
+        self._event_queue.put_nowait(
+            tts.SynthesisEvent(
+                type=tts.SynthesisEventType.AUDIO,
+                audio=tts.SynthesizedAudio(text="", data=frame),
+            )
+        )
+
     async def __anext__(self) -> tts.SynthesisEvent:
         evt = await self._event_queue.get()
         if evt is None:
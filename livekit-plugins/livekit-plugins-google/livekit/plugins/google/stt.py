@@ -22,7 +22,7 @@ from typing import Any, AsyncIterable, Dict, List
 
 from livekit import agents, rtc
 from livekit.agents import stt
-from livekit.agents.utils import AudioBuffer
+from livekit.agents.utils import AudioInput
 
 from google.auth import credentials  # type: ignore
 from google.cloud.speech_v2 import SpeechAsyncClient
@@ -115,7 +115,7 @@ class STT(stt.STT):
     async def recognize(
         self,
         *,
-        buffer: AudioBuffer,
+        buffer: AudioInput,
         language: SpeechLanguages | str | None = None,
     ) -> stt.SpeechEvent:
         config = self._sanitize_options(language=language)
@@ -178,6 +178,7 @@ class SpeechStream(stt.SpeechStream):
         self._config = config
         self._sample_rate = sample_rate
         self._num_channels = num_channels
+        self._resampler: agents.utils.Resampler | None = None
 
         self._queue = asyncio.Queue[rtc.AudioFrame | None]()
         self._event_queue = asyncio.Queue[stt.SpeechEvent | None]()
@@ -212,6 +213,25 @@ class SpeechStream(stt.SpeechStream):
 
         self._main_task.add_done_callback(log_exception)
 
+    @property
+    def input_format(self) -> tuple[int, int]:
+        return self._sample_rate, self._num_channels
+
+    def _resample(self, frame: rtc.AudioFrame) -> rtc.AudioFrame | None:
+        # continuous resampling, the filter state is kept between the frames
+        if self._resampler is None or (
+            self._resampler.input_rate,
+            self._resampler.input_channels,
+        ) != (frame.sample_rate, frame.num_channels):
+            self._resampler = agents.utils.Resampler(
+                frame.sample_rate,
+                self._sample_rate,
+                input_channels=frame.num_channels,
+                output_channels=self._num_channels,
+            )
+
+        return self._resampler.push_frame(frame)
+
     def push_frame(self, frame: rtc.AudioFrame) -> None:
         if self._closed:
             raise ValueError("cannot push frame to closed stream")
@@ -249,9 +269,14 @@ class SpeechStream(stt.SpeechStream):
                                     break  # None is sent inside aclose
 
                                 self._queue.task_done()
-                                frame = frame.remix_and_resample(
-                                    self._sample_rate, self._num_channels
-                                )
+                                if (
+                                    frame.sample_rate,
+                                    frame.num_channels,
+                                ) != self.input_format:
+                                    frame = self._resample(frame)
+                                    if frame is None:
+                                        continue
+
                                 yield cloud_speech.StreamingRecognizeRequest(
                                     audio=frame.data.tobytes(),
                                 )
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from .llm import LLM
-from .models import TTSModels, TTSVoices, WhisperModels
+from .models import TTSEncoding, TTSModels, TTSVoices, WhisperModels
 from .stt import STT
 from .tts import TTS
 from .version import __version__
@@ -25,6 +25,7 @@ __all__ = [
     "WhisperModels",
     "TTSModels",
     "TTSVoices",
+    "TTSEncoding",
     "__version__",
 ]
 
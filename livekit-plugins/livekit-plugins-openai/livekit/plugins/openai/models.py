@@ -3,6 +3,8 @@ from typing import Literal
 WhisperModels = Literal["whisper-1"]
 TTSModels = Literal["tts-1", "tts-1-hd"]
 TTSVoices = Literal["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+# response formats, pcm (24kHz 16-bit) and opus have the lowest time to first byte
+TTSEncoding = Literal["pcm", "opus", "mp3", "wav"]
 DalleModels = Literal["dall-e-2", "dall-e-3"]
 ChatModels = Literal[
     "gpt-4-turbo",
@@ -15,14 +15,11 @@
 from __future__ import annotations
 
 import dataclasses
-import io
 import os
-import wave
 from dataclasses import dataclass
 
-from livekit import agents
 from livekit.agents import stt
-from livekit.agents.utils import AudioBuffer
+from livekit.agents.utils import AudioBuffer, AudioInput
 
 import openai
 
@@ -73,21 +70,15 @@ class STT(stt.STT):
     async def recognize(
         self,
         *,
-        buffer: AudioBuffer,
+        buffer: AudioInput,
         language: str | None = None,
     ) -> stt.SpeechEvent:
         config = self._sanitize_options(language=language)
 
-        buffer = agents.utils.merge_frames(buffer)
-        io_buffer = io.BytesIO()
-        with wave.open(io_buffer, "wb") as wav:
-            wav.setnchannels(buffer.num_channels)
-            wav.setsampwidth(2)  # 16-bit
-            wav.setframerate(buffer.sample_rate)
-            wav.writeframes(buffer.data)
-
+        # the multipart encoder of the client only takes bytes or files
+        wav = bytes(AudioBuffer.from_frames(buffer).to_wav())
         resp = await self._client.audio.transcriptions.create(
-            file=("a.wav", io_buffer),
+            file=("a.wav", wav),
             model=config.model,
             language=config.language,
             response_format="json",
@@ -12,13 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import os
 from typing import AsyncIterable, Optional
 
 import aiohttp
-from livekit.agents import codecs, tts
+from livekit.agents import codecs, http, tts, utils
 
-from .models import TTSModels, TTSVoices
+from .log import logger
+from .models import TTSEncoding, TTSModels, TTSVoices
 
 OPENAI_TTS_SAMPLE_RATE = 24000
 OPENAI_TTS_CHANNELS = 1
@@ -27,8 +29,18 @@ OPENAI_ENPOINT = "https://api.openai.com/v1/audio/speech"
 
 class TTS(tts.TTS):
     def __init__(
-        self, model: TTSModels, voice: TTSVoices, api_key: Optional[str] = None
+        self,
+        model: TTSModels,
+        voice: TTSVoices,
+        api_key: Optional[str] = None,
+        encoding: TTSEncoding = "pcm",
+        http_session: Optional[aiohttp.ClientSession] = None,
     ) -> None:
+        """
+        Args:
+            http_session: session used for the requests, the one shared by the
+                plugins of the process (livekit.agents.http) by default
+        """
         super().__init__(
             streaming_supported=False,
             sample_rate=OPENAI_TTS_SAMPLE_RATE,
@@ -38,38 +50,74 @@ class TTS(tts.TTS):
         if not api_key:
             raise ValueError("OPENAI_API_KEY must be set")
 
-        # TODO: we want to reuse aiohttp sessions
-        # for improved latency but doing so doesn't
-        # give us a clean way to close the session.
-        # Perhaps we introduce a close method to TTS?
-        # We also probalby want to send a warmup HEAD
-        # request after we create this
-        self._session = aiohttp.ClientSession(
-            headers={"Authorization": f"Bearer {api_key}"}
-        )
+        self._session = http_session
+        self._headers = {"Authorization": f"Bearer {api_key}"}
 
         self._model = model
         self._voice = voice
+        self._encoding = encoding
+        if http_session is None:
+            http.add_warmup_url(OPENAI_ENPOINT)
+
+    def cache_namespace(self) -> str:
+        return f"openai:{self._model}:{self._voice}:{self._encoding}"
 
     def synthesize(
         self,
         text: str,
     ) -> AsyncIterable[tts.SynthesizedAudio]:
-        decoder = codecs.Mp3StreamDecoder()
-
         async def generator():
-            async with self._session.post(
-                OPENAI_ENPOINT,
-                json={
-                    "input": text,
-                    "model": self._model,
-                    "voice": self._voice,
-                    "response_format": "mp3",
-                },
-            ) as resp:
-                async for data in resp.content.iter_chunked(4096):
-                    frames = decoder.decode_chunk(data)
-                    for frame in frames:
-                        yield tts.SynthesizedAudio(text=text, data=frame)
+            # decoded in a worker thread, the frames have the size of the codec frames
+            decoder = codecs.StreamDecoder(
+                self._encoding,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                pcm_sample_rate=OPENAI_TTS_SAMPLE_RATE,
+                pcm_num_channels=OPENAI_TTS_CHANNELS,
+            )
+            bstream = utils.AudioByteStream(self.sample_rate, self.num_channels)
+
+            async def read_task(resp: aiohttp.ClientResponse) -> None:
+                try:
+                    async for data in resp.content.iter_any():
+                        decoder.push_chunk(data)
+                finally:
+                    decoder.end_input()
+
+            try:
+                # resolved on each request, the shared session is closed at the end
+                # of a job
+                session = self._session or http.session()
+                async with session.post(
+                    OPENAI_ENPOINT,
+                    headers=self._headers,
+                    json={
+                        "input": text,
+                        "model": self._model,
+                        "voice": self._voice,
+                        "response_format": self._encoding,
+                    },
+                ) as resp:
+                    if resp.status != 200:
+                        # the body is a JSON error, it must not be played as audio
+                        logger.error(
+                            f"failed to synthesize: {resp.status} {await resp.text()}"
+                        )
+                        return
+
+                    read = asyncio.create_task(read_task(resp))
+                    try:
+                        async for decoded in decoder:
+                            for frame in bstream.write(decoded):
+                                yield tts.SynthesizedAudio(text=text, data=frame)
+
+                        for frame in bstream.flush():
+                            yield tts.SynthesizedAudio(text=text, data=frame)
+
+                        await read
+                    finally:
+                        read.cancel()
+            finally:
+                await decoder.aclose()
 
         return generator()
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .vad import VAD, VADStream
+from .vad import VAD, VADStream, _load_hub_model
 from .version import __version__
 
 __all__ = ["VAD", "VADStream", "__version__"]
@@ -32,5 +32,8 @@ class SileroPlugin(Plugin):
             use_onnx=True,
         )
 
+    def preload(self):
+        _load_hub_model(use_onnx=True)
+
 
 Plugin.register_plugin(SileroPlugin())
@@ -18,7 +18,7 @@ import asyncio
 import contextlib
 import time
 from collections import deque
-from typing import List
+from typing import Any, List
 
 import numpy as np
 import torch
@@ -26,19 +26,173 @@ from livekit import agents, rtc
 
 from .log import logger
 
+# models loaded from the hub are cached per process, this allows the zygote to load
+# them once and share them with every job process (see SileroPlugin.preload). They
+# are cached with their batcher, the VADs using the same model share it
+_hub_models: dict[bool, _InferenceBatcher] = {}
+
+
+def _load_hub_model(*, use_onnx: bool) -> _InferenceBatcher:
+    batcher = _hub_models.get(use_onnx)
+    if batcher is None:
+        model, _ = torch.hub.load(
+            repo_or_dir="snakers4/silero-vad",
+            model="silero_vad",
+            onnx=use_onnx,
+        )
+        batcher = _InferenceBatcher(model)
+        _hub_models[use_onnx] = batcher
+
+    return batcher
+
+
+def _state_dims(model) -> dict[str, int] | None:
+    """Attributes holding the recurrent state of the model, with their batch
+    dimension. None if the state isn't exposed"""
+    if hasattr(model, "_state") and hasattr(model, "_context"):  # silero v5+
+        return {"_state": 1, "_context": 0}
+
+    # silero v4 ONNX wrapper (_c is the C++ module of a torch ScriptModule)
+    if not isinstance(model, torch.jit.ScriptModule) and hasattr(model, "_h"):
+        return {"_h": 1, "_c": 1}
+
+    return None
+
+
+def _concat(values: list[Any], dim: int) -> Any:
+    if isinstance(values[0], np.ndarray):
+        return np.concatenate(values, axis=dim)
+
+    return torch.cat(values, dim=dim)
+
+
+def _row(value: Any, dim: int, i: int) -> Any:
+    row = value[(slice(None),) * dim + (slice(i, i + 1),)]
+    return row.copy() if isinstance(row, np.ndarray) else row.clone()
+
+
+def _zeros_like(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return np.zeros_like(value)
+
+    return torch.zeros_like(value)
+
+
+class _ModelState:
+    """Recurrent state of the model for one stream, None before its first
+    inference"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, Any] | None = None
+
+
+class _InferenceBatcher:
+    """Runs the inferences of all the streams using a model (e.g. one per
+    participant, from any VAD) in a single thread: the windows pushed while a batch
+    is running are run together in the next one, in a single forward pass (one row
+    per stream), so N streams don't cost N thread hops nor N forward passes per
+    40ms. There must be a single batcher per model, the forward passes of a model
+    can't overlap (they set its state).
+
+    Silero is recurrent, each stream keeps its own state: the states of the rows
+    are stacked before the forward pass and split after it"""
+
+    def __init__(self, model) -> None:
+        self._model = model
+        self._state_dims = _state_dims(model)
+        if self._state_dims is None:
+            logger.warning(
+                "the state of the silero model isn't exposed, its streams share it"
+            )
+
+        self._pending: list[
+            tuple[torch.Tensor, int, _ModelState, asyncio.Future[float]]
+        ] = []
+        self._task: asyncio.Task | None = None
+
+    async def infer(
+        self, tensor: torch.Tensor, sample_rate: int, state: _ModelState
+    ) -> float:
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((tensor, sample_rate, state, fut))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+        return await fut
+
+    def _infer_batch(
+        self, batch: list[tuple[torch.Tensor, int, _ModelState, Any]]
+    ) -> list[float]:
+        if self._state_dims is None:
+            return [self._model(tensor, sr).item() for tensor, sr, _, _ in batch]
+
+        # a stream has at most one window per batch (it waits for the result), the
+        # rows are grouped by sample rate (the windows have the same length)
+        probs: list[float] = [0.0] * len(batch)
+        for sr in {sr for _, sr, _, _ in batch}:
+            rows = [i for i, (_, row_sr, _, _) in enumerate(batch) if row_sr == sr]
+            states = [batch[i][2] for i in rows]
+            out = self._forward(torch.stack([batch[i][0] for i in rows]), sr, states)
+            for i, prob in zip(rows, out.reshape(-1).tolist()):
+                probs[i] = prob
+
+        return probs
+
+    def _forward(
+        self, x: torch.Tensor, sr: int, states: list[_ModelState]
+    ) -> torch.Tensor:
+        assert self._state_dims is not None
+        known = next((s.values for s in states if s.values is not None), None)
+        if known is None:
+            self._model.reset_states()  # sized from the input on the next call
+        else:
+            for name, dim in self._state_dims.items():
+                values = [
+                    s.values[name] if s.values is not None else _zeros_like(known[name])
+                    for s in states
+                ]
+                setattr(self._model, name, _concat(values, dim))
+
+            self._model._last_sr = sr
+            self._model._last_batch_size = len(states)
+
+        out = self._model(x, sr)
+        for i, state in enumerate(states):
+            state.values = {
+                name: _row(getattr(self._model, name), dim, i)
+                for name, dim in self._state_dims.items()
+            }
+
+        return out
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    probs = await asyncio.to_thread(self._infer_batch, batch)
+                except Exception as e:
+                    for _, _, _, fut in batch:
+                        if not fut.done():
+                            fut.set_exception(e)
+                    continue
+
+                for (_, _, _, fut), prob in zip(batch, probs):
+                    if not fut.done():  # the stream may have been closed
+                        fut.set_result(prob)
+        finally:
+            self._task = None
+
 
 class VAD(agents.vad.VAD):
     def __init__(self, *, model_path: str | None = None, use_onnx: bool = True) -> None:
         if model_path:
             model = torch.jit.load(model_path)
             model.eval()
+            self._batcher = _InferenceBatcher(model)
         else:
-            model, _ = torch.hub.load(
-                repo_or_dir="snakers4/silero-vad",
-                model="silero_vad",
-                onnx=use_onnx,
-            )
-        self._model = model
+            self._batcher = _load_hub_model(use_onnx=use_onnx)
+        self._model = self._batcher._model
 
     def stream(
         self,
@@ -51,7 +205,7 @@ class VAD(agents.vad.VAD):
         threshold: float = 0.2,
     ) -> "VADStream":
         return VADStream(
-            self._model,
+            self._batcher,
             min_speaking_duration=min_speaking_duration,
             min_silence_duration=min_silence_duration,
             padding_duration=padding_duration,
@@ -65,7 +219,7 @@ class VAD(agents.vad.VAD):
 class VADStream(agents.vad.VADStream):
     def __init__(
         self,
-        model,
+        batcher: _InferenceBatcher,
         *,
         min_speaking_duration: float,
         min_silence_duration: float,
@@ -86,7 +240,8 @@ class VADStream(agents.vad.VADStream):
 
         self._queue = asyncio.Queue[rtc.AudioFrame | None]()
         self._event_queue = asyncio.Queue[agents.vad.VADEvent | None]()
-        self._model = model
+        self._batcher = batcher
+        self._model_state = _ModelState()
 
         self._closed = False
         self._speaking = False
@@ -102,8 +257,16 @@ class VADStream(agents.vad.VADStream):
         self._queued_frames: deque[rtc.AudioFrame] = deque()
         self._original_frames: deque[rtc.AudioFrame] = deque()
         self._buffered_frames: List[rtc.AudioFrame] = []
+        self._resampler: agents.utils.Resampler | None = None
+        # the inference and the padding assume 10ms frames
+        self._original_bstream: agents.utils.AudioByteStream | None = None
+        self._bstream = agents.utils.AudioByteStream(self._sample_rate, 1)
         self._main_task = asyncio.create_task(self._run())
 
+    @property
+    def input_format(self) -> tuple[int, int]:
+        return self._sample_rate, 1
+
     def push_frame(self, frame: rtc.AudioFrame) -> None:
         if self._closed:
             raise ValueError("cannot push frame to closed stream")
@@ -129,22 +292,35 @@ class VADStream(agents.vad.VADStream):
                 self._queue.task_done()
 
                 # resample to silero's sample rate
-                resampled_frame = frame.remix_and_resample(
-                    self._sample_rate, 1
-                )  # TODO: This is technically wrong, fix when we have a better resampler
-                self._original_frames.append(frame)
-                self._queued_frames.append(resampled_frame)
-
-                # run inference by chunks of 40ms until we run out of data
-                while True:
-                    available_length = sum(
-                        f.samples_per_channel for f in self._queued_frames
+                resampled_frame: rtc.AudioFrame | None = frame
+                if frame.sample_rate != self._sample_rate or frame.num_channels != 1:
+                    if self._resampler is None or (
+                        self._resampler.input_rate,
+                        self._resampler.input_channels,
+                    ) != (frame.sample_rate, frame.num_channels):
+                        self._resampler = agents.utils.Resampler(
+                            frame.sample_rate,
+                            self._sample_rate,
+                            input_channels=frame.num_channels,
+                            output_channels=1,
+                        )
+
+                    resampled_frame = self._resampler.push_frame(frame)
+
+                if self._original_bstream is None or (
+                    self._original_bstream.sample_rate,
+                    self._original_bstream.num_channels,
+                ) != (frame.sample_rate, frame.num_channels):
+                    self._original_bstream = agents.utils.AudioByteStream(
+                        frame.sample_rate, frame.num_channels
                     )
 
-                    samples_40ms = self._sample_rate // 1000 * 40
-                    if available_length < samples_40ms:
-                        break
+                self._original_frames.extend(self._original_bstream.write(frame))
+                if resampled_frame is not None:
+                    self._queued_frames.extend(self._bstream.write(resampled_frame))
 
+                # run inference by chunks of 40ms until we run out of data
+                while min(len(self._queued_frames), len(self._original_frames)) >= 4:
                     await asyncio.shield(self._run_inference())
 
         except Exception:
@@ -153,10 +329,7 @@ class VADStream(agents.vad.VADStream):
             self._event_queue.put_nowait(None)
 
     async def _run_inference(self) -> None:
-        # merge the first 4 frames (we know each is 10ms)
-        if len(self._queued_frames) < 4:
-            return
-
+        # merge the first 4 frames (each is 10ms)
         original_frames = [self._original_frames.popleft() for _ in range(4)]
         merged_frame = agents.utils.merge_frames(
             [self._queued_frames.popleft() for _ in range(4)]
@@ -168,8 +341,8 @@ class VADStream(agents.vad.VADStream):
 
         # run inference
         start_time = time.time()
-        raw_prob = await asyncio.to_thread(
-            lambda: self._model(tensor, self._sample_rate).item()
+        raw_prob = await self._batcher.infer(
+            tensor, self._sample_rate, self._model_state
         )
         probability = self._filter.apply(1.0, raw_prob)
         inference_duration = time.time() - start_time
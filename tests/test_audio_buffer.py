@@ -0,0 +1,33 @@
+import io
+import wave
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils
+
+
+def _frame(samples: int, value: int) -> rtc.AudioFrame:
+    data = np.full(samples * 2, value, dtype=np.int16)
+    return rtc.AudioFrame(data.tobytes(), 16000, 2, samples)
+
+
+def test_audio_buffer():
+    buffer = utils.AudioBuffer(16000, 2, capacity=0.01)
+    for i in range(100):
+        buffer.push_frame(_frame(160, i))  # grows past the preallocated 10ms
+
+    assert buffer.samples_per_channel == 16000 and buffer.duration == 1.0
+    assert buffer.samples[0] == 0 and buffer.samples[-1] == 99
+
+    view = buffer.slice(0.5, 0.51)
+    assert len(view) == 320 and np.all(view == 50)
+    assert np.shares_memory(view, buffer.samples)
+
+    with wave.open(io.BytesIO(buffer.to_wav()), "rb") as wav:
+        assert wav.getnchannels() == 2 and wav.getframerate() == 16000
+        data = wav.readframes(wav.getnframes())
+
+    assert data == buffer.samples.tobytes()
+    assert (
+        utils.merge_frames([_frame(160, 1), _frame(160, 2)]).samples_per_channel == 320
+    )
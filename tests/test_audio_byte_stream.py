@@ -0,0 +1,28 @@
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils
+
+
+def test_audio_byte_stream():
+    samples = np.arange(2000, dtype=np.int16)
+    data = samples.tobytes()
+
+    # chunks of odd sizes, splitting samples in half
+    bstream = utils.AudioByteStream(16000, 1, frame_duration=0.01)
+    frames: list[rtc.AudioFrame] = []
+    for i in range(0, len(data), 333):
+        frames.extend(bstream.write(data[i : i + 333]))
+
+    assert len(frames) == 12
+    assert all(f.samples_per_channel == 160 for f in frames)
+
+    tail = bstream.flush()
+    assert len(tail) == 1 and tail[0].samples_per_channel == 80
+    out = np.concatenate([np.frombuffer(f.data, np.int16) for f in frames + tail])
+    assert np.array_equal(out, samples)
+
+    # frames are accepted too
+    frame = rtc.AudioFrame(data, 16000, 1, 2000)
+    assert len(bstream.write(frame)) == 12
+    assert bstream.flush()[0].samples_per_channel == 80
+    assert bstream.flush() == []
@@ -0,0 +1,26 @@
+from livekit import rtc
+from livekit.agents import utils
+
+
+async def test_audio_frontend():
+    front_end = utils.AudioFrontEnd()
+    vad = front_end.subscribe(16000, 1)
+    stt = front_end.subscribe(16000, 1, max_queued=2)
+    raw = front_end.subscribe()
+
+    frames = [rtc.AudioFrame.create(16000, 1, 160) for _ in range(3)]
+    for frame in frames:
+        front_end.push_frame(frame)
+    front_end.close()
+
+    vad_frames = [frame async for frame in vad]
+    stt_frames = [frame async for frame in stt]
+    raw_frames = [frame async for frame in raw]
+
+    # frames already in the requested format are shared, not converted
+    assert all(a is b for a, b in zip(vad_frames, frames))
+    assert all(a is b for a, b in zip(raw_frames, frames))
+    assert len(vad_frames) == 3 and vad.dropped == 0
+
+    # the slow consumer only lost its oldest frame
+    assert stt_frames == frames[1:] and stt.dropped == 1
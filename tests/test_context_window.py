@@ -0,0 +1,79 @@
+import asyncio
+
+from livekit.agents.llm import ChatContext, ChatContextWindow, ChatMessage, ChatRole
+
+
+def _count(msg: ChatMessage) -> int:
+    return len(msg.text.split())
+
+
+async def test_context_window():
+    ctx = ChatContext(messages=[ChatMessage(role=ChatRole.SYSTEM, text="be nice")])
+    summaries = []
+
+    async def _summarize(summary, messages):
+        summaries.append([msg.text for msg in messages])
+        return "the user said hello"
+
+    window = ChatContextWindow(
+        ctx, max_tokens=16, token_counter=_count, summarizer=_summarize
+    )
+    for i in range(8):
+        ctx.messages.append(ChatMessage(role=ChatRole.USER, text=f"hello {i}"))
+
+    # the system message stays pinned, the oldest messages are evicted
+    res = window.build(extra=[ChatMessage(role=ChatRole.USER, text="hi")])
+    assert [msg.text for msg in res.messages] == [
+        "be nice",
+        *(f"hello {i}" for i in range(2, 8)),
+        "hi",
+    ]
+    assert window.tokens == 14
+
+    await asyncio.sleep(0)
+    assert summaries == [["hello 0", "hello 1"]]
+    assert window.summary == "the user said hello"
+
+    # the summary takes place in the budget
+    res = window.build()
+    assert [msg.text for msg in res.messages][:2] == [
+        "be nice",
+        "Summary of the earlier conversation: the user said hello",
+    ]
+    assert window.tokens <= 16
+
+    # editing the history rebuilds the window, without the summary of the messages
+    # evicted before
+    ctx.messages = ctx.messages[:2]
+    res = window.build()
+    assert [msg.text for msg in res.messages] == ["be nice", "hello 0"]
+    assert window.summary is None
+    await window.aclose()
+
+
+async def test_context_window_edited_while_summarizing():
+    ctx = ChatContext(messages=[])
+    summarizing, release = asyncio.Event(), asyncio.Event()
+
+    async def _summarize(summary, messages):
+        summarizing.set()
+        await release.wait()
+        return "outdated"
+
+    window = ChatContextWindow(
+        ctx, max_tokens=4, token_counter=_count, summarizer=_summarize
+    )
+    ctx.messages.extend(
+        ChatMessage(role=ChatRole.USER, text=f"hello {i}") for i in range(4)
+    )
+    window.build()
+    await asyncio.wait_for(summarizing.wait(), 1)
+
+    # the summary in progress covers messages which aren't in the history anymore
+    ctx.messages = [ChatMessage(role=ChatRole.USER, text="hi")]
+    window.build()
+    release.set()
+    await asyncio.sleep(0.01)
+    assert window.summary is None
+    assert [msg.text for msg in window.build().messages] == ["hi"]
+    await window.aclose()
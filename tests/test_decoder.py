@@ -0,0 +1,66 @@
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+from livekit.agents import codecs
+
+
+def _sine(sample_rate: int, num_channels: int, seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    samples = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return np.repeat(samples, num_channels)
+
+
+async def _decode(decoder: codecs.StreamDecoder, data: bytes) -> np.ndarray:
+    async def _feed():
+        for i in range(0, len(data), 1001):  # splits the headers and the samples
+            decoder.push_chunk(data[i : i + 1001])
+            await asyncio.sleep(0)
+        decoder.end_input()
+
+    feed_task = asyncio.create_task(_feed())
+    frames = [frame async for frame in decoder]
+    await feed_task
+    return np.concatenate([np.frombuffer(f.data, dtype=np.int16) for f in frames])
+
+
+async def test_decode_wav():
+    samples = _sine(16000, 2)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(samples.tobytes())
+
+    decoded = await _decode(codecs.StreamDecoder("wav"), buf.getvalue())
+    assert np.array_equal(decoded, samples)
+
+    # resampled and downmixed to the format of the TTS
+    decoder = codecs.StreamDecoder("wav", sample_rate=24000, num_channels=1)
+    decoded = await _decode(decoder, buf.getvalue())
+    assert abs(len(decoded) - 24000) < 100
+
+
+async def test_decode_mp3_planar():
+    av = pytest.importorskip("av")
+
+    # stereo mp3, decoded to planar float samples
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="mp3") as container:
+        stream = container.add_stream("libmp3lame", rate=24000)
+        stream.layout = "stereo"
+        frame = av.AudioFrame.from_ndarray(
+            _sine(24000, 2).reshape(1, -1), format="s16", layout="stereo"
+        )
+        frame.sample_rate = 24000
+        for packet in [*stream.encode(frame), *stream.encode(None)]:
+            container.mux(packet)
+
+    decoded = await _decode(codecs.StreamDecoder("mp3"), buf.getvalue())
+    decoded = decoded.reshape(-1, 2)
+    assert abs(len(decoded) - 24000) < 2000
+    assert np.abs(decoded[:, 0].astype(np.int32) - decoded[:, 1]).max() <= 1
+    assert 7000 < decoded.max() < 9000
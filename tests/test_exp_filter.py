@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from livekit.agents import utils
+
+
+@pytest.mark.parametrize(
+    "max_val, samples",
+    [
+        (-1.0, [(1.0, 0.3, 50), (2.0, 0.9, 7), (0.5, 0.0, 1), (1.0, 0.5, 0)]),
+        # the first sample and the target are above max_val, the values are clamped
+        (0.6, [(1.0, 0.8, 10), (1.0, 0.2, 20), (1.0, 1.0, 30), (3.0, 0.4, 5)]),
+    ],
+)
+def test_apply_many(max_val: float, samples: list[tuple[float, float, int]]):
+    many = utils.ExpFilter(0.9, max_val=max_val)
+    loop = utils.ExpFilter(0.9, max_val=max_val)
+    out = np.empty(64)
+    for exp, sample, count in samples:
+        # the first call starts from the reset state (_filtered == -1)
+        expected = [loop.apply(exp, sample) for _ in range(count)]
+        values = many.apply_many(exp, sample, count, out=out)
+        np.testing.assert_allclose(values, expected, rtol=1e-12)
+        assert many.filtered() == pytest.approx(loop.filtered(), rel=1e-12)
+
+    # the state is reset, the first sample is taken as is again
+    many.reset()
+    loop.reset()
+    expected = [loop.apply(1.0, 0.7) for _ in range(3)]
+    np.testing.assert_allclose(many.apply_many(1.0, 0.7, 3), expected, rtol=1e-12)
@@ -0,0 +1,72 @@
+import asyncio
+
+from aiohttp import web
+from livekit.agents import http
+
+
+async def test_shared_session():
+    peers = set()
+
+    async def handler(request: web.Request) -> web.Response:
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}/"
+
+    try:
+        session = http.session()
+        assert http.session() is session
+
+        # the request after the warmup reuses its connection
+        await http.warmup([url])
+        async with session.get(url) as resp:
+            assert await resp.text() == "ok"
+
+        assert len(peers) == 1
+
+        await http.close()
+        assert session.closed
+        assert http.session() is not session
+        await http.close()
+    finally:
+        await runner.cleanup()
+
+
+async def test_add_warmup_url():
+    peers = []
+
+    async def handler(request: web.Request) -> web.Response:
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}/"
+
+    try:
+        # a plugin created inside the job connects to its host right away, once
+        http.add_warmup_url(url)
+        http.add_warmup_url(url)
+        await asyncio.gather(*http._warmup_tasks)
+        assert len(peers) == 1
+
+        async with http.session().get(url) as resp:
+            assert await resp.text() == "ok"
+
+        assert len(set(peers)) == 1
+        await http.close()
+    finally:
+        http._warmup_urls.discard(url)
+        await runner.cleanup()
@@ -0,0 +1,25 @@
+import pytest
+from livekit.agents import utils
+
+
+@pytest.mark.parametrize("counts", [[0, 1, 3, 2], [5, 1, 4], [12, 3, 25, 0, 7]])
+def test_add_samples(counts: list[int]):
+    many, loop = utils.MovingAverage(5), utils.MovingAverage(5)
+    assert many.get_avg() == loop.get_avg() == 0
+
+    for i, count in enumerate(counts):
+        sample = float(i % 2 + i)
+        many.add_samples(sample, count)
+        for _ in range(count):
+            loop.add_sample(sample)
+
+        assert many.size() == loop.size()
+        assert many.get_avg() == pytest.approx(loop.get_avg())
+
+    # the window is filled from the reset state again
+    many.reset()
+    loop.reset()
+    many.add_samples(2.0, 8)
+    for _ in range(8):
+        loop.add_sample(2.0)
+    assert many.get_avg() == pytest.approx(loop.get_avg())
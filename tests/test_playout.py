@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import numpy as np
+from livekit import rtc
+from livekit.agents.voice_assistant.playout import PlayoutScheduler
+
+
+def _frame(samples: int, value: int = 1) -> rtc.AudioFrame:
+    data = np.full(samples, value, dtype=np.int16)
+    return rtc.AudioFrame(data.tobytes(), 24000, 1, samples)
+
+
+async def test_playout_scheduler():
+    playout = PlayoutScheduler(24000, 1, target_buffer=0.05, frame_duration=0.01)
+
+    async def _tts():
+        for _ in range(5):
+            playout.push_frame(_frame(2350))  # ~98ms, not a multiple of 10ms
+            await asyncio.sleep(0.02)
+        playout.end_input()
+
+    tts_task = asyncio.create_task(_tts())
+    start = time.monotonic()
+    frames = [samples async for samples in playout]
+    elapsed = time.monotonic() - start
+    await tts_task
+
+    # re-chunked into 10ms frames, the last one padded with silence
+    assert all(len(f) == 240 for f in frames)
+    assert len(frames) == 49
+    assert frames[-1][-1] == 0 and frames[-2][-1] == 1
+    assert playout.input_duration == 5 * 2350 / 24000
+
+    # paced in real time, keeping 50ms queued ahead of the audio clock
+    assert 0.42 < elapsed < 0.6
+    assert 0.04 < playout.queued_duration <= 0.05
+    assert playout.pushed_duration == 0.49
+
+
+async def test_playout_truncate():
+    playout = PlayoutScheduler(24000, 1, frame_duration=0.01)
+    playout.push_frame(_frame(24000, 1000))  # 1s
+
+    dropped = playout.truncate(0.2)
+    assert abs(dropped - 0.8) < 1e-9
+    assert abs(playout.buffered_duration - 0.2) < 1e-9
+
+    # the frames pushed after the truncation are ignored
+    playout.push_frame(_frame(2400))
+    frames = [samples async for samples in playout]
+    assert len(frames) == 20
+    assert frames[0][0] == 1000 and frames[-1][-1] == 0
+    assert np.all(np.diff(np.concatenate(frames)) <= 0)
@@ -1,3 +1,4 @@
+import array
 import asyncio
 import logging
 import multiprocessing
@@ -5,7 +6,8 @@ import pickle
 from os import environ
 
 from livekit import api, rtc
-from livekit.agents.apipe import AsyncPipe
+from livekit.agents import ipc, ipc_enc, metrics
+from livekit.agents.apipe import AsyncPipe, ThreadedAsyncPipe
 from livekit.agents.ipc.protocol import (
     IPC_MESSAGES,
     Log,
@@ -19,12 +21,12 @@ TEST_STR = "the people who are crazy enough to think they can change the world a
 
 
 def _process_protocol_target(cch):
-    loop = asyncio.get_event_loop()
+    loop = asyncio.new_event_loop()
     cpipe = AsyncPipe(cch, loop, messages=IPC_MESSAGES)
 
     async def _run():
         assert await cpipe.read() == StartJobRequest(job=agent.Job())
-        await cpipe.write(StartJobResponse(exc=None))
+        await cpipe.write(StartJobResponse())
         await cpipe.write(Log(level=logging.INFO, message=TEST_STR))
 
     loop.run_until_complete(_run())
@@ -32,7 +34,7 @@ def _process_protocol_target(cch):
 
 
 def test_protocol():
-    loop = asyncio.get_event_loop()
+    loop = asyncio.new_event_loop()
     pch, cch = multiprocessing.Pipe(duplex=True)
     proc = multiprocessing.Process(target=_process_protocol_target, args=(cch,))
     ppipe = AsyncPipe(pch, loop=loop, messages=IPC_MESSAGES)
@@ -40,12 +42,148 @@ def test_protocol():
 
     async def _run():
         await ppipe.write(StartJobRequest(job=agent.Job()))
-        assert await ppipe.read() == StartJobResponse(exc=None)
+        assert await ppipe.read() == StartJobResponse()
         assert await ppipe.read() == Log(level=logging.INFO, message=TEST_STR)
 
     loop.run_until_complete(_run())
     ppipe.close()
     proc.join()
+    loop.close()
+
+
+async def test_threaded_pipe_write_nowait():
+    # the pipe used on Windows, write_nowait must not fail when the writer lags
+    loop = asyncio.get_running_loop()
+    pch, cch = multiprocessing.Pipe(duplex=True)
+    ppipe = ThreadedAsyncPipe(pch, loop, messages=IPC_MESSAGES)
+    cpipe = ThreadedAsyncPipe(cch, loop, messages=IPC_MESSAGES)
+    for i in range(100):
+        ppipe.write_nowait(Log(level=logging.INFO, message=str(i)))
+
+    for i in range(100):
+        assert (await cpipe.read()).message == str(i)
+
+    ppipe.close()
+    cpipe.close()
+
+
+def test_codec():
+    msgs = [
+        StartJobRequest(job=agent.Job(id="job"), url="ws://localhost", token="t"),
+        Log(level=logging.WARNING, logger_name="test", message=TEST_STR),
+        ipc.protocol.Pong(last_timestamp=1, timestamp=-2),
+        ipc.protocol.JobMetrics(cpu_time=0.5, rss=1 << 33, tasks=3),
+        ipc.protocol.LogBatch(
+            records=[{"level": logging.INFO, "name": "test", "msg": TEST_STR}]
+        ),
+        ipc.protocol.ShutdownRequest(),
+    ]
+    for msg in msgs:
+        buf = bytearray(b"prefix")
+        ipc_enc.encode_msg_into(msg, buf)
+        view = memoryview(buf)[len(b"prefix") :]
+        assert ipc_enc.decode_msg(view, IPC_MESSAGES) == msg
+        assert bytes(view) == ipc_enc.encode_msg(msg)
+
+
+def _audio_ring_writer_target(ring: ipc.AudioRing, num_frames: int):
+    async def _run():
+        writer = ring.writer()
+        for i in range(num_frames):
+            data = array.array("h", [i] * 480)
+            frame = rtc.AudioFrame(
+                data=data, sample_rate=48000, num_channels=1, samples_per_channel=480
+            )
+            await writer.write(frame)
+        writer.close()
+
+    asyncio.new_event_loop().run_until_complete(_run())
+    ring.close()
+
+
+async def test_audio_ring():
+    num_frames = 500
+    # small capacity so the writer has to wait for the reader and the ring wraps
+    ring = ipc.AudioRing(capacity=8000)
+    proc = multiprocessing.Process(
+        target=_audio_ring_writer_target, args=(ring, num_frames)
+    )
+    proc.start()
+
+    reader = ring.reader()
+    i = 0
+    async for frame in reader:
+        assert frame.sample_rate == 48000
+        assert frame.samples_per_channel == 480
+        assert frame.data[0] == frame.data[-1] == i
+        i += 1
+
+    assert i == num_frames
+    reader.close()
+    proc.join()
+    ring.close()
+    ring.unlink()
+
+
+async def test_audio_ring_close_race():
+    ring = ipc.AudioRing(capacity=8000)
+    reader, writer = ring.reader(), ring.writer()
+    frame = rtc.AudioFrame(
+        data=array.array("h", [7] * 480),
+        sample_rate=48000,
+        num_channels=1,
+        samples_per_channel=480,
+    )
+
+    # the writer writes its last frame and closes right after the reader found
+    # the ring empty, the frame must still be read
+    read_nowait = reader.read_nowait
+
+    def _read_nowait():
+        result = read_nowait()
+        if result is None and not writer._closed:
+            assert writer.write_nowait(frame)
+            writer.close()
+        return result
+
+    reader.read_nowait = _read_nowait
+    assert (await asyncio.wait_for(reader.read(), 1)).data[0] == 7
+
+    reader.close()
+    ring.close()
+    ring.unlink()
+
+
+async def test_proc_pool():
+    pool = ipc.ProcPool(num_idle_processes=2, max_jobs_per_process=1)
+    pool.start()
+    assert len(pool.idle_processes) == 2
+
+    for proc in pool.idle_processes:
+        await proc.wait_initialized()
+        assert proc.initialized
+        assert proc.job is None
+
+    assert pool.stats.processes_spawned == 2
+    assert pool.stats.last_spawn_latency > 0
+
+    await pool.aclose()
+    assert len(pool.processes) == 0
+
+
+async def test_job_process_exit():
+    proc = ipc.JobProcess()
+    run_task = asyncio.create_task(proc.run())
+    await proc.wait_initialized()
+    assert proc.exitcode is None
+
+    killed = metrics.JOB_PROCESS_EXITS.get({"status": "SIGKILL"})
+    proc._sig_kill()
+    await proc.join()
+    await run_task
+    assert proc.exit_signal == "SIGKILL"
+    assert metrics.JOB_PROCESS_EXITS.get({"status": "SIGKILL"}) == killed + 1
+    await proc.aclose()
 
 
 def _process_rtc_target(q: multiprocessing.Queue, url: str, token: str):
@@ -0,0 +1,43 @@
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils
+
+
+def _sine(sample_rate: int, seconds: float, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    samples = (10000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return np.repeat(samples, channels)
+
+
+def test_resampler_frames():
+    samples = _sine(48000, 0.5, channels=2)
+    resampler = utils.Resampler(48000, 16000, input_channels=2, output_channels=1)
+    out = []
+    for i in range(0, len(samples), 960):
+        frame = rtc.AudioFrame(samples[i : i + 960].tobytes(), 48000, 2, 480)
+        out.append(resampler.push_frame(frame))
+
+    # 10ms in, 10ms out
+    assert all(f.samples_per_channel == 160 and f.num_channels == 1 for f in out)
+
+    # same output as a single block, the state is carried over the frames
+    block = utils.Resampler(48000, 16000, input_channels=2, output_channels=1)
+    merged = np.concatenate([np.frombuffer(f.data, dtype=np.int16) for f in out])
+    assert np.array_equal(merged, block.push(samples))
+
+    # the tail held back by the filter
+    delay = resampler.flush()
+    assert delay.samples_per_channel == round(resampler.delay * 16000)
+
+
+def test_resampler_quality():
+    resampler = utils.Resampler(44100, 48000)
+    out = resampler.push(_sine(44100, 0.5))
+    assert len(out) == 24000
+
+    # compare with the sine at the output rate, delayed by the filter
+    t = np.arange(24000) / 48000 - resampler.delay
+    expected = 10000 * np.sin(2 * np.pi * 440 * t)
+    noise = out[1000:] - expected[1000:]
+    snr = 10 * np.log10(np.mean(expected[1000:] ** 2) / np.mean(noise**2))
+    assert snr > 60
@@ -0,0 +1,108 @@
+import asyncio
+
+import numpy as np
+import pytest
+from livekit import rtc
+from livekit.agents import tts, voice_assistant
+
+
+class _FakeTTS(tts.TTS):
+    def __init__(self, voice: int = 1) -> None:
+        super().__init__(streaming_supported=False, sample_rate=16000, num_channels=1)
+        self.voice = voice
+        self.calls = 0
+
+    def cache_namespace(self) -> str:
+        return f"fake:{self.voice}"
+
+    async def synthesize(self, text: str):
+        self.calls += 1
+        for i in range(3):
+            frame = rtc.AudioFrame.create(16000, 1, 800)
+            np.frombuffer(frame.data, dtype=np.int16)[:] = self.voice * (i + 1)
+            yield tts.SynthesizedAudio(text=text, data=frame)
+
+
+async def _pcm(cached: tts.CachedTTS, text: str) -> bytes:
+    return b"".join(
+        [
+            bytes(memoryview(a.data.data).cast("B"))
+            async for a in cached.synthesize(text)
+        ]
+    )
+
+
+async def test_tts_cache(tmp_path):
+    inner = _FakeTTS()
+    cached = tts.CachedTTS(inner, cache_dir=str(tmp_path))
+    await cached.prefill(["Hello there!"])
+    assert inner.calls == 1 and cached.cached("hello  there!") is False
+    assert cached.cached("  Hello there! ")
+
+    expected = await _pcm(tts.CachedTTS(_FakeTTS()), "Hello there!")
+    assert await _pcm(cached, "Hello there!") == expected
+    assert inner.calls == 1 and cached.hits == 1
+
+    # another process only finds the phrase on disk (memory-mapped)
+    other = tts.CachedTTS(_FakeTTS(), cache_dir=str(tmp_path))
+    assert await _pcm(other, "Hello   there!") == expected
+    assert other.misses == 0
+
+
+async def test_tts_cache_voices(tmp_path):
+    inner = _FakeTTS(voice=1)
+    cached = tts.CachedTTS(inner, cache_dir=str(tmp_path))
+    voice1 = await _pcm(cached, "Hello there!")
+
+    # the voice changed at runtime (e.g. set_voice) isn't served the other voice
+    inner.voice = 2
+    assert not cached.cached("Hello there!")
+    voice2 = await _pcm(cached, "Hello there!")
+    assert voice2 != voice1 and inner.calls == 2
+
+    # neither is another TTS sharing the directory
+    other = tts.CachedTTS(_FakeTTS(voice=3), cache_dir=str(tmp_path))
+    assert await _pcm(other, "Hello there!") not in (voice1, voice2)
+    assert other.misses == 1
+
+    inner.voice = 1
+    assert await _pcm(cached, "Hello there!") == voice1
+    assert inner.calls == 2
+
+
+def test_tts_cache_namespace():
+    class _NoNamespaceTTS(tts.TTS):
+        def __init__(self) -> None:
+            super().__init__(
+                streaming_supported=False, sample_rate=16000, num_channels=1
+            )
+
+        def synthesize(self, text: str):
+            raise NotImplementedError
+
+    with pytest.raises(NotImplementedError):
+        tts.CachedTTS(_NoNamespaceTTS())
+
+    cached = tts.CachedTTS(_NoNamespaceTTS(), namespace="my-voice")
+    assert cached.cache_namespace() == "my-voice"
+
+
+class _FakeAudioSource:
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        pass
+
+
+async def test_say_uses_cache():
+    inner = _FakeTTS()
+    cached = tts.CachedTTS(inner)
+    assistant = voice_assistant.VoiceAssistant(
+        vad=None, stt=None, llm=None, tts=cached, playout_buffer=0.0
+    )
+    assistant._started = True
+    assistant._audio_source = _FakeAudioSource()
+
+    # say() streams the text by default, the phrase is synthesized once
+    for _ in range(2):
+        await asyncio.wait_for(assistant.say("Hello there!"), 5)
+    assert inner.calls == 1 and cached.hits == 1
+    assert [m.text for m in assistant.chat_context.messages] == ["Hello there!"] * 2
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import torch
+from livekit import agents, rtc
+from livekit.plugins import silero
+from livekit.plugins.silero import vad as silero_vad
+
+
+class _FakeModel:
+    """Recurrent like silero v5 (_state/_context), the probability of a window
+    depends on the previous windows of its stream"""
+
+    def __init__(self) -> None:
+        self.overlaps = 0
+        self._lock = threading.Lock()
+        self.reset_states()
+
+    def reset_states(self) -> None:
+        self._state = torch.zeros(0)
+        self._context = torch.zeros(0)
+        self._last_sr = 0
+        self._last_batch_size = 0
+
+    def __call__(self, x: torch.Tensor, sr: int) -> torch.Tensor:
+        if not self._lock.acquire(blocking=False):
+            self.overlaps += 1
+            self._lock.acquire()
+
+        try:
+            time.sleep(0.002)  # leaves the time to another thread to overlap
+            batch_size = x.shape[0]
+            if self._last_batch_size != batch_size or self._last_sr != sr:
+                self._state = torch.zeros(2, batch_size, 1)
+                self._context = torch.zeros(batch_size, 1)
+
+            self._state = 0.5 * self._state + x.mean(dim=1).reshape(1, -1, 1)
+            self._context = x[:, -1:]
+            self._last_sr, self._last_batch_size = sr, batch_size
+            return torch.sigmoid(10 * self._state[0])
+        finally:
+            self._lock.release()
+
+
+def _frames(amplitude: float, count: int = 40) -> list[rtc.AudioFrame]:
+    frames = []
+    for i in range(count):
+        frame = rtc.AudioFrame.create(16000, 1, 160)
+        value = int(amplitude * 32767 * (1 if i % 8 < 5 else -1))
+        np.frombuffer(frame.data, dtype=np.int16)[:] = value
+        frames.append(frame)
+    return frames
+
+
+async def _raw_probs(streams: list, amplitudes: list[float]) -> list[list[float]]:
+    async def _collect(stream) -> list[float]:
+        return [
+            e.raw_inference_prob
+            async for e in stream
+            if e.type == agents.vad.VADEventType.INFERENCE_DONE
+        ]
+
+    tasks = [asyncio.create_task(_collect(s)) for s in streams]
+    frames = [_frames(a) for a in amplitudes]
+    for i in range(len(frames[0])):
+        for stream, stream_frames in zip(streams, frames):
+            stream.push_frame(stream_frames[i])
+        await asyncio.sleep(0)
+
+    for stream in streams:
+        await stream.aclose()
+    return await asyncio.wait_for(asyncio.gather(*tasks), 10)
+
+
+async def test_vads_share_the_model(monkeypatch):
+    model = _FakeModel()
+    monkeypatch.setitem(
+        silero_vad._hub_models, True, silero_vad._InferenceBatcher(model)
+    )
+    amplitudes = [0.1, -0.3, 0.5, -0.05]
+
+    # each stream alone
+    expected = [(await _raw_probs([silero.VAD().stream()], [a]))[0] for a in amplitudes]
+
+    # two streams on each of two VADs, all using the same model
+    vads = [silero.VAD(), silero.VAD()]
+    streams = [vad.stream() for vad in vads for _ in range(2)]
+    probs = await _raw_probs(streams, amplitudes)
+
+    assert model.overlaps == 0
+    for stream_probs, stream_expected in zip(probs, expected):
+        assert len(stream_probs) == len(stream_expected) > 0
+        np.testing.assert_allclose(stream_probs, stream_expected, atol=1e-6)
@@ -0,0 +1,248 @@
+import asyncio
+
+from livekit import rtc
+from livekit.agents import llm, stt, tts, voice_assistant
+from livekit.agents.voice_assistant.assistant import _Listener, _StartArgs
+
+_HEARD = "Hello there, how are you doing today? "
+_UNHEARD = "This part was never synthesized by the TTS, the LLM was ahead of it."
+
+
+class _FakeStream(tts.SynthesizeStream):
+    """Synthesizes 1s of audio for the first text pushed, the rest is ignored"""
+
+    def __init__(self) -> None:
+        self._events = asyncio.Queue[tts.SynthesisEvent | None]()
+        self._synthesized = False
+        self.pushed: list[str] = []
+
+    def push_text(self, token: str | None) -> None:
+        if token:
+            self.pushed.append(token)
+        if not token or self._synthesized:
+            return
+
+        self._synthesized = True
+        for _ in range(100):
+            frame = rtc.AudioFrame.create(16000, 1, 160)
+            audio = tts.SynthesizedAudio(text=token, data=frame)
+            self._events.put_nowait(
+                tts.SynthesisEvent(type=tts.SynthesisEventType.AUDIO, audio=audio)
+            )
+
+    async def aclose(self, *, wait: bool = True) -> None:
+        self._events.put_nowait(None)
+
+    async def __anext__(self) -> tts.SynthesisEvent:
+        event = await self._events.get()
+        if event is None:
+            raise StopAsyncIteration
+
+        return event
+
+
+class _FakeTTS(tts.TTS):
+    def __init__(self) -> None:
+        super().__init__(streaming_supported=True, sample_rate=16000, num_channels=1)
+        self.streams: list[_FakeStream] = []
+
+    def synthesize(self, text: str):
+        raise NotImplementedError
+
+    def stream(self) -> tts.SynthesizeStream:
+        stream = _FakeStream()
+        self.streams.append(stream)
+        return stream
+
+
+class _FakeLLMStream(llm.LLMStream):
+    def __init__(self, tokens: list[str]) -> None:
+        super().__init__()
+        self._tokens = tokens
+        self.pulled = 0
+
+    def __aiter__(self) -> "_FakeLLMStream":
+        return self
+
+    async def __anext__(self) -> llm.ChatChunk:
+        await asyncio.sleep(0.01)
+        if self.pulled == len(self._tokens):
+            raise StopAsyncIteration
+
+        self.pulled += 1
+        delta = llm.ChoiceDelta(content=self._tokens[self.pulled - 1])
+        return llm.ChatChunk(choices=[llm.Choice(delta=delta)])
+
+    async def aclose(self, wait: bool = True) -> None:
+        pass
+
+
+class _FakeLLM(llm.LLM):
+    """Answers with the same tokens, records the user text of each request"""
+
+    def __init__(self, tokens: list[str]) -> None:
+        self._tokens = tokens
+        self.requests: list[str] = []
+        self.streams: list[_FakeLLMStream] = []
+
+    async def chat(self, history, fnc_ctx=None, temperature=None, n=None):
+        self.requests.append(history.messages[-1].text)
+        stream = _FakeLLMStream(self._tokens)
+        self.streams.append(stream)
+        return stream
+
+
+class _FakeAudioSource:
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        pass
+
+
+async def test_interrupted_text_is_synthesized_text():
+    assistant = voice_assistant.VoiceAssistant(
+        vad=None, stt=None, llm=None, tts=_FakeTTS(), playout_buffer=0.0
+    )
+    assistant._started = True
+    assistant._audio_source = _FakeAudioSource()
+
+    async def _source():
+        yield _HEARD
+        await asyncio.sleep(0.1)
+        yield _UNHEARD  # pushed to the TTS but no audio comes back for it
+        await asyncio.sleep(10)
+
+    say_task = asyncio.create_task(assistant.say(_source()))
+    await asyncio.sleep(0.4)
+    assistant._interrupt_speech(assistant._playing_speech)
+    await asyncio.wait_for(say_task, 5)
+
+    # about 0.6s out of the 1s synthesized for the first segment were played
+    text = assistant.chat_context.messages[-1].text
+    assert text and _HEARD.startswith(text) and len(text) < len(_HEARD)
+
+
+_ANSWER = ["Sure. ", "It is sunny ", "today."]
+
+
+def _transcript(type: stt.SpeechEventType, text: str = "") -> stt.SpeechEvent:
+    return stt.SpeechEvent(
+        type=type, alternatives=[stt.SpeechData(language="en", text=text)]
+    )
+
+
+def _speculative_assistant(fake_llm: _FakeLLM, fake_tts: _FakeTTS):
+    """The STT events are fed to the assistant, as received by its recognize loop"""
+    assistant = voice_assistant.VoiceAssistant(
+        vad=None,
+        stt=None,
+        llm=fake_llm,
+        tts=fake_tts,
+        chat_ctx=llm.ChatContext(messages=[]),
+        playout_buffer=0.0,
+        speculative=True,
+        speculation_delay=0.05,
+    )
+    assistant._started = True
+    assistant._audio_source = _FakeAudioSource()
+    listener = _Listener(identity="user")
+    assistant._listeners[listener.identity] = listener
+
+    committed = asyncio.get_running_loop().create_future()
+    assistant.on("agent_speech_committed", lambda ctx, msg: committed.set_result(msg))
+    return assistant, listener, committed
+
+
+async def test_speculation_confirmed():
+    fake_llm, fake_tts = _FakeLLM(_ANSWER), _FakeTTS()
+    assistant, listener, committed = _speculative_assistant(fake_llm, fake_tts)
+
+    interim = _transcript(stt.SpeechEventType.INTERIM_TRANSCRIPT, "what's the weather")
+    assistant._recv_interim_transcript(listener, interim)
+    await asyncio.sleep(0.2)  # the interim transcript is stable, the answer starts
+    assert fake_llm.requests == ["what's the weather"]
+    assert not assistant._answer_speech.validated
+
+    final = _transcript(stt.SpeechEventType.FINAL_TRANSCRIPT, "What's the weather?")
+    assistant._recv_final_transcript(listener, final)
+    msg = await asyncio.wait_for(committed, 5)
+
+    # the speculative answer is played, it isn't requested again
+    assert msg.text == "".join(_ANSWER)
+    assert fake_llm.requests == ["what's the weather"]
+    stats = assistant.speculation_stats
+    assert (stats.started, stats.hits, stats.misses) == (1, 1, 0)
+    assert stats.latency_saved >= 0.15
+    assert [m.text for m in assistant.chat_context.messages] == [
+        "What's the weather?",
+        "".join(_ANSWER),
+    ]
+
+
+async def test_speculation_missed():
+    fake_llm, fake_tts = _FakeLLM(_ANSWER), _FakeTTS()
+    assistant, listener, committed = _speculative_assistant(fake_llm, fake_tts)
+
+    interim = _transcript(stt.SpeechEventType.INTERIM_TRANSCRIPT, "what's the weather")
+    assistant._recv_interim_transcript(listener, interim)
+    await asyncio.sleep(0.2)
+    speculative = assistant._answer_speech
+
+    text = "What's the weather in Paris?"
+    final = _transcript(stt.SpeechEventType.FINAL_TRANSCRIPT, text)
+    assistant._recv_final_transcript(listener, final)
+    assistant._transcript_finished(
+        listener, _transcript(stt.SpeechEventType.END_OF_SPEECH)
+    )
+    msg = await asyncio.wait_for(committed, 5)
+
+    # the speculative answer is discarded, the answer is generated again
+    assert assistant._answer_speech is not speculative and not speculative.validated
+    assert fake_llm.requests == ["what's the weather", text]
+    stats = assistant.speculation_stats
+    assert (stats.started, stats.hits, stats.misses) == (1, 0, 1)
+    assert [m.text for m in assistant.chat_context.messages] == [text, msg.text]
+
+
+async def test_speculation_first_sentence():
+    fake_llm, fake_tts = _FakeLLM(_ANSWER), _FakeTTS()
+    assistant, listener, committed = _speculative_assistant(fake_llm, fake_tts)
+
+    interim = _transcript(stt.SpeechEventType.INTERIM_TRANSCRIPT, "what's the weather")
+    assistant._recv_interim_transcript(listener, interim)
+    await asyncio.sleep(0.3)
+
+    # only the first sentence is synthesized until the speculation is confirmed
+    assert [s.pushed for s in fake_tts.streams] == [["Sure. "]]
+    assert fake_llm.streams[0].pulled == 1
+
+    final = _transcript(stt.SpeechEventType.FINAL_TRANSCRIPT, "what's the weather")
+    assistant._recv_final_transcript(listener, final)
+    await asyncio.wait_for(committed, 5)
+    assert [s.pushed for s in fake_tts.streams] == [_ANSWER]
+
+
+async def test_aclose_closes_context_window():
+    summarizing = asyncio.Event()
+
+    async def _summarize(summary, messages):
+        summarizing.set()
+        await asyncio.sleep(10)
+        return "summary"
+
+    window = llm.ChatContextWindow(
+        llm.ChatContext(messages=[]), max_tokens=4, summarizer=_summarize
+    )
+    assistant = voice_assistant.VoiceAssistant(
+        vad=None, stt=None, llm=None, tts=_FakeTTS(), context_window=window
+    )
+    assistant._started = True
+    assistant._start_args = _StartArgs(room=rtc.Room(), participant=None)
+
+    window.chat_ctx.messages.append(
+        llm.ChatMessage(role=llm.ChatRole.USER, text="hello " * 10)
+    )
+    window.build()
+    await asyncio.wait_for(summarizing.wait(), 1)
+    task = window._summarize_task
+
+    await asyncio.wait_for(assistant.aclose(), 5)
+    assert task.cancelled()
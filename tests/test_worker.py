@@ -0,0 +1,77 @@
+import asyncio
+import os
+
+from livekit.agents import WorkerLoad, metrics, worker
+from livekit.protocol import agent
+
+
+def test_default_load_fnc():
+    load = WorkerLoad(
+        active_jobs=2,
+        pending_jobs=0,
+        max_jobs=None,
+        jobs_cpu=0.3,
+        jobs_memory=2 << 30,
+        system_cpu=0.4,
+        system_memory_used=4 << 30,
+        system_memory_total=16 << 30,
+        loop_lag=0.0,
+    )
+    assert worker.default_load_fnc(load) == 0.4
+
+    # jobs being set up are counted as average running jobs
+    load.pending_jobs = 2
+    assert round(worker.default_load_fnc(load), 2) == 0.7
+
+
+def test_load_sampler():
+    sampler = worker._LoadSampler()
+    sampler.sample([os.getpid()])
+    load = sampler.load(active_jobs=1, pending_jobs=0, max_jobs=4, loop_lag=0.0)
+    assert load.jobs_memory > 0
+    assert load.system_memory_total > load.system_memory_used > 0
+
+
+def test_histogram():
+    h = metrics.Histogram("test_latency_seconds", "test", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        h.observe(value)
+
+    text = h.render()
+    assert 'test_latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 3\n' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4\n' in text
+    assert "test_latency_seconds_count 4\n" in text
+
+    # observations made in a job process are merged in the worker
+    other = metrics.Histogram("test_latency_seconds", "test", buckets=(0.1, 1))
+    counts, total = h.snapshot()
+    other.merge(counts, total)
+    assert other.snapshot() == h.snapshot()
+
+
+async def test_max_jobs_concurrent_requests():
+    async def _request_fnc(req):
+        await asyncio.sleep(0.05)  # still answering when the other requests arrive
+        await req.reject()
+
+    w = worker.Worker(
+        worker.WorkerOptions(
+            request_fnc=_request_fnc, max_jobs=1, load_fnc=lambda _: 0.0
+        )
+    )
+    for i in range(3):
+        w._handle_availability(agent.AvailabilityRequest(job=agent.Job(id=f"job-{i}")))
+
+    # the first request reserved the only slot, the others are rejected right away
+    assert w.load.pending_jobs == 1
+    await asyncio.sleep(0)
+    rejected = [w._chan.recv_nowait().availability for _ in range(2)]
+    assert {a.job_id for a in rejected} == {"job-1", "job-2"}
+    assert not any(a.available for a in rejected)
+
+    # draining waits for the job still being answered
+    await w.drain()
+    assert w.load.pending_jobs == 0
+    msgs = [w._chan.recv_nowait() for _ in range(2)]  # status update and answer
+    assert msgs[1].availability.job_id == "job-0"